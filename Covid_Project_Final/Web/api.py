@@ -0,0 +1,5 @@
+# api.py
+# Ứng dụng ASGI cho API HTTP (xem modules/http_api.py). Chạy:  uvicorn api:app --host 127.0.0.1 --port 8000
+from modules.http_api import create_app
+
+app = create_app()
@@ -5,17 +5,35 @@ from datetime import timedelta
 import os
 
 # Import các module cần thiết
-from modules.data_processing import load_data
+from modules.data_processing import get_dataset
 from modules.utils import create_animated_metric_card
 from modules.visualization import show_enhanced_time_trends, show_enhanced_world_map, show_enhanced_comparative_analysis
 from modules.overview_analysis import show_overview_analysis
+from modules.ml_analysis import show_enhanced_advanced_analysis, show_ai_insights
 from modules.chatbot import show_chatbot_ui
+from modules.navigation import render_active_view
 
-#Tối ưu: Cache dữ liệu để tăng tốc độ
-@st.cache_data
-def get_data():
-    df = load_data()
-    return df
+# Mỗi mục dashboard là một fragment: tương tác với widget trong mục chỉ chạy lại mục đó
+@st.fragment
+def time_trends_view(filtered_df):
+    show_enhanced_time_trends(filtered_df)
+
+@st.fragment
+def world_map_view(df, dataset_version):
+    show_enhanced_world_map(df, dataset_version)
+
+@st.fragment
+def overview_view(df, dataset_version):
+    show_overview_analysis(df, dataset_version)
+
+@st.fragment
+def comparison_view(df, dataset_version):
+    show_enhanced_comparative_analysis(df, dataset_version)
+
+@st.fragment
+def advanced_analysis_view(df, dataset_version):
+    show_enhanced_advanced_analysis(df, dataset_version)
+    show_ai_insights(df, dataset_version)
 
 def main():
     st.set_page_config(
@@ -34,10 +52,13 @@ def main():
         
     st.markdown("<h1 class=\"main-header\">COVID-19 Global Dashboard</h1>", unsafe_allow_html=True)
     
-    df = get_data()
-    if df is None:
+    # Dataset dùng chung, chỉ đọc (không sao chép ở mỗi lần rerun); các tab không được sửa trực tiếp df
+    dataset = get_dataset()
+    if dataset is None:
         st.error("Lỗi nghiêm trọng: Không thể tải dữ liệu. Vui lòng kiểm tra file data.")
         return
+    dataset.check_unchanged()
+    df = dataset.frame
     
     #Sidebar và bộ lọc (Đã cập nhật logic)
     with st.sidebar:
@@ -78,8 +99,8 @@ def main():
         st.info(f"Dữ liệu từ {start_date.strftime('%d/%m/%Y')} đến {end_date.strftime('%d/%m/%Y')}")
         st.markdown("</div>", unsafe_allow_html=True)
 
-    #Lọc dữ liệu chính
-    filtered_df = df.copy()
+    #Lọc dữ liệu chính (mỗi phép lọc tạo DataFrame mới nên không cần df.copy())
+    filtered_df = df
     if selected_continent != "Tất cả":
         filtered_df = filtered_df[filtered_df["continent"] == selected_continent]
     if selected_location not in ["Toàn thế giới", "Tất cả quốc gia"]:
@@ -123,25 +144,15 @@ def main():
         
     st.markdown(f"""<div class="insight-box"><h4>Thông tin chi tiết</h4><p>Tỷ lệ tử vong (CFR): <strong>{mortality_rate:.2f}%</strong> | Tỷ lệ tiêm chủng trung bình (có trọng số): <strong>{avg_vaccination_rate:.1f}%</strong> | Quốc gia được phân tích: <strong>{countries_affected}</strong></p></div>""", unsafe_allow_html=True)
 
-    #Tabs 
-    tabs = st.tabs([
-        " Xu hướng theo thời gian", 
-        " Bản đồ thế giới", 
-        " Phân tích tổng quan",
-        " So sánh quốc gia",
-        "🤖 Chatbot AI"
-    ])
-    
-    with tabs[0]:
-        show_enhanced_time_trends(filtered_df)
-    with tabs[1]:
-        show_enhanced_world_map(df) 
-    with tabs[2]:
-        show_overview_analysis(df)
-    with tabs[3]:
-        show_enhanced_comparative_analysis(df)
-    with tabs[4]:
-        show_chatbot_ui()
+    #Các mục: chỉ mục đang chọn được chạy (st.tabs chạy cả sáu tab ở mỗi lần rerun)
+    render_active_view({
+        " Xu hướng theo thời gian": lambda: time_trends_view(filtered_df),
+        " Bản đồ thế giới": lambda: world_map_view(df, dataset.version),
+        " Phân tích tổng quan": lambda: overview_view(df, dataset.version),
+        " So sánh quốc gia": lambda: comparison_view(df, dataset.version),
+        " Phân tích nâng cao": lambda: advanced_analysis_view(df, dataset.version),
+        "🤖 Chatbot AI": show_chatbot_ui
+    })
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,58 @@
+# benchmarks/bench_chat_history.py
+"""Thời gian một lần rerun của trang chat với 10 / 100 / 1.000 lượt: hiển thị toàn bộ lịch sử so với chỉ N lượt gần nhất.
+
+Chạy từ thư mục Web:  python benchmarks/bench_chat_history.py
+"""
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from bench_common import WEB_DIR
+
+TURN_COUNTS = [10, 100, 1000]
+RERUNS = 5
+FORECAST_REPLY = "Dự đoán số ca nhiễm mới cho Vietnam:\n" + "".join(
+    f"- Ngày {day:02d}/07/2023: {1000 + day * 13:,} ca\n" for day in range(1, 31)
+)
+
+
+def chat_page(web_dir, turns, full_history, forecast_reply):
+    # AppTest chạy lại mã nguồn hàm này như một script riêng nên mọi thứ cần dùng phải truyền qua args
+    import sys
+    import streamlit as st
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    from modules.chat_history import render_history
+
+    if "history" not in st.session_state:
+        st.session_state.history = [
+            (f"Câu hỏi số {i}", forecast_reply if i % 5 == 0 else f"Câu trả lời ngắn số {i}")
+            for i in range(turns)
+        ]
+        if full_history:
+            st.session_state.history_visible = turns
+    render_history(st.session_state.history)
+
+
+def measure(turns, full_history):
+    at = AppTest.from_function(chat_page, args=(str(WEB_DIR), turns, full_history, FORECAST_REPLY), default_timeout=120)
+    at.run()  # lượt đầu: dựng lịch sử và import module
+    timings = []
+    for _ in range(RERUNS):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], len(at.get("chat_message"))
+
+
+def main():
+    print(f"{'Số lượt':>8} | {'Toàn bộ lịch sử':>22} | {'20 lượt gần nhất':>22}")
+    for turns in TURN_COUNTS:
+        full_ms, full_elems = measure(turns, full_history=True)
+        bounded_ms, bounded_elems = measure(turns, full_history=False)
+        print(f"{turns:>8} | {full_ms:9.1f} ms ({full_elems:5d} tin) | {bounded_ms:9.1f} ms ({bounded_elems:5d} tin)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_chat_turn.py
+"""Độ trễ một lượt chat khi dashboard có dữ liệu lớn dần.
+
+Trước: tin nhắn mới gọi st.rerun() nên chạy lại cả script (lọc df.copy(), KPI groupby/idxmax) hai lần.
+Sau: khung chat là fragment; một lượt chat chỉ chạy phần khung chat (AppTest luôn chạy cả script,
+nên lần chạy fragment được đo bằng một trang chỉ gồm khung chat).
+Bước trả lời là một ChatStage trả lời ngay, để số đo chỉ gồm chi phí giao diện.
+
+Chạy từ thư mục Web:  python benchmarks/bench_chat_turn.py
+"""
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from bench_common import WEB_DIR
+
+DATASET_SIZES = [(50, 1200), (230, 1200), (230, 2400)]
+TURNS = 10
+
+
+def chat_page(web_dir, mode, n_countries, n_days):
+    # AppTest chạy lại mã nguồn hàm này như một script riêng nên mọi thứ cần dùng phải import/truyền vào trong hàm
+    import sys
+    import pandas as pd
+    import streamlit as st
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    from benchmarks.bench_common import make_synthetic_frame
+    from modules.chat_pipeline import ChatPipeline, ChatStage
+    from modules.chat_history import render_history, collect_finished_replies
+
+    pipeline = st.cache_resource(lambda: ChatPipeline([ChatStage("echo", lambda text: f"Trả lời: {text}", 5.0)]))()
+    if "history" not in st.session_state:
+        st.session_state.history = []
+        st.session_state.pending_turns = set()
+
+    if mode != "fragment":
+        # Phần đầu của app.main chạy lại ở mọi lần rerun toàn trang
+        df = st.cache_resource(make_synthetic_frame)(n_countries, n_days)
+        filtered_df = df.copy()
+        filtered_df = filtered_df[(filtered_df["date"] >= pd.to_datetime(df["date"].min())) & (filtered_df["date"] <= pd.to_datetime(df["date"].max()))]
+        max_data_per_country = filtered_df.loc[filtered_df.groupby('location')['total_cases'].idxmax()]
+        cols = st.columns(3)
+        cols[0].metric("Tổng ca nhiễm", f"{max_data_per_country['total_cases'].sum():,.0f}")
+        cols[1].metric("Tổng ca tử vong", f"{max_data_per_country['total_deaths'].sum():,.0f}")
+        cols[2].metric("Quốc gia", filtered_df["location"].nunique())
+
+    history_box = st.container()
+    user_input = st.chat_input("Nhập câu hỏi của bạn...")
+    if user_input:
+        pending = pipeline.submit(user_input)
+        pending.wait(poll_interval=0.001)
+        st.session_state.history.append((user_input, pending))
+        st.session_state.pending_turns.add(len(st.session_state.history) - 1)
+        if mode == "full_rerun":
+            st.rerun()
+    with history_box:
+        finished = collect_finished_replies(st.session_state.history, st.session_state.pending_turns)
+        render_history(st.session_state.history, stream_indices=finished)
+
+
+def measure(mode, n_countries, n_days):
+    at = AppTest.from_function(chat_page, args=(str(WEB_DIR), mode, n_countries, n_days), default_timeout=300)
+    at.run()
+    timings = []
+    for i in range(TURNS):
+        start = time.perf_counter()
+        at.chat_input[0].set_value(f"câu hỏi {i}").run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    print(f"{'Dữ liệu':>22} | {'Trước (st.rerun)':>17} | {'Sau (fragment)':>15}")
+    for n_countries, n_days in DATASET_SIZES:
+        before = measure("full_rerun", n_countries, n_days)
+        after = measure("fragment", n_countries, n_days)
+        print(f"{n_countries:>4} QG × {n_days:>5} ngày | {before:14.1f} ms | {after:12.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
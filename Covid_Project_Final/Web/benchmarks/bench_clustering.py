@@ -0,0 +1,34 @@
+# benchmarks/bench_clustering.py
+"""Đo thời gian fit phân cụm cho hai chế độ đặc trưng (ảnh chụp mới nhất / chuỗi thời gian đầy đủ)
+với KMeans và MiniBatchKMeans.
+
+Chạy từ thư mục Web:  python benchmarks/bench_clustering.py
+"""
+import time
+
+from bench_common import load_benchmark_frame
+from modules.ml_analysis import CLUSTER_FEATURES, build_timeseries_features, fit_clusters
+
+
+def main():
+    df = load_benchmark_frame()
+
+    start = time.perf_counter()
+    snapshot = df.groupby("location").last().reset_index()
+    snapshot_features = snapshot[CLUSTER_FEATURES].dropna()
+    print(f"Trích đặc trưng ảnh chụp mới nhất: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    timeseries_features = build_timeseries_features(df).drop(columns="location").dropna()
+    print(f"Trích đặc trưng chuỗi thời gian:    {(time.perf_counter() - start) * 1000:8.1f} ms\n")
+
+    for mode, features in [("snapshot", snapshot_features), ("timeseries", timeseries_features)]:
+        for use_minibatch in (False, True):
+            samples = [fit_clusters(features, use_minibatch=use_minibatch)[1] for _ in range(5)]
+            name = "MiniBatchKMeans" if use_minibatch else "KMeans"
+            print(f"{mode:<11} {name:<16} {features.shape[0]:>4} QG × {features.shape[1]:>2} đặc trưng: "
+                  f"fit {min(samples):7.1f} ms (tốt nhất / 5 lần)")
+
+
+if __name__ == "__main__":
+    main()
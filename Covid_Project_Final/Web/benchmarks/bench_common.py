@@ -0,0 +1,113 @@
+# benchmarks/bench_common.py
+import sys
+import time
+import statistics
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Cho phép chạy trực tiếp: python benchmarks/bench_xxx.py từ thư mục Web
+WEB_DIR = Path(__file__).resolve().parent.parent
+if str(WEB_DIR) not in sys.path:
+    sys.path.append(str(WEB_DIR))
+
+CONTINENTS = ["Asia", "Europe", "Africa", "North America", "South America", "Oceania"]
+
+
+def load_country_names():
+    """Tên quốc gia thật từ label_encoder.pkl của mô hình (nếu đọc được)"""
+    try:
+        import joblib
+        return [str(name) for name in joblib.load(WEB_DIR / "data" / "label_encoder.pkl").classes_]
+    except Exception:
+        return []
+
+
+def make_synthetic_frame(n_countries=230, n_days=1200, seed=42):
+    """Sinh DataFrame giả lập có cùng schema với covid_cleaned_country_data.csv"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-22", periods=n_days, freq="D")
+    real_names = load_country_names()
+    locations = (real_names + [f"Country {i:03d}" for i in range(len(real_names), n_countries)])[:n_countries]
+
+    df = pd.DataFrame({
+        "location": np.repeat(locations, n_days),
+        "date": np.tile(dates, n_countries),
+    })
+    df["iso_code"] = df["location"].str[:3].str.upper()
+    df["continent"] = np.repeat(rng.choice(CONTINENTS, n_countries), n_days)
+    population = np.repeat(rng.integers(100_000, 300_000_000, n_countries), n_days).astype(float)
+    df["population"] = population
+
+    new_cases = rng.poisson(lam=np.repeat(rng.uniform(10, 5000, n_countries), n_days)).astype(float)
+    new_deaths = rng.binomial(new_cases.astype(int), 0.01).astype(float)
+    new_vax = rng.poisson(lam=np.repeat(rng.uniform(100, 50_000, n_countries), n_days)).astype(float)
+    df["new_cases"] = new_cases
+    df["new_deaths"] = new_deaths
+    df["new_vaccinations"] = new_vax
+    df["new_cases_smoothed"] = new_cases
+    df["new_deaths_smoothed"] = new_deaths
+    df["new_vaccinations_smoothed"] = new_vax
+
+    group = df.groupby("location", sort=False)
+    df["total_cases"] = group["new_cases"].cumsum()
+    df["total_deaths"] = group["new_deaths"].cumsum()
+    df["total_vaccinations"] = group["new_vaccinations"].cumsum()
+    df["people_vaccinated"] = np.minimum(df["total_vaccinations"] * 0.55, population)
+    df["people_fully_vaccinated"] = np.minimum(df["total_vaccinations"] * 0.45, df["people_vaccinated"])
+
+    df["total_cases_per_million"] = df["total_cases"] / population * 1e6
+    df["total_deaths_per_million"] = df["total_deaths"] / population * 1e6
+    df["new_cases_per_million"] = new_cases / population * 1e6
+    df["new_cases_smoothed_per_million"] = df["new_cases_per_million"]
+    df["new_deaths_smoothed_per_million"] = new_deaths / population * 1e6
+    df["people_fully_vaccinated_per_hundred"] = df["people_fully_vaccinated"] / population * 100
+    df["stringency_index"] = rng.uniform(0, 100, len(df))
+    df["gdp_per_capita"] = np.repeat(rng.uniform(500, 80_000, n_countries), n_days)
+    df["life_expectancy"] = np.repeat(rng.uniform(50, 85, n_countries), n_days)
+
+    df["case_fatality_rate"] = (df["total_deaths"] / df["total_cases"] * 100).fillna(0)
+    df["vaccination_rate"] = df["people_fully_vaccinated_per_hundred"].fillna(0)
+    df["cases_per_million"] = df["total_cases_per_million"].fillna(0)
+    df.replace([float('inf'), float('-inf')], 0, inplace=True)
+    return df
+
+
+def write_synthetic_csv(path, **kwargs):
+    """Ghi dữ liệu giả lập ra CSV để khởi tạo các service đọc file (CountryMapper, DataQueryService...)"""
+    df = make_synthetic_frame(**kwargs)
+    df.to_csv(path, index=False)
+    return df
+
+
+def load_benchmark_frame():
+    """Dùng dữ liệu thật nếu có file CSV, nếu không thì sinh dữ liệu giả lập cùng kích thước"""
+    data_path = WEB_DIR / "data" / "covid_cleaned_country_data.csv"
+    if data_path.exists():
+        from modules.data_processing import load_data
+        df = load_data()
+        if df is not None:
+            print(f"Dùng dữ liệu thật: {len(df):,} dòng")
+            return df
+    df = make_synthetic_frame()
+    print(f"Không có dữ liệu thật, dùng dữ liệu giả lập: {len(df):,} dòng")
+    return df
+
+
+def time_call(fn, repeat=20, warmup=1):
+    """Đo thời gian (ms) của fn, trả về (trung vị, p95)"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    return statistics.median(samples), p95
+
+
+def print_row(label, median_ms, p95_ms):
+    print(f"{label:<45} trung vị {median_ms:9.2f} ms | p95 {p95_ms:9.2f} ms")
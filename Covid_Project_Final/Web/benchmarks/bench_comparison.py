@@ -0,0 +1,46 @@
+# benchmarks/bench_comparison.py
+"""So sánh thời gian dựng biểu đồ so sánh đa quốc gia khi số quốc gia tăng từ 1 đến 50.
+
+Trước: lọc isin + px.line dựng lại toàn bộ mỗi lần rerun.
+Sau: mảng tách sẵn theo quốc gia + figure cache chỉ thêm trace mới.
+
+Chạy từ thư mục Web:  python benchmarks/bench_comparison.py
+"""
+import time
+
+import plotly.express as px
+
+from bench_common import load_benchmark_frame, time_call
+from modules.visualization import CountrySeriesStore, ComparisonFigureCache, COMPARISON_METRICS
+
+METRIC_LABEL, METRIC = next(iter(COMPARISON_METRICS.items()))
+STEPS = [1, 5, 10, 20, 30, 40, 50]
+
+
+def rebuild_before(df, countries):
+    comp_df = df[df["location"].isin(countries)]
+    return px.line(comp_df, x="date", y=METRIC, color="location")
+
+
+def main():
+    df = load_benchmark_frame()
+    start = time.perf_counter()
+    store = CountrySeriesStore(df, list(COMPARISON_METRICS.values()))
+    print(f"Tách mảng theo quốc gia (một lần): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    all_countries = store.countries[:max(STEPS)]
+    cache = ComparisonFigureCache()
+    print(f"{'Số QG':>6} | {'Trước (ms)':>12} | {'Sau: thêm 1 QG (ms)':>20} | {'Sau: rerun không đổi (ms)':>26}")
+    for n in range(1, max(STEPS) + 1):
+        selected = all_countries[:n]
+        add_start = time.perf_counter()
+        cache.update(store, selected, METRIC, METRIC_LABEL)
+        add_ms = (time.perf_counter() - add_start) * 1000
+        if n in STEPS:
+            before_ms, _ = time_call(lambda: rebuild_before(df, selected), repeat=5)
+            rerun_ms, _ = time_call(lambda: cache.update(store, selected, METRIC, METRIC_LABEL), repeat=5)
+            print(f"{n:>6} | {before_ms:>12.2f} | {add_ms:>20.2f} | {rerun_ms:>26.2f}")
+
+
+if __name__ == "__main__":
+    main()
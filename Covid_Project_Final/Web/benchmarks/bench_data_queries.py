@@ -0,0 +1,68 @@
+# benchmarks/bench_data_queries.py
+"""Độ trễ trả lời 10.000 câu hỏi 'tổng quan' / 'dữ liệu <quốc gia>' mô phỏng:
+lọc DataFrame mỗi câu hỏi (trước) so với tra bảng snapshot dựng sẵn (sau).
+
+Chạy từ thư mục Web:  python benchmarks/bench_data_queries.py
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import write_synthetic_csv
+from modules.data_query_service import DataQueryService
+
+N_QUESTIONS = 10_000
+
+
+def legacy_overview(data):
+    latest_date = data["date"].max()
+    latest_data = data[data['date'] == latest_date]
+    return (latest_data["total_cases"].fillna(0).sum(), latest_data["total_deaths"].fillna(0).sum(),
+            latest_data["people_fully_vaccinated"].fillna(0).sum(), len(latest_data))
+
+
+def legacy_country_summary(data, country):
+    country_data = data[data["location"].str.lower() == country.lower()]
+    latest_date = country_data["date"].max()
+    return country_data[country_data["date"] == latest_date].iloc[0]
+
+
+def run(label, questions, answer):
+    latencies = np.empty(len(questions))
+    for i, question in enumerate(questions):
+        start = time.perf_counter()
+        answer(question)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    print(f"{label:<32} tổng {latencies.sum() / 1e6:8.2f} s | trung vị {np.median(latencies):10.1f} µs"
+          f" | p99 {np.percentile(latencies, 99):10.1f} µs")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid.csv"
+        write_synthetic_csv(csv_path)
+        start = time.perf_counter()
+        service = DataQueryService(csv_path)
+        print(f"\nTải dữ liệu + dựng snapshot: {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"({len(service.data):,} dòng, {len(service.country_summaries)} quốc gia)\n")
+
+    rng = np.random.default_rng(0)
+    countries = sorted(service.data["location"].unique())
+    # 20% câu hỏi tổng quan, 80% hỏi dữ liệu một quốc gia
+    questions = [None if rng.random() < 0.2 else countries[rng.integers(len(countries))] for _ in range(N_QUESTIONS)]
+
+    def before(country):
+        return legacy_overview(service.data) if country is None else legacy_country_summary(service.data, country)
+
+    def after(country):
+        return service.get_overview_data() if country is None else service.get_country_data_summary(country)
+
+    sample = questions[:500]
+    run(f"Trước: lọc DataFrame ({len(sample)} câu)", sample, before)
+    run(f"Sau: tra snapshot ({N_QUESTIONS:,} câu)", questions, after)
+
+
+if __name__ == "__main__":
+    main()
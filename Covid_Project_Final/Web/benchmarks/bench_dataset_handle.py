@@ -0,0 +1,79 @@
+# benchmarks/bench_dataset_handle.py
+"""Chi phí lấy dataset ở mỗi lần rerun: hai lớp st.cache_data (mỗi lớp unpickle một bản sao) + df.copy()
+so với DatasetHandle dùng chung qua st.cache_resource.
+
+Chạy từ thư mục Web:  python benchmarks/bench_dataset_handle.py
+"""
+import time
+import tracemalloc
+
+import streamlit as st
+
+from bench_common import load_benchmark_frame
+from modules.data_processing import DatasetHandle, DatasetMutationError
+
+RERUNS = 20
+
+
+@st.cache_data
+def load_data_cached():
+    return load_benchmark_frame()
+
+
+@st.cache_data
+def get_data_cached():
+    return load_data_cached()
+
+
+@st.cache_resource
+def get_dataset_shared():
+    return DatasetHandle(load_benchmark_frame())
+
+
+def rerun_before():
+    df = get_data_cached()
+    return df.copy()
+
+
+def rerun_after():
+    dataset = get_dataset_shared()
+    dataset.check_unchanged()
+    return dataset.frame
+
+
+def measure(label, fn):
+    fn()  # lượt đầu: tải và đưa vào cache
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / RERUNS
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<40} {elapsed_ms:8.2f} ms/rerun | đỉnh cấp phát {peak / 1024 ** 2:8.1f} MB")
+
+
+def check_guard():
+    frame = get_dataset_shared().frame
+    try:
+        frame.iloc[0, frame.columns.get_loc("total_cases")] = -1
+        print("Ghi trực tiếp vào dữ liệu: KHÔNG bị chặn")
+    except ValueError as e:
+        print(f"Ghi trực tiếp vào dữ liệu bị chặn: {e}")
+    frame["temp_column"] = 0
+    try:
+        get_dataset_shared().check_unchanged()
+    except DatasetMutationError as e:
+        print(f"Thêm cột vào dữ liệu dùng chung bị phát hiện: {e}")
+    finally:
+        del frame["temp_column"]
+
+
+def main():
+    measure("Trước: 2 lớp cache_data + df.copy()", rerun_before)
+    measure("Sau: DatasetHandle (cache_resource)", rerun_after)
+    check_guard()
+
+
+if __name__ == "__main__":
+    main()
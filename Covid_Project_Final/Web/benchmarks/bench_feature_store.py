@@ -0,0 +1,77 @@
+# benchmarks/bench_feature_store.py
+"""Chuẩn bị cửa sổ đầu vào 7 ngày cho mô hình (dữ liệu giả lập 230 quốc gia × 1.200 ngày):
+lọc + sao chép lát quốc gia, scale bằng sklearn cho từng cửa sổ (như trước) so với cắt mảng từ FeatureStore.
+Đo thêm thời gian dựng FeatureStore lúc tải và gắn lại từ file Arrow đã lưu (COVID_SHARED_DATASET_DIR).
+
+Chạy từ thư mục Web:  python benchmarks/bench_feature_store.py
+"""
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import print_row, time_call, write_synthetic_csv
+from modules.country_mapper import CountryMapper
+from modules.date_index import CountryDateIndex
+from modules.feature_store import load_feature_store
+from modules.prediction_service import CovidPredictionService, MODEL_FEATURES
+
+COUNTRY = "Vietnam"
+START = date(2022, 6, 1)
+
+
+def legacy_prepare(service, country, start_date, days_back=7):
+    """Cách chuẩn bị cửa sổ trước đây (lọc + copy + _scale_features + fillna().values)"""
+    data = service.data
+    country_data = data[data["location"].str.lower() == country.lower()].copy()
+    country_data = country_data.sort_values("date")
+    end_date = datetime.combine(start_date, datetime.min.time()) - timedelta(days=1)
+    relevant = country_data[country_data["date"].dt.date <= end_date.date()].tail(days_back).copy()
+    scaled = relevant.copy()
+    scaled["stringency_scaled"] = service.scalers["stringency_index"].transform(relevant[["stringency_index"]])
+    scaled["vaccinated_scaled"] = service.scalers["people_fully_vaccinated_per_hundred"].transform(
+        relevant[["people_fully_vaccinated_per_hundred"]]
+    )
+    return scaled[MODEL_FEATURES].fillna(0).values
+
+
+def make_service(csv_path):
+    # Dựng service mà không tải mô hình (chỉ cần phần dữ liệu)
+    service = CovidPredictionService.__new__(CovidPredictionService)
+    service.bundle, service.features, service.scalers, service.horizon = None, list(MODEL_FEATURES), {}, 1
+    service.data = CovidPredictionService._build_model_frame(csv_path)
+    service.country_mapper = CountryMapper(data=service.data)
+    service._fit_scalers()
+    service.date_index = CountryDateIndex(service.data)
+    service.feature_store = load_feature_store(service.data, service.scalers, service.features, service.date_index)
+    return service
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid_synthetic.csv"
+        write_synthetic_csv(csv_path)
+        service = make_service(csv_path)
+        print(f"\n{len(service.data):,} dòng, {len(service.feature_store.bounds)} quốc gia\n")
+
+        (window, _), _ = service.prepare_sequence_data(COUNTRY, START)
+        assert np.allclose(window, legacy_prepare(service, COUNTRY, START), atol=1e-5)
+
+        print_row("Cửa sổ 7 ngày: lọc + scale (trước)", *time_call(lambda: legacy_prepare(service, COUNTRY, START)))
+        print_row("Cửa sổ 7 ngày: FeatureStore", *time_call(lambda: service.prepare_sequence_data(COUNTRY, START), repeat=200))
+
+        def build_store(directory=None):
+            return load_feature_store(service.data, service.scalers, service.features, service.date_index,
+                                      source_path=csv_path, directory=directory)
+
+        shared_dir = Path(tmp) / "shared"
+        print_row("Dựng FeatureStore lúc tải", *time_call(build_store, repeat=5))
+        build_store(shared_dir)
+        store = build_store(shared_dir)
+        assert np.array_equal(store.country_values(COUNTRY), service.feature_store.country_values(COUNTRY))
+        print_row("Gắn FeatureStore từ file Arrow", *time_call(lambda: build_store(shared_dir), repeat=20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_http_api.py
+"""Kiểm thử tải API HTTP (modules/http_api.py) trên một instance uvicorn cục bộ với dữ liệu giả lập 230 quốc gia × 1.200 ngày.
+
+Mỗi endpoint được gọi liên tục bởi CONCURRENCY client (kết nối keep-alive) trong DURATION giây.
+Endpoint /forecast chỉ được đo khi process suy luận tải được model (cần TensorFlow và dữ liệu mô hình).
+
+Chạy từ thư mục Web:  python benchmarks/bench_http_api.py
+"""
+import http.client
+import json
+import multiprocessing as mp
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bench_common import WEB_DIR, write_synthetic_csv
+
+HOST, PORT = "127.0.0.1", 8765
+CONCURRENCY = 32
+DURATION = 5.0
+
+
+def run_server(web_dir, csv_path):
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    import uvicorn
+    from modules.http_api import create_app
+    uvicorn.run(create_app(data_path=csv_path, forecast_workers=1), host=HOST, port=PORT, log_level="warning")
+
+
+def request(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def wait_until_ready(timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, body = request(http.client.HTTPConnection(HOST, PORT, timeout=2), "GET", "/health")
+            if status == 200 and json.loads(body)["status"] == "ok":
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("Server không khởi động được")
+
+
+def load(method, path, body=None, headers=None):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + DURATION
+
+    def client():
+        conn = http.client.HTTPConnection(HOST, PORT, timeout=30)
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            status, _ = request(conn, method, path, body, headers)
+            local.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(CONCURRENCY)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return len(latencies) / DURATION, statistics.median(latencies), latencies[int(0.95 * (len(latencies) - 1))], errors[0]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid_synthetic.csv"
+        df = write_synthetic_csv(csv_path)
+        country = df["location"].iloc[0]
+        server = mp.get_context("spawn").Process(target=run_server, args=(str(WEB_DIR), str(csv_path)))
+        server.start()
+        try:
+            wait_until_ready()
+            conn = http.client.HTTPConnection(HOST, PORT)
+            quoted = country.replace(" ", "%20")
+            _, countries_json = request(conn, "GET", "/countries")
+            _, countries_arrow = request(conn, "GET", "/countries?format=arrow")
+            print(f"{len(df):,} dòng | {CONCURRENCY} client đồng thời | {DURATION:.0f} s mỗi endpoint")
+            print(f"/countries: JSON {len(countries_json) / 1024:.1f} KB, Arrow {len(countries_arrow) / 1024:.1f} KB\n")
+
+            cases = [
+                ("GET /health", "GET", "/health", None),
+                ("GET /overview", "GET", "/overview", None),
+                ("GET /countries/{country}", "GET", f"/countries/{quoted}", None),
+                ("GET /countries/{country}/data", "GET", f"/countries/{quoted}/data?date=2021-06-15", None),
+                ("GET /countries (JSON)", "GET", "/countries", None),
+                ("GET /countries (Arrow)", "GET", "/countries?format=arrow", None),
+            ]
+            forecast_body = json.dumps({"requests": [{"country": "Vietnam", "start_date": "2022-01-01", "days": 7}] * 8})
+            status, body = request(conn, "POST", "/forecast", forecast_body, {"Content-Type": "application/json"})
+            if status == 200 and "error" not in json.loads(body)["results"][0]:
+                cases.append(("POST /forecast (8 × 7 ngày)", "POST", "/forecast", forecast_body))
+            else:
+                print(f"Bỏ qua /forecast: {body[:120].decode(errors='replace')}\n")
+
+            for label, method, path, body in cases:
+                rps, p50, p95, errors = load(method, path, body, {"Content-Type": "application/json"} if body else None)
+                print(f"{label:<32} {rps:8.0f} req/s | trung vị {p50:7.2f} ms | p95 {p95:7.2f} ms | lỗi {errors}")
+        finally:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
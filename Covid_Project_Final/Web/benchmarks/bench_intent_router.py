@@ -0,0 +1,110 @@
+# benchmarks/bench_intent_router.py
+"""Thông lượng (tin nhắn/giây) của bộ định tuyến một lượt so với các lượt quét từ khóa riêng lẻ trước đây.
+
+Chạy từ thư mục Web:  python benchmarks/bench_intent_router.py
+"""
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import write_synthetic_csv
+from modules.country_mapper import CountryMapper
+from modules.intent_router import (
+    IntentRouter, DATA_QUERY_KEYWORDS, PREDICTION_EXCLUSION_KEYWORDS, PREDICTION_KEYWORDS, OVERVIEW_KEYWORDS
+)
+
+CORPUS = [
+    "dự đoán Vietnam 5 ngày tới",
+    "Dự báo covid Thái Lan 7 ngày",
+    "dữ liệu covid của Mỹ",
+    "so lieu Japan ngay 12/03/2022",
+    "tổng quan tình hình covid",
+    "thống kê Ấn Độ",
+    "covid là gì",
+    "triệu chứng covid thế nào",
+    "cảm ơn bạn nhiều",
+    "predict cases for Germany next 10 days",
+    "data for United Kingdom on 01/06/2021",
+    "số ca nhiễm ở Hàn Quốc vào ngày 15/08/2021",
+    "tương lai dịch bệnh ở Brazil ra sao",
+    "xin chào",
+    "overview",
+    "dự đoán ngày mai ở Pháp",
+    "vaccine có an toàn không",
+    "thong ke south africa",
+    "du doan indonesia 14 ngay",
+    "có nên đi du lịch Singapore không",
+]
+
+
+def legacy_find_country(mapper, text):
+    """Cách tìm quốc gia cũ: lặp từng tên/alias và dựng regex cho từng mục"""
+    text_lower = text.lower().strip()
+    for country in mapper.supported_countries:
+        if country.lower() in text_lower and re.search(r'\b' + re.escape(country.lower()) + r'\b', text_lower):
+            return country
+    for alias, country in mapper.country_aliases.items():
+        if alias in text_lower and re.search(r'\b' + re.escape(alias) + r'\b', text_lower):
+            return country
+    return None
+
+
+def legacy_extract_date(text):
+    text_lower = text.lower()
+    for pattern in [r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})']:
+        if re.search(pattern, text_lower):
+            return True
+    return any(k in text_lower for k in ["ngày mai", "ngay mai", "ngày kia", "ngay kia", "tuần tới", "tuan toi", "tháng tới", "thang toi"])
+
+
+def legacy_parse(mapper, text):
+    """Các bước cũ của handle_data_query_request + handle_prediction_request (không tính phần trả lời)"""
+    text_lower = text.lower()
+    has_data = any(k in text_lower for k in DATA_QUERY_KEYWORDS)
+    is_pred = any(k in text_lower for k in PREDICTION_EXCLUSION_KEYWORDS)
+    if has_data and not is_pred:
+        if any(k in text_lower for k in OVERVIEW_KEYWORDS):
+            return "overview"
+        return ("data", legacy_find_country(mapper, text), legacy_extract_date(text))
+    text_lower = text.lower()
+    if any(k in text_lower for k in PREDICTION_KEYWORDS):
+        country = legacy_find_country(mapper, text)
+        date = legacy_extract_date(text)
+        days = None
+        for pattern in [r'(\d+)\s*ngày', r'(\d+)\s*day', r'(\d+)\s*days']:
+            match = re.search(pattern, text.lower())
+            if match:
+                days = int(match.group(1))
+                break
+        return ("prediction", country, date, days)
+    return None
+
+
+def throughput(fn, rounds=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in CORPUS:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    return rounds * len(CORPUS) / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid.csv"
+        write_synthetic_csv(csv_path, n_days=30)
+        mapper = CountryMapper(csv_path)
+
+    router = IntentRouter(lambda: mapper)
+    for text in CORPUS[:6]:
+        print(f"{text!r:50} -> {router.parse(text)}")
+
+    before = throughput(lambda text: legacy_parse(mapper, text))
+    after = throughput(router.parse)
+    print(f"\nTrước (quét riêng lẻ):  {before:10,.0f} tin nhắn/giây")
+    print(f"Sau (router một lượt): {after:10,.0f} tin nhắn/giây  (x{after / before:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_mc_dropout.py
+"""Chi phí khoảng dự đoán Monte-Carlo dropout cho dự báo 7 ngày (dữ liệu giả lập 230 quốc gia × 1.200 ngày):
+K lần chạy dự báo riêng (K × 7 lời gọi mô hình) so với một lần _rollout gom K mẫu vào cùng lô (7 lời gọi, lô K dòng),
+với K = 1, 8, 16, 32, 64.
+
+Dùng model BiLSTM thật nếu có TensorFlow và file .h5; nếu không, dùng model giả lập có chi phí cố định mỗi lời gọi
+(SIM_CALL_MS) cộng chi phí theo số dòng (SIM_ROW_MS) và dropout ngẫu nhiên khi training=True.
+
+Chạy từ thư mục Web:  python benchmarks/bench_mc_dropout.py
+"""
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import print_row, time_call, write_synthetic_csv
+from bench_feature_store import make_service
+from modules.model_server import MODEL_PATH
+
+COUNTRY = "Vietnam"
+START = date(2023, 5, 3)  # vài ngày trước cuối dữ liệu giả lập: có cả ngày quan sát lẫn ngày tự hồi quy
+HORIZON = 7
+SAMPLE_COUNTS = (1, 8, 16, 32, 64)
+SIM_CALL_MS = 2.0
+SIM_ROW_MS = 0.01
+SIM_DROPOUT = 0.2
+
+
+class SimulatedModel:
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, inputs, training=False):
+        sequences, _ = inputs
+        time.sleep((SIM_CALL_MS + SIM_ROW_MS * len(sequences)) / 1000)
+        last = np.asarray(sequences, dtype=np.float64)[:, -1, :1]
+        if training:
+            last = last * self.rng.binomial(1, 1 - SIM_DROPOUT, last.shape) / (1 - SIM_DROPOUT)
+        return 0.7 * last + 0.3 * np.asarray(sequences, dtype=np.float64)[:, :, :1].mean(axis=1)
+
+    def predict(self, inputs, verbose=0):
+        return self(inputs)
+
+
+def load_bench_model():
+    try:
+        from tensorflow.keras.models import load_model
+        if MODEL_PATH.exists():
+            return load_model(str(MODEL_PATH)), "BiLSTM thật"
+    except ImportError:
+        pass
+    return SimulatedModel(), f"giả lập ({SIM_CALL_MS:.0f} ms/lời gọi + {SIM_ROW_MS} ms/dòng)"
+
+
+def separate_runs(service, samples):
+    """K lần dự báo riêng, mỗi lần một lô 1 dòng/ngày (cách gọi predict_cases lặp lại K lần)"""
+    runs = [service._rollout([COUNTRY], START, HORIZON, samples=1, mc_dropout=True)[1] for _ in range(samples)]
+    return np.concatenate(runs, axis=1)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid_synthetic.csv"
+        write_synthetic_csv(csv_path)
+        service = make_service(csv_path)
+        service.model, model_name = load_bench_model()
+        print(f"\n{len(service.data):,} dòng, model {model_name}, dự báo {HORIZON} ngày từ {START}\n")
+
+        intervals, error = service.predict_intervals_batch([COUNTRY], START, HORIZON)
+        assert error is None and all(low <= high for low, high in intervals[COUNTRY].values())
+
+        for samples in SAMPLE_COUNTS:
+            repeat = 3 if samples >= 32 else 5
+            print_row(f"K={samples:>2}: {samples} lần dự báo riêng",
+                      *time_call(lambda: separate_runs(service, samples), repeat=repeat))
+            print_row(f"K={samples:>2}: một lô K mẫu mỗi ngày",
+                      *time_call(lambda: service._rollout([COUNTRY], START, HORIZON, samples=samples,
+                                                          mc_dropout=True), repeat=repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_model_bundle.py
+"""Thời gian khởi động phần tiền xử lý của CovidPredictionService (dữ liệu giả lập 230 quốc gia × 1.200 ngày):
+fit lại LabelEncoder + transform từng quốc gia + fit MinMaxScaler/RobustScaler trên toàn bộ dữ liệu (như trước)
+so với đọc model bundle đã lưu khi huấn luyện và dựng dict quốc gia → id bằng một lần transform.
+
+Thời gian tải trọng số BiLSTM như nhau ở hai cách nên không tính (bundle giả lập ghi một file trọng số giữ chỗ).
+
+Chạy từ thư mục Web:  python benchmarks/bench_model_bundle.py
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+from sklearn.preprocessing import LabelEncoder, MinMaxScaler, RobustScaler
+
+from bench_common import WEB_DIR, make_synthetic_frame, print_row, time_call
+from modules.model_bundle import load_model_bundle
+
+sys.path.append(str(WEB_DIR / "modules" / "predict_case"))
+from save_utils import save_model_bundle  # noqa: E402
+
+FEATURES = ['new_cases_log', 'new_deaths_log', 'vaccinations_log', 'vaccinated_scaled', 'stringency_scaled']
+
+
+class PlaceholderWeights:
+    """Thay cho model Keras khi ghi bundle thử: chỉ cần phương thức save(path)"""
+
+    def save(self, path):
+        Path(path).write_bytes(b"\0" * (4 << 20))
+
+
+def legacy_startup(frame):
+    countries = sorted(frame["location"].unique().tolist())
+    encoder = LabelEncoder().fit(countries)
+    mapping = {country: encoder.transform([country])[0] for country in countries}
+    scalers = {
+        "stringency_index": MinMaxScaler().fit(frame[["stringency_index"]].fillna(0).clip(0, 100)),
+        "people_fully_vaccinated_per_hundred": RobustScaler().fit(
+            frame[["people_fully_vaccinated_per_hundred"]].fillna(0).clip(lower=0)
+        ),
+    }
+    return mapping, scalers
+
+
+def bundle_startup(frame, bundles_dir):
+    bundle = load_model_bundle(bundles_dir=bundles_dir)
+    known = set(bundle.label_encoder.classes_)
+    countries = [country for country in sorted(frame["location"].unique().tolist()) if country in known]
+    mapping = dict(zip(countries, (int(i) for i in bundle.label_encoder.transform(countries))))
+    return mapping, bundle.scalers
+
+
+def main():
+    frame = make_synthetic_frame()
+    _, legacy_scalers = legacy_startup(frame)
+    encoder = LabelEncoder().fit(frame["location"].unique())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_id = save_model_bundle(PlaceholderWeights(), encoder, legacy_scalers, FEATURES, 7, tmp)
+        print(f"{len(frame):,} dòng, {frame['location'].nunique()} quốc gia, bundle {bundle_id}\n")
+        legacy_mapping, _ = legacy_startup(frame)
+        bundle_mapping, _ = bundle_startup(frame, tmp)
+        assert legacy_mapping == bundle_mapping
+
+        print_row("Fit lại encoder + scaler (trước)", *time_call(lambda: legacy_startup(frame), repeat=10))
+        print_row("Đọc model bundle", *time_call(lambda: bundle_startup(frame, tmp), repeat=10))
+
+
+if __name__ == "__main__":
+    main()
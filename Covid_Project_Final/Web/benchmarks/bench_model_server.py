@@ -0,0 +1,132 @@
+# benchmarks/bench_model_server.py
+"""Thông lượng dự báo với 50 người dùng chat đồng thời chia cho 4 worker Streamlit:
+mỗi worker tự giữ model (như trước) so với một model server dùng chung có micro-batching.
+
+Mỗi người dùng liên tục yêu cầu dự báo 7 ngày (7 lời gọi predict nối tiếp như CovidPredictionService.predict_cases).
+Dùng model BiLSTM thật nếu có TensorFlow và file .h5; nếu không, dùng model giả lập có chi phí cố định mỗi lời gọi
+predict (SIM_CALL_MS) cộng chi phí theo số dòng (SIM_ROW_MS) và chỉ chạy một lời gọi một lúc trong mỗi process.
+
+Chạy từ thư mục Web:  python benchmarks/bench_model_server.py
+"""
+import multiprocessing as mp
+import secrets
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+from bench_common import WEB_DIR
+
+WORKERS = 4
+USERS = 50
+DURATION = 10.0
+HORIZON = 7
+ADDRESS = "/tmp/covid-bench-model.sock"
+SIM_CALL_MS = 20.0
+SIM_ROW_MS = 0.05
+
+
+class SimulatedModel:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def predict(self, inputs, verbose=0):
+        sequences, _ = inputs
+        with self._lock:
+            time.sleep((SIM_CALL_MS + SIM_ROW_MS * len(sequences)) / 1000)
+        return np.asarray(sequences)[:, -1, :1] * 0.99
+
+
+def load_bench_model(web_dir):
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    from modules.model_server import MODEL_PATH
+    try:
+        from tensorflow.keras.models import load_model
+        if MODEL_PATH.exists():
+            return load_model(str(MODEL_PATH)), "BiLSTM thật"
+    except ImportError:
+        pass
+    return SimulatedModel(), f"giả lập ({SIM_CALL_MS:.0f} ms/lời gọi + {SIM_ROW_MS} ms/dòng)"
+
+
+def run_server(web_dir, authkey, ready):
+    from modules.model_server import ModelServer
+    model, _ = load_bench_model(web_dir)
+    ModelServer(model, ADDRESS, authkey=authkey).serve_forever(ready)
+
+
+def user_loop(model, stop_at, latencies, rng):
+    while time.perf_counter() < stop_at:
+        sequence = rng.random((1, 7, 5), dtype=np.float32)
+        country = np.array([[rng.integers(0, 200)]])
+        start = time.perf_counter()
+        for _ in range(HORIZON):
+            pred = model.predict([sequence, country], verbose=0)[0][0]
+            next_row = sequence[0, -1].copy()
+            next_row[0] = pred
+            sequence = np.concatenate([sequence[:, 1:], next_row.reshape(1, 1, 5)], axis=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def worker(web_dir, mode, authkey, n_users, start_barrier, results):
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    if mode == "server":
+        from modules.model_server import ModelServerClient, RemoteModel
+        model = RemoteModel(ModelServerClient(ADDRESS, authkey=authkey))
+    else:
+        model, _ = load_bench_model(web_dir)
+
+    latencies = []
+    start_barrier.wait()
+    stop_at = time.perf_counter() + DURATION
+    threads = [
+        threading.Thread(target=user_loop, args=(model, stop_at, latencies, np.random.default_rng(i)))
+        for i in range(n_users)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(latencies)
+
+
+def run(mode):
+    ctx = mp.get_context("spawn")
+    server = None
+    authkey = secrets.token_bytes(32)  # khóa riêng cho lần chạy benchmark
+    if mode == "server":
+        ready = ctx.Event()
+        server = ctx.Process(target=run_server, args=(str(WEB_DIR), authkey, ready), daemon=True)
+        server.start()
+        ready.wait(120)
+
+    start_barrier = ctx.Barrier(WORKERS)
+    results = ctx.Queue()
+    users = [USERS // WORKERS + (i < USERS % WORKERS) for i in range(WORKERS)]
+    processes = [ctx.Process(target=worker, args=(str(WEB_DIR), mode, authkey, n, start_barrier, results)) for n in users]
+    for p in processes:
+        p.start()
+    latencies = sorted(x for _ in processes for x in results.get())
+    for p in processes:
+        p.join()
+    if server is not None:
+        server.terminate()
+    return latencies
+
+
+def main():
+    _, model_label = load_bench_model(str(WEB_DIR))
+    print(f"Model: {model_label} | {USERS} người dùng, {WORKERS} worker, dự báo {HORIZON} ngày, {DURATION:.0f} s\n")
+    for label, mode in (("Model trong mỗi worker", "in_process"), ("Model server (micro-batch)", "server")):
+        latencies = run(mode)
+        p95 = latencies[int(0.95 * (len(latencies) - 1))]
+        print(f"{label:<28} {len(latencies) / DURATION:7.1f} dự báo/s | trung vị {statistics.median(latencies):8.1f} ms "
+              f"| p95 {p95:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/bench_multi_horizon.py
+"""Mô hình dự đoán trực tiếp H ngày (đầu ra Dense(H)) so với mô hình một bước gọi lặp H lần, H = 7:
+sai số theo từng ngày dự đoán trên cùng tập test (create_sequences(..., horizon=H) + train_test_split_by_country)
+và thời gian dự báo đầu-cuối qua CovidPredictionService._rollout.
+
+Dữ liệu giả lập 80 quốc gia × 800 ngày, số ca mới theo các đợt dịch (sóng + nhiễu AR(1)) để có cấu trúc thời gian.
+Dùng BiLSTM thật (huấn luyện EPOCHS epoch mỗi mô hình) nếu có TensorFlow; nếu không, dùng mô hình tuyến tính
+(bình phương tối thiểu trên cửa sổ trải phẳng) cùng đầu vào/đầu ra, mỗi lời gọi cộng thêm chi phí cố định SIM_CALL_MS
+như một lời gọi model.predict.
+
+Chạy từ thư mục Web:  python benchmarks/bench_multi_horizon.py
+"""
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+
+from bench_common import WEB_DIR, make_synthetic_frame, print_row, time_call
+from bench_feature_store import make_service
+
+sys.path.append(str(WEB_DIR / "modules" / "predict_case"))
+from data_processing import create_sequences, load_and_preprocess_data, train_test_split_by_country  # noqa: E402
+from evaluation import recursive_forecast  # noqa: E402
+
+HORIZON = 7
+TIMESTEPS = 7
+FEATURES = ['new_cases_log', 'new_deaths_log', 'vaccinations_log', 'vaccinated_scaled', 'stringency_scaled']
+EPOCHS = 5
+SIM_CALL_MS = 20.0
+
+
+class LinearModel:
+    """Thay cho BiLSTM khi không có TensorFlow: cùng giao diện predict({...}) / predict([...]) với `horizon` cột ra"""
+
+    def __init__(self):
+        self.coef = None
+
+    @staticmethod
+    def _design(sequences):
+        sequences = np.asarray(sequences, dtype=np.float64)
+        return np.hstack([sequences.reshape(len(sequences), -1), np.ones((len(sequences), 1))])
+
+    def fit(self, X_seq, y):
+        self.coef, *_ = np.linalg.lstsq(self._design(X_seq), np.asarray(y).reshape(len(X_seq), -1), rcond=None)
+        return self
+
+    def predict(self, inputs, verbose=0):
+        sequences = inputs["sequence_input"] if isinstance(inputs, dict) else inputs[0]
+        time.sleep(SIM_CALL_MS / 1000)
+        return self._design(sequences) @ self.coef
+
+    def __call__(self, inputs, training=False):
+        return self.predict(inputs)
+
+
+def make_wave_frame(n_countries=80, n_days=800, seed=7):
+    """Dữ liệu giả lập có số ca mới theo các đợt dịch thay cho nhiễu Poisson độc lập theo ngày"""
+    frame = make_synthetic_frame(n_countries=n_countries, n_days=n_days, seed=seed)
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_days)
+    log_cases = []
+    for _ in range(n_countries):
+        noise = np.zeros(n_days)
+        shocks = rng.normal(0, 0.15, n_days)
+        for i in range(1, n_days):
+            noise[i] = 0.9 * noise[i - 1] + shocks[i]
+        period, phase, level = rng.uniform(90, 200), rng.uniform(0, 2 * np.pi), rng.uniform(3, 8)
+        log_cases.append(level + 1.5 * np.sin(2 * np.pi * t / period + phase) + noise)
+    frame["new_cases"] = rng.poisson(np.exp(np.concatenate(log_cases))).astype(float)
+    return frame
+
+
+def train_models(X_train_seq, X_train_country, y_train, num_countries):
+    """(mô hình một bước, mô hình H ngày, tên) huấn luyện trên cùng tập train"""
+    try:
+        from model_building import build_bilstm_model
+        from training import train_model
+    except ImportError:
+        recursive = LinearModel().fit(X_train_seq, y_train[:, 0])
+        direct = LinearModel().fit(X_train_seq, y_train)
+        return recursive, direct, f"tuyến tính thay BiLSTM (+{SIM_CALL_MS:.0f} ms/lời gọi)"
+
+    recursive = build_bilstm_model(TIMESTEPS, len(FEATURES), num_countries)
+    train_model(recursive, X_train_seq, X_train_country, y_train[:, 0], epochs=EPOCHS)
+    direct = build_bilstm_model(TIMESTEPS, len(FEATURES), num_countries, horizon=HORIZON)
+    train_model(direct, X_train_seq, X_train_country, y_train, epochs=EPOCHS)
+    return recursive, direct, f"BiLSTM ({EPOCHS} epoch)"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid_waves.csv"
+        frame = make_wave_frame()
+        frame.to_csv(csv_path, index=False)
+
+        df, le, _ = load_and_preprocess_data(csv_path)
+        X_seq, X_country, y = create_sequences(df, FEATURES, TIMESTEPS, HORIZON)
+        X_train_seq, X_test_seq, X_train_country, X_test_country, y_train, y_test = train_test_split_by_country(
+            X_seq, X_country, y
+        )
+        recursive, direct, model_name = train_models(X_train_seq, X_train_country, y_train, len(le.classes_))
+        print(f"\n{len(X_train_seq):,} mẫu train, {len(X_test_seq):,} mẫu test, model {model_name}\n")
+
+        recursive_pred = recursive_forecast(recursive, X_test_seq, X_test_country, HORIZON)
+        direct_pred = np.asarray(direct.predict({"sequence_input": X_test_seq, "country_input": X_test_country},
+                                                verbose=0)).reshape(len(X_test_seq), HORIZON)
+        recursive_mae = np.abs(recursive_pred - y_test).mean(axis=0)
+        direct_mae = np.abs(direct_pred - y_test).mean(axis=0)
+        print("MAE (log1p số ca) theo ngày dự đoán:   một bước gọi lặp | trực tiếp H ngày")
+        for step, (r_mae, d_mae) in enumerate(zip(recursive_mae, direct_mae), start=1):
+            print(f"  Ngày +{step}{'':<30}{r_mae:10.4f} | {d_mae:10.4f}")
+        print(f"  Trung bình{'':<28}{recursive_mae.mean():10.4f} | {direct_mae.mean():10.4f}\n")
+
+        service = make_service(csv_path)
+        country = frame["location"].iloc[0]
+        start = (frame["date"].max() + timedelta(days=1)).date()
+        for model, horizon, label in ((recursive, 1, "một bước gọi lặp"), (direct, HORIZON, "trực tiếp H ngày")):
+            service.model, service.horizon = model, horizon
+            dates, scaled, error = service._rollout([country], start, HORIZON)
+            assert error is None and scaled.shape == (1, 1, HORIZON)
+            print_row(f"Dự báo {HORIZON} ngày: {label}",
+                      *time_call(lambda: service._rollout([country], start, HORIZON), repeat=10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_nlu_client.py
+"""Độ trễ mỗi tin nhắn khi Dialogflow khỏe / chập chờn / treo, đo trên một server gRPC giả lập chạy tại chỗ.
+
+So sánh: gọi một lần với deadline 10 s (như trước) và DialogflowClient (deadline, retry + jitter, circuit breaker).
+Cần grpcio và google-cloud-dialogflow.
+
+Chạy từ thư mục Web:  python benchmarks/bench_nlu_client.py
+"""
+import statistics
+import time
+from concurrent import futures
+
+import grpc
+from google.cloud import dialogflow_v2 as dialogflow
+
+from bench_common import WEB_DIR  # noqa: F401  (thêm thư mục Web vào sys.path)
+from modules.nlu_client import DialogflowClient, RetryPolicy, CircuitBreaker, NLUUnavailableError
+
+MESSAGES = 60
+PORT = 50071
+
+
+class FakeSessions:
+    """Server giả lập Sessions.DetectIntent: mode 'healthy', 'flaky' (1/2 lỗi UNAVAILABLE) hoặc 'hang' (không trả lời)"""
+
+    def __init__(self, latency=0.08):
+        self.latency = latency
+        self.mode = "healthy"
+        self.calls = 0
+
+    def detect_intent(self, request, context):
+        self.calls += 1
+        if self.mode == "hang":
+            time.sleep(30)
+        if self.mode == "flaky" and self.calls % 2:
+            context.abort(grpc.StatusCode.UNAVAILABLE, "fake outage")
+        time.sleep(self.latency)
+        return dialogflow.DetectIntentResponse(
+            query_result=dialogflow.QueryResult(fulfillment_text=f"Trả lời cho: {request.query_input.text.text}")
+        )
+
+
+def start_server(servicer):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+    handler = grpc.method_handlers_generic_handler("google.cloud.dialogflow.v2.Sessions", {
+        "DetectIntent": grpc.unary_unary_rpc_method_handler(
+            servicer.detect_intent,
+            request_deserializer=dialogflow.DetectIntentRequest.deserialize,
+            response_serializer=dialogflow.DetectIntentResponse.serialize,
+        )
+    })
+    server.add_generic_rpc_handlers((handler,))
+    server.add_insecure_port(f"localhost:{PORT}")
+    server.start()
+    return server
+
+
+def make_clients():
+    endpoint = f"localhost:{PORT}"
+    legacy = DialogflowClient(
+        "bench", api_endpoint=endpoint, deadline=10.0,
+        retry=RetryPolicy(max_attempts=1), breaker=CircuitBreaker(failure_threshold=10 ** 9)
+    )
+    managed = DialogflowClient("bench", api_endpoint=endpoint, deadline=2.0)
+    return {"Trước (1 lần, deadline 10 s)": legacy, "DialogflowClient": managed}
+
+
+def run(client, n):
+    timings, failures = [], 0
+    for i in range(n):
+        start = time.perf_counter()
+        try:
+            client.detect_intent(f"câu hỏi {i}", f"session-{i % 5}")
+        except NLUUnavailableError:
+            failures += 1
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.mean(timings), timings[int(0.95 * (len(timings) - 1))], failures
+
+
+def main():
+    servicer = FakeSessions()
+    server = start_server(servicer)
+    try:
+        for mode, n in (("healthy", MESSAGES), ("flaky", MESSAGES), ("hang", 10)):
+            servicer.mode = mode
+            print(f"\n[{mode}] {n} tin nhắn")
+            for label, client in make_clients().items():
+                mean_ms, p95_ms, failures = run(client, n)
+                stats = client.get_stats()
+                print(f"  {label:<30} TB {mean_ms:8.1f} ms | p95 {p95_ms:8.1f} ms | thất bại {failures:3d} "
+                      f"| thử lại {stats['retries']:3d} | breaker {stats['breaker_state']} ({stats['rejected']} bị chặn)")
+    finally:
+        server.stop(grace=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_overview_tab.py
+"""So sánh thời gian chuyển chỉ số ở tab Tổng quan: idxmax trên toàn bộ dữ liệu và tra bảng MAX tính sẵn.
+
+Chạy từ thư mục Web:  python benchmarks/bench_overview_tab.py
+"""
+from bench_common import load_benchmark_frame, time_call, print_row
+
+from modules.overview_analysis import (
+    OVERVIEW_METRICS, VACCINATION_MAX_METRIC, build_max_tables, compute_waffle_data
+)
+
+
+def tab_compute_before(df, metric):
+    """Phần tính toán của tab trước khi tối ưu: hai lần idxmax trên toàn bộ dữ liệu"""
+    max_metric_data = df.loc[df.groupby('location')[metric].idxmax()]
+    max_metric_data.nlargest(10, metric)
+    max_metric_data.groupby("continent")[metric].sum()
+    max_metric_data.dropna(subset=[metric, 'continent'])
+    max_vax_data = df.loc[df.groupby('location')[VACCINATION_MAX_METRIC].idxmax()]
+    compute_waffle_data(max_vax_data)
+
+
+def tab_compute_after(max_tables, metric):
+    """Phần tính toán của tab sau khi tối ưu: đọc bảng MAX đã tính sẵn"""
+    max_metric_data = max_tables[metric]
+    max_metric_data.nlargest(10, metric)
+    max_metric_data.groupby("continent")[metric].sum()
+    max_metric_data.dropna(subset=[metric, 'continent'])
+    compute_waffle_data(max_tables[VACCINATION_MAX_METRIC])
+
+
+def main():
+    df = load_benchmark_frame()
+
+    build_ms, _ = time_call(lambda: build_max_tables(df), repeat=3, warmup=0)
+    print_row("Xây bảng MAX (một lần mỗi phiên bản dữ liệu)", build_ms, build_ms)
+    max_tables = build_max_tables(df)
+
+    for label, metric in OVERVIEW_METRICS.items():
+        print(f"\n{label} ({metric})")
+        print_row("  Trước: idxmax mỗi lần chuyển tab", *time_call(lambda: tab_compute_before(df, metric)))
+        print_row("  Sau: tra bảng tính sẵn", *time_call(lambda: tab_compute_after(max_tables, metric)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_shared_dataset.py
+"""Tổng bộ nhớ của 4 process worker cùng tải dữ liệu (dữ liệu giả lập 230 quốc gia × 1.200 ngày):
+mỗi process tự đọc CSV (như trước) so với dùng chung file Arrow memory-map (COVID_SHARED_DATASET_DIR).
+
+Mỗi worker tải các DataFrame của dashboard và DataQueryService (thêm CovidPredictionService nếu có TensorFlow)
+qua đúng các hàm tải của app. RSS tính cả trang dùng chung ở mọi process nên cộng lại bị đếm trùng;
+PSS (chia đều trang dùng chung cho các process) mới phản ánh tổng RAM thực tế. Chỉ chạy trên Linux (/proc).
+
+Chạy từ thư mục Web:  python benchmarks/bench_shared_dataset.py
+"""
+import multiprocessing as mp
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_common import WEB_DIR, write_synthetic_csv
+
+WORKERS = 4
+
+
+def read_memory_kb():
+    """(RSS, PSS) của process hiện tại, tính bằng kB"""
+    rss = pss = 0
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            rss = int(line.split()[1])
+    rollup = Path("/proc/self/smaps_rollup")
+    if rollup.exists():
+        for line in rollup.read_text().splitlines():
+            if line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss, pss
+
+
+def worker(web_dir, csv_path, shared_dir, start_barrier, done_barrier, results):
+    if shared_dir:
+        import os
+        os.environ["COVID_SHARED_DATASET_DIR"] = shared_dir
+    sys.path.append(web_dir)
+    from modules.shared_dataset import load_shared_frame
+    from modules.data_processing import _read_dashboard_csv
+    from modules.data_query_service import DataQueryService
+
+    builders = {
+        "dashboard": lambda: _read_dashboard_csv(csv_path),
+        "data_query": lambda: DataQueryService._read_data(csv_path),
+    }
+    try:
+        from modules.prediction_service import CovidPredictionService
+        builders["prediction"] = lambda: CovidPredictionService._build_model_frame(csv_path)
+    except ImportError:
+        pass
+
+    base_rss, base_pss = read_memory_kb()
+    start_barrier.wait()
+    start = time.perf_counter()
+    frames = {name: load_shared_frame(name, csv_path, build) for name, build in builders.items()}
+    load_ms = (time.perf_counter() - start) * 1000
+    # Chạm vào toàn bộ dữ liệu như khi các tab đọc dữ liệu
+    for df in frames.values():
+        df.select_dtypes("number").sum()
+    rss, pss = read_memory_kb()
+    results.put((load_ms, rss - base_rss, pss - base_pss, len(frames)))
+    # Giữ process sống đến khi mọi worker đã đo xong để PSS chia trang dùng chung đúng
+    done_barrier.wait()
+
+
+def run(csv_path, shared_dir):
+    ctx = mp.get_context("spawn")
+    start_barrier, done_barrier = ctx.Barrier(WORKERS), ctx.Barrier(WORKERS)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(str(WEB_DIR), str(csv_path), shared_dir, start_barrier, done_barrier, results))
+        for _ in range(WORKERS)
+    ]
+    for p in processes:
+        p.start()
+    rows = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return rows
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "covid_synthetic.csv"
+        df = write_synthetic_csv(csv_path)
+        print(f"CSV giả lập: {len(df):,} dòng, {csv_path.stat().st_size / 2**20:.1f} MB\n")
+
+        for label, shared_dir in (("Mỗi process một bản", None), ("Dùng chung (Arrow mmap)", str(Path(tmp) / "shared"))):
+            rows = run(csv_path, shared_dir)
+            load_ms = sorted(r[0] for r in rows)
+            rss_mb = sum(r[1] for r in rows) / 1024
+            pss_mb = sum(r[2] for r in rows) / 1024
+            print(f"{label:<26} {rows[0][3]} DataFrame/process | tải chậm nhất {load_ms[-1]:7.0f} ms, nhanh nhất {load_ms[0]:6.0f} ms "
+                  f"| tổng RSS tăng {rss_mb:7.1f} MB | tổng PSS tăng {pss_mb:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
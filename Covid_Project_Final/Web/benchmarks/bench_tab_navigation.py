@@ -0,0 +1,71 @@
+# benchmarks/bench_tab_navigation.py
+"""Thời gian một lần rerun của dashboard (dữ liệu giả lập 230 quốc gia × 1.200 ngày):
+st.tabs chạy cả bốn mục dashboard so với thanh chọn mục chỉ chạy mục đang mở.
+
+Mục Chatbot không được đưa vào vì cần Dialogflow/TensorFlow; ở cách cũ nó còn cộng thêm vào mọi lần rerun.
+
+Chạy từ thư mục Web:  python benchmarks/bench_tab_navigation.py
+"""
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from bench_common import WEB_DIR
+
+RERUNS = 5
+VIEW_LABELS = ["Xu hướng", "Bản đồ", "Tổng quan", "So sánh"]
+
+
+def dashboard_page(web_dir, mode):
+    # AppTest chạy lại mã nguồn hàm này như một script riêng nên mọi thứ cần dùng phải import/truyền vào trong hàm
+    import sys
+    import streamlit as st
+    if web_dir not in sys.path:
+        sys.path.append(web_dir)
+    from benchmarks.bench_common import make_synthetic_frame
+    from modules.navigation import render_active_view
+    from modules.visualization import show_enhanced_time_trends, show_enhanced_world_map, show_enhanced_comparative_analysis
+    from modules.overview_analysis import show_overview_analysis
+    from modules.data_processing import compute_dataset_version
+
+    df = st.cache_resource(make_synthetic_frame)()
+    version = st.cache_resource(compute_dataset_version)(df)
+    views = {
+        "Xu hướng": lambda: show_enhanced_time_trends(df),
+        "Bản đồ": lambda: show_enhanced_world_map(df, version),
+        "Tổng quan": lambda: show_overview_analysis(df, version),
+        "So sánh": lambda: show_enhanced_comparative_analysis(df, version),
+    }
+    if mode == "tabs":
+        for tab, view in zip(st.tabs(list(views)), views.values()):
+            with tab:
+                view()
+    else:
+        render_active_view({label: st.fragment(view) for label, view in views.items()})
+
+
+def measure(at):
+    timings = []
+    for _ in range(RERUNS):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    args = (str(WEB_DIR), "tabs")
+    at = AppTest.from_function(dashboard_page, args=args, default_timeout=300)
+    at.run()  # lượt đầu: sinh dữ liệu, dựng các cache theo phiên bản dữ liệu
+    print(f"{'st.tabs (cả 4 mục)':<28} {measure(at):8.1f} ms/rerun")
+
+    at = AppTest.from_function(dashboard_page, args=(str(WEB_DIR), "navigation"), default_timeout=300)
+    at.run()
+    for label in VIEW_LABELS:
+        at.radio(key="active_view").set_value(label).run()
+        print(f"{'Chỉ mục ' + label:<28} {measure(at):8.1f} ms/rerun")
+
+
+if __name__ == "__main__":
+    main()
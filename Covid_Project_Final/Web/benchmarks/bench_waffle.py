@@ -0,0 +1,58 @@
+# benchmarks/bench_waffle.py
+"""Đo thời gian vẽ và mức tăng bộ nhớ của waffle chart qua 100 lần rerun.
+
+Chạy từ thư mục Web:  python benchmarks/bench_waffle.py
+"""
+import io
+import time
+import tracemalloc
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from bench_common import WEB_DIR  # noqa: F401  (thêm thư mục Web vào sys.path)
+from modules.overview_analysis import create_waffle_chart, render_waffle_png, get_waffle_png
+
+RERUNS = 100
+WAFFLE_DATA = {'Đã tiêm đủ': 65, 'Tiêm 1 mũi': 7, 'Chưa tiêm': 28}
+TITLE = 'Tỷ lệ tiêm chủng COVID-19 trên toàn cầu'
+
+
+def rerun_before():
+    """Cách cũ: tạo figure mới, st.pyplot rasterize (savefig) và không bao giờ đóng figure"""
+    fig = create_waffle_chart(WAFFLE_DATA, TITLE)
+    fig.savefig(io.BytesIO(), format="png")
+
+
+def rerun_uncached():
+    render_waffle_png(WAFFLE_DATA, TITLE)
+
+
+def rerun_cached():
+    get_waffle_png(tuple(WAFFLE_DATA.items()), TITLE)
+
+
+def measure(label, fn):
+    plt.close("all")
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    for _ in range(RERUNS):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<38} {elapsed_ms / RERUNS:8.2f} ms/rerun | tăng bộ nhớ {(current - baseline) / 1024 ** 2:8.2f} MB"
+          f" | figure còn mở: {len(plt.get_fignums())}")
+
+
+def main():
+    print(f"{RERUNS} lần rerun")
+    measure("Trước: Waffle mới + st.pyplot", rerun_before)
+    measure("PNG, đóng figure (không cache)", rerun_uncached)
+    measure("PNG cache theo giá trị waffle", rerun_cached)
+
+
+if __name__ == "__main__":
+    main()
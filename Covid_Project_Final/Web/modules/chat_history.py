@@ -0,0 +1,114 @@
+# modules/chat_history.py
+import time
+
+import streamlit as st
+
+from .chat_pipeline import PendingReply
+from .forecast_result import ForecastResult
+
+# Chỉ hiển thị N lượt chat gần nhất; các lượt cũ hơn được tải thêm theo từng trang
+CHAT_HISTORY_PAGE_SIZE = 20
+# Câu trả lời dài hơn ngưỡng này (vd. dự đoán 30 ngày) được hiện dần thay vì hiện một lần
+STREAM_MIN_CHARS = 300
+STREAM_CHUNK_DELAY = 0.01
+PENDING_TEXT = "⏳ Đang xử lý..."
+# Chu kỳ kiểm tra câu trả lời đang chờ (giây), là run_every của fragment _pending_reply
+PENDING_POLL_INTERVAL = 0.5
+
+
+def visible_turns(history, visible_count):
+    """Chỉ số bắt đầu và các lượt chat cần hiển thị (visible_count lượt cuối)"""
+    start = max(0, len(history) - visible_count)
+    return start, history[start:]
+
+
+def stream_text(text, delay=STREAM_CHUNK_DELAY):
+    """Sinh từng cụm từ (giữ nguyên khoảng trắng/xuống dòng) cho st.write_stream"""
+    word = ""
+    for char in text:
+        word += char
+        if char.isspace():
+            yield word
+            word = ""
+            if delay:
+                time.sleep(delay)
+    if word:
+        yield word
+
+
+def _show_more_history():
+    st.session_state.history_visible = st.session_state.get("history_visible", CHAT_HISTORY_PAGE_SIZE) + CHAT_HISTORY_PAGE_SIZE
+
+
+def as_markdown(text):
+    """Giữ nguyên xuống dòng của câu trả lời (markdown gộp các dòng liền nhau thành một đoạn)"""
+    return text.replace("\n", "  \n")
+
+
+def render_reply(index, bot_msg, stream=False):
+    text = as_markdown(str(bot_msg))
+    if stream and len(text) >= STREAM_MIN_CHARS:
+        st.write_stream(stream_text(text))
+    else:
+        st.markdown(text)
+    if isinstance(bot_msg, ForecastResult):
+        st.plotly_chart(bot_msg.figure, use_container_width=True, key=f"forecast_chart_{index}")
+
+
+def collect_finished_replies(history, pending_turns):
+    """Kiểm tra một lần (không chờ) các câu trả lời đang chờ; lượt nào đã xong được thay bằng câu trả lời.
+
+    Trả về tập chỉ số các lượt vừa xong (để hiện dần câu trả lời dài).
+    """
+    finished = set()
+    for i in sorted(pending_turns):
+        user_msg, bot_msg = history[i]
+        if bot_msg.poll():
+            history[i] = (user_msg, bot_msg.result)
+            finished.add(i)
+    pending_turns.difference_update(finished)
+    return finished
+
+
+@st.fragment(run_every=PENDING_POLL_INTERVAL)
+def _pending_reply(index, history):
+    """Câu trả lời đang chờ của một lượt: fragment tự chạy lại mỗi PENDING_POLL_INTERVAL giây, chỉ kiểm tra lượt này
+    và chỉ vẽ dòng "đang xử lý". Mỗi lần chạy không chờ gì cả, nên tin nhắn mới không bị chặn bởi một câu trả lời chậm.
+
+    Khi câu trả lời xong, chạy lại toàn bộ script một lần: collect_finished_replies nhận câu trả lời và render_history
+    vẽ nó như mọi lượt đã xong (ngoài fragment này). Fragment không còn được gọi nên Streamlit ngừng tự chạy lại nó,
+    thay vì vẽ lại câu trả lời và biểu đồ mỗi PENDING_POLL_INTERVAL giây.
+    """
+    if index >= len(history):
+        return
+    bot_msg = history[index][1]
+    if isinstance(bot_msg, PendingReply) and bot_msg.poll():
+        st.rerun(scope="app")
+    st.markdown(PENDING_TEXT)
+
+
+def render_turn(index, user_msg, bot_msg, history, stream=False):
+    """Vẽ một lượt chat; câu trả lời đang chờ được giao cho fragment _pending_reply"""
+    with st.chat_message("user"):
+        st.markdown(user_msg)
+    with st.chat_message("assistant"):
+        if isinstance(bot_msg, PendingReply):
+            _pending_reply(index, history)
+        else:
+            render_reply(index, bot_msg, stream)
+
+
+def render_history(history, stream_indices=()):
+    """Hiển thị các lượt chat gần nhất kèm nút tải thêm; stream_indices là các câu trả lời vừa xong cần hiện dần.
+
+    Gọi collect_finished_replies trước để các câu đã xong được vẽ ngay; các câu còn chờ tự cập nhật trong fragment.
+    """
+    visible_count = st.session_state.get("history_visible", CHAT_HISTORY_PAGE_SIZE)
+    start, turns = visible_turns(history, visible_count)
+    if start > 0:
+        st.button(
+            f"Xem thêm {min(start, CHAT_HISTORY_PAGE_SIZE)} tin nhắn cũ hơn ({start} tin nhắn đang ẩn)",
+            on_click=_show_more_history, key="history_show_more"
+        )
+    for offset, (user_msg, bot_msg) in enumerate(turns):
+        render_turn(start + offset, user_msg, bot_msg, history, stream=(start + offset) in stream_indices)
@@ -0,0 +1,147 @@
+# modules/chat_pipeline.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_FALLBACK = "Xin lỗi, tôi chưa thể trả lời câu hỏi này."
+TIMEOUT_MESSAGE = "Xin lỗi, hệ thống phản hồi quá chậm. Vui lòng thử lại sau."
+CANCELLED_MESSAGE = "(Yêu cầu đã bị hủy)"
+
+# Số luồng của mỗi bước = số phiên chat được xử lý đồng thời ở bước đó
+STAGE_WORKERS = 16
+# Bước còn nằm trong hàng đợi (chưa bắt đầu chạy) sau chừng này giây thì coi như hết giờ
+QUEUE_TIMEOUT = 60.0
+
+
+class ChatStage:
+    """Một bước xử lý tin nhắn: hàm trả về câu trả lời hoặc None nếu không thuộc phạm vi của bước này"""
+
+    def __init__(self, name, handler, timeout):
+        self.name = name
+        self.handler = handler
+        self.timeout = timeout
+
+
+class PendingReply:
+    """Câu trả lời đang chờ: giữ các future của từng bước và chọn kết quả theo thứ tự ưu tiên.
+
+    Thời gian chờ của mỗi bước tính từ lúc bước bắt đầu chạy (không tính thời gian xếp hàng trong pool);
+    bước còn xếp hàng quá `queue_timeout` giây được coi là hết giờ.
+    """
+
+    def __init__(self, stages, fallback=DEFAULT_FALLBACK, queue_timeout=QUEUE_TIMEOUT):
+        self.stages = stages
+        self.futures = {}
+        self.started_at = {}
+        self.fallback = fallback
+        self.queue_timeout = queue_timeout
+        self.submitted_at = time.monotonic()
+        self.result = None
+        self.answered_by = None
+        self.timed_out = []
+        self.skipped = []
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def _answered_before(self, stage):
+        """Đã có bước ưu tiên cao hơn `stage` trả lời (kể cả khi poll() chưa kịp chạy)"""
+        for previous in self.stages:
+            if previous is stage:
+                return False
+            future = self.futures.get(previous.name)
+            if future is not None and future.done() and not future.cancelled() \
+                    and future.exception() is None and future.result():
+                return True
+        return False
+
+    def run_stage(self, stage, *args, **kwargs):
+        """Chạy trong worker của bước: bỏ qua nếu đã có câu trả lời, ghi lại lúc bắt đầu và ghi log khi bước lỗi"""
+        if self.done or self._answered_before(stage):
+            self.skipped.append(stage.name)
+            return None
+        self.started_at[stage.name] = time.monotonic()
+        try:
+            return stage.handler(*args, **kwargs)
+        except Exception as e:
+            print(f"Lỗi ở bước '{stage.name}' của chatbot: {e!r}")
+            raise
+
+    def _stage_expired(self, stage, now):
+        started = self.started_at.get(stage.name)
+        if started is None:
+            return now - self.submitted_at >= self.queue_timeout
+        return now - started >= stage.timeout
+
+    def poll(self):
+        """Không chặn: trả về True khi đã có câu trả lời cuối cùng (kể cả thông báo lỗi/hết giờ)"""
+        if self.done:
+            return True
+
+        now = time.monotonic()
+        timed_out = []
+        for stage in self.stages:
+            future = self.futures[stage.name]
+            if not future.done():
+                if not self._stage_expired(stage, now):
+                    # Bước ưu tiên cao hơn chưa xong: chưa thể quyết định
+                    return False
+                timed_out.append(stage.name)
+                continue
+            if future.cancelled() or future.exception() is not None:
+                continue
+            answer = future.result()
+            if answer:
+                self._finish(answer, stage.name)
+                return True
+
+        self.timed_out = timed_out
+        self._finish(TIMEOUT_MESSAGE if timed_out else self.fallback, None)
+        return True
+
+    def wait(self, poll_interval=0.05):
+        """Chặn cho đến khi có câu trả lời (dùng cho chế độ đồng bộ và benchmark)"""
+        while not self.poll():
+            time.sleep(poll_interval)
+        return self.result
+
+    def cancel(self):
+        if self.done:
+            return
+        self._finish(CANCELLED_MESSAGE, None)
+
+    def _finish(self, answer, stage_name):
+        self.result = answer
+        self.answered_by = stage_name
+        # Bước chưa chạy thì hủy luôn; bước đang chạy sẽ kết thúc trong nền và bị bỏ qua
+        for future in self.futures.values():
+            future.cancel()
+
+
+class ChatPipeline:
+    """Chạy đồng thời các bước xử lý tin nhắn, không chặn luồng script Streamlit.
+
+    Mỗi bước có thread pool riêng (`workers_per_stage` luồng, tức số phiên xử lý cùng lúc cho bước đó), nên lời gọi
+    Dialogflow/dự đoán chậm không thể chiếm worker của các bước khác.
+    """
+
+    def __init__(self, stages, workers_per_stage=STAGE_WORKERS, queue_timeout=QUEUE_TIMEOUT):
+        self.stages = stages
+        self.queue_timeout = queue_timeout
+        self.executors = {
+            stage.name: ThreadPoolExecutor(max_workers=workers_per_stage, thread_name_prefix=f"chat-{stage.name}")
+            for stage in stages
+        }
+
+    def submit(self, *args, **kwargs):
+        pending = PendingReply(self.stages, queue_timeout=self.queue_timeout)
+        # Gửi theo thứ tự ưu tiên: khi một bước bắt đầu chạy, future của các bước ưu tiên cao hơn đã có sẵn
+        for stage in self.stages:
+            pending.futures[stage.name] = self.executors[stage.name].submit(
+                pending.run_stage, stage, *args, **kwargs
+            )
+        return pending
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
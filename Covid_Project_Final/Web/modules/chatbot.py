@@ -1,97 +1,253 @@
 # modules/chatbot.py
 import streamlit as st
-from streamlit_chat import message
-from google.oauth2 import service_account
-from google.cloud import dialogflow_v2 as dialogflow
 import uuid
 import json
 import os
-import re
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
 from .prediction_service import get_prediction_service
 from .country_mapper import CountryMapper 
 from .data_query_service import get_data_query_service
+from .chat_pipeline import ChatPipeline, ChatStage
+from .chat_history import render_history, collect_finished_replies, CHAT_HISTORY_PAGE_SIZE
+from .intent_classifier import LocalIntentClassifier, LocalFirstNLU, load_intents
+from .response_cache import ResponseCache, CachedRemoteNLU
+from .nlu_client import DialogflowClient, RetryPolicy, CircuitBreaker, NLUUnavailableError
+from .intent_router import (
+    IntentRouter, normalize_message, match_keywords, parse_date, parse_horizon,
+    INTENT_DATA_QUERY, INTENT_OVERVIEW, INTENT_PREDICTION
+)
 
 # --- Cấu hình (Phiên bản đơn giản) ---
 KEY_PATH = "dialogflow_key.json"
 
-try:
-    with open(KEY_PATH, "r") as f:
-        credentials_info = json.load(f)
-        project_id = credentials_info.get("project_id")
+# Thời gian chờ tối đa (giây) cho từng bước xử lý tin nhắn
+STAGE_TIMEOUTS = {
+    "data_query": 15.0,
+    "prediction": 45.0,
+    "dialogflow": 10.0
+}
 
-    creds = service_account.Credentials.from_service_account_file(KEY_PATH)
-    session_client = dialogflow.SessionsClient(credentials=creds)
+# Cache câu trả lời Dialogflow dùng chung trong process; đặt CHATBOT_RESPONSE_CACHE_DB để chia sẻ giữa các process
+RESPONSE_CACHE_MAX_ENTRIES = 2048
+RESPONSE_CACHE_TTL_SECONDS = 6 * 3600
+RESPONSE_CACHE_DB = os.environ.get("CHATBOT_RESPONSE_CACHE_DB")
+RESPONSE_CACHE_DB_MAX_ROWS = 16384
+# Các intent có câu trả lời phụ thuộc phiên/thời điểm, không bao giờ cache
+SESSION_DEPENDENT_INTENTS = {"Default Fallback Intent"}
 
-except FileNotFoundError:
-    st.error(f"Lỗi: Không tìm thấy file \'{KEY_PATH}\'. Vui lòng đặt file key vào thư mục gốc của dự án. Chatbot sẽ không hoạt động.")
-    session_client = None
-    project_id = None
-except Exception as e:
-    st.error(f"Lỗi khi khởi tạo chatbot: {e}")
-    session_client = None
-    project_id = None
+# Client Dialogflow: deadline tổng cho mỗi câu hỏi (nhỏ hơn STAGE_TIMEOUTS["dialogflow"]), số lần thử,
+# ngưỡng mở circuit breaker. DIALOGFLOW_API_ENDPOINT trỏ tới server giả lập (vd. localhost:50051) khi kiểm thử
+DIALOGFLOW_DEADLINE = float(os.environ.get("DIALOGFLOW_DEADLINE", 6.0))
+DIALOGFLOW_MAX_ATTEMPTS = 3
+DIALOGFLOW_BREAKER_THRESHOLD = 5
+DIALOGFLOW_BREAKER_RESET = 30.0
+DIALOGFLOW_API_ENDPOINT = os.environ.get("DIALOGFLOW_API_ENDPOINT")
+
+# Số kết quả dự đoán tối đa giữ lại trong trạng thái hội thoại của mỗi phiên
+DIALOGUE_STATE_MAX_FORECASTS = 8
 
 if 'session_id' not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
-def detect_intent_texts(text, language_code='vi'):
+def detect_intent_texts(text, language_code='vi', session_id=None):
     """Gửi một truy vấn văn bản đến Dialogflow và trả về phản hồi."""
+    parsed = route_message(text)
     
     # Kiểm tra xem có phải là yêu cầu truy vấn dữ liệu không (Ưu tiên xử lý trước)
-    data_query_response = handle_data_query_request(text)
+    data_query_response = handle_data_query_request(text, parsed)
     if data_query_response:
         return data_query_response
 
     # Kiểm tra xem có phải là yêu cầu dự đoán không
-    prediction_response = handle_prediction_request(text)
+    prediction_response = handle_prediction_request(text, parsed)
     if prediction_response:
-        return prediction_response
+        return str(prediction_response)
     
-    if not session_client or not project_id:
-        return "Xin lỗi, chatbot đang gặp sự cố kỹ thuật."
-
-    session = session_client.session_path(project_id, st.session_state.session_id)
-    text_input = dialogflow.TextInput(text=text, language_code=language_code)
-    query_input = dialogflow.QueryInput(text=text_input)
+    if session_id is None:
+        session_id = st.session_state.session_id
+    return get_nlu()(text, session_id)
 
+def query_dialogflow(text, session_id, language_code='vi'):
+    """Gọi Dialogflow (chặn, chạy trong thread pool khi dùng pipeline bất đồng bộ)."""
     try:
-        response = session_client.detect_intent(
-            request={"session": session, "query_input": query_input}
-        )
-        return response.query_result.fulfillment_text
-    except Exception as e:
+        answer, _ = query_dialogflow_with_meta(text, session_id, language_code)
+    except NLUUnavailableError as e:
         print(f"Lỗi khi gọi Dialogflow API: {e}")
         return "Oops! Có lỗi xảy ra khi kết nối tới chatbot."
+    return answer
 
-def handle_data_query_request(text):
-    """Xử lý yêu cầu truy vấn dữ liệu từ người dùng"""
-    text_lower = text.lower()
-    
-    # Các từ khóa để nhận diện yêu cầu truy vấn dữ liệu
-    data_query_keywords = [
-        "dữ liệu", "du lieu", "data","tổng quan", 
-        "tong quan", "overview","số liệu", "so lieu", 
-        "statistics", "thống kê", "thong ke"
-    ]
-    
-    # Kiểm tra xem có từ khóa truy vấn dữ liệu không
-    has_data_query_keyword = any(keyword in text_lower for keyword in data_query_keywords)
-    
-    # Loại trừ các từ khóa dự đoán để tránh nhầm lẫn
-    prediction_keywords_for_exclusion = [
-        "dự đoán", "du doan", "predict", "forecast", 
-        "dự báo", "du bao", "tương lai", "tuong lai",
-        "ngày tới", "ngay toi", "sắp tới", "sap toi"
-    ]
-    is_prediction_query = any(keyword in text_lower for keyword in prediction_keywords_for_exclusion)
-
-    # Nếu có từ khóa truy vấn dữ liệu nhưng cũng có từ khóa dự đoán, thì đây có thể là yêu cầu dự đoán
-    if has_data_query_keyword and is_prediction_query:
+def query_dialogflow_with_meta(text, session_id, language_code='vi'):
+    """Như query_dialogflow nhưng trả về thêm cờ cho biết câu trả lời có thể cache dùng chung hay không.
+
+    Ném NLUUnavailableError khi Dialogflow không phản hồi để tầng NLU trả lời tại chỗ thay thế."""
+    client, _ = get_dialogflow_client()
+    if client is None:
+        raise NLUUnavailableError("Chưa khởi tạo được client Dialogflow")
+
+    result = client.detect_intent(text, session_id, language_code)
+    return result.fulfillment_text, _is_cacheable_result(result)
+
+def _is_cacheable_result(query_result):
+    """Chỉ cache câu trả lời tĩnh: không fallback, không ngữ cảnh/tham số, không qua webhook"""
+    intent = query_result.intent
+    if intent.is_fallback or intent.display_name in SESSION_DEPENDENT_INTENTS:
+        return False
+    if len(query_result.output_contexts) > 0 or len(query_result.parameters) > 0:
+        return False
+    if query_result.webhook_source or query_result.webhook_payload:
+        return False
+    return bool(query_result.fulfillment_text)
+
+@st.cache_resource
+def get_dialogflow_client():
+    """Một client (một kênh gRPC) dùng chung cho mọi phiên trong process; trả về (client, thông báo lỗi)"""
+    options = dict(
+        deadline=DIALOGFLOW_DEADLINE,
+        retry=RetryPolicy(max_attempts=DIALOGFLOW_MAX_ATTEMPTS),
+        breaker=CircuitBreaker(DIALOGFLOW_BREAKER_THRESHOLD, DIALOGFLOW_BREAKER_RESET)
+    )
+    try:
+        if DIALOGFLOW_API_ENDPOINT:
+            return DialogflowClient("local-test", api_endpoint=DIALOGFLOW_API_ENDPOINT, **options), None
+        return DialogflowClient.from_key_file(KEY_PATH, **options), None
+    except FileNotFoundError:
+        return None, f"Lỗi: Không tìm thấy file \'{KEY_PATH}\'. Vui lòng đặt file key vào thư mục gốc của dự án. Chatbot sẽ chỉ trả lời các câu hỏi có sẵn."
+    except Exception as e:
+        return None, f"Lỗi khi khởi tạo chatbot: {e}"
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+        sqlite_path=RESPONSE_CACHE_DB,
+        sqlite_max_rows=RESPONSE_CACHE_DB_MAX_ROWS
+    )
+
+@st.cache_resource
+def get_nlu():
+    """Tầng NLU: phân loại intent tại chỗ cho các câu hỏi thường gặp, chỉ gọi Dialogflow khi không chắc chắn"""
+    try:
+        classifier = LocalIntentClassifier(load_intents())
+    except Exception as e:
+        print(f"Không thể khởi tạo bộ phân loại intent cục bộ: {e}")
+        classifier = None
+    return LocalFirstNLU(classifier, CachedRemoteNLU(query_dialogflow_with_meta, get_response_cache()))
+
+@st.cache_resource
+def get_intent_router():
+    return IntentRouter(lambda: get_prediction_service().country_mapper)
+
+@lru_cache(maxsize=256)
+def _route_message_cached(text, today):
+    return get_intent_router().parse(text, today)
+
+def route_message(text):
+    """Phân tích tin nhắn một lần; các bước trong pipeline dùng chung kết quả (khóa theo ngày vì có 'ngày mai'...)"""
+    return _route_message_cached(text, datetime.now().date())
+
+class DialogueState:
+    """Trạng thái hội thoại của một phiên: intent/quốc gia/ngày/số ngày đã giải quyết gần nhất
+    và các kết quả dự đoán đã tính (giới hạn kích thước), để câu nối tiếp như 'còn Thái Lan?' dùng lại ngữ cảnh.
+
+    Được giữ trong st.session_state và được các thread của pipeline đọc/ghi, nên mọi truy cập đều qua khóa.
+    """
+
+    def __init__(self, max_forecasts=DIALOGUE_STATE_MAX_FORECASTS):
+        self._lock = threading.Lock()
+        self.max_forecasts = max_forecasts
+        self.intent = None
+        self.country = None
+        self.target_date = None
+        self.horizon = None
+        self.forecasts = OrderedDict()
+
+    def resolve(self, parsed):
+        """Ghép tin nhắn mới với ngữ cảnh: câu nối tiếp kế thừa intent, thực thể thiếu lấy từ lượt trước"""
+        with self._lock:
+            if parsed.is_followup and self.intent is not None:
+                resolved = parsed.replace(
+                    intent=self.intent,
+                    country=parsed.country or self.country,
+                    target_date=parsed.target_date or self.target_date,
+                    horizon=parsed.horizon if parsed.horizon_explicit else (self.horizon or parsed.horizon)
+                )
+            elif parsed.intent in (INTENT_DATA_QUERY, INTENT_PREDICTION) and parsed.country is None:
+                resolved = parsed.replace(country=self.country)
+            else:
+                resolved = parsed
+
+            if resolved.intent in (INTENT_DATA_QUERY, INTENT_PREDICTION):
+                self.intent = resolved.intent
+                self.country = resolved.country
+                self.target_date = resolved.target_date
+                self.horizon = resolved.horizon
+            return resolved
+
+    def get_forecast(self, country, start_date, days_ahead, model_version=None):
+        """(dự đoán, khoảng dự đoán) đã tính cho cùng quốc gia/ngày bắt đầu/phiên bản mô hình với số ngày >= days_ahead
+        (cắt lấy phần cần dùng); None nếu chưa có"""
+        with self._lock:
+            key = (country, start_date, model_version)
+            entry = self.forecasts.get(key)
+            if entry is None or len(entry[0]) < days_ahead:
+                return None
+            self.forecasts.move_to_end(key)
+            predictions, intervals = entry
+            days = list(predictions)[:days_ahead]
+            if intervals:
+                intervals = {day: intervals[day] for day in days if day in intervals}
+            return {day: predictions[day] for day in days}, intervals
+
+    def store_forecast(self, country, start_date, predictions, model_version=None, intervals=None):
+        with self._lock:
+            key = (country, start_date, model_version)
+            existing = self.forecasts.get(key)
+            if existing is None or len(existing[0]) < len(predictions):
+                self.forecasts[key] = (predictions, intervals)
+            self.forecasts.move_to_end(key)
+            while len(self.forecasts) > self.max_forecasts:
+                self.forecasts.popitem(last=False)
+
+def _get_dialogue_state():
+    if 'dialogue_state' not in st.session_state:
+        st.session_state.dialogue_state = DialogueState()
+    return st.session_state.dialogue_state
+
+def _data_query_stage(text, session_id, query, state):
+    return handle_data_query_request(text, query)
+
+def _prediction_stage(text, session_id, query, state):
+    return handle_prediction_request(text, query, state)
+
+def _dialogflow_stage(text, session_id, query, state):
+    # Router đã xác định là câu hỏi dữ liệu/dự đoán thì không cần tốn một lượt gọi Dialogflow
+    if query.is_local:
         return None
+    return get_nlu()(text, session_id)
+
+@st.cache_resource
+def get_chat_pipeline():
+    """Pipeline dùng chung trong process: dữ liệu/dự đoán cục bộ chạy song song với Dialogflow.
+
+    Thứ tự các bước là thứ tự ưu tiên khi chọn câu trả lời, giống luồng đồng bộ của detect_intent_texts.
+    """
+    return ChatPipeline([
+        ChatStage("data_query", _data_query_stage, STAGE_TIMEOUTS["data_query"]),
+        ChatStage("prediction", _prediction_stage, STAGE_TIMEOUTS["prediction"]),
+        ChatStage("dialogflow", _dialogflow_stage, STAGE_TIMEOUTS["dialogflow"])
+    ])
+
+def handle_data_query_request(text, parsed=None):
+    """Xử lý yêu cầu truy vấn dữ liệu từ người dùng"""
+    if parsed is None:
+        parsed = route_message(text)
     
-    # Nếu không có từ khóa truy vấn dữ liệu, hoặc là yêu cầu dự đoán, thì không xử lý ở đây
-    if not has_data_query_keyword:
+    # Chỉ xử lý khi router nhận diện là truy vấn dữ liệu (đã loại trừ các câu có từ khóa dự đoán)
+    if parsed.intent not in (INTENT_DATA_QUERY, INTENT_OVERVIEW):
         return None
     
     try:
@@ -99,17 +255,11 @@ def handle_data_query_request(text):
         data_service = get_data_query_service()
         
         # Kiểm tra xem có yêu cầu tổng quan không
-        overview_keywords = ["tổng quan", "tong quan", "overview", "tình hình chung", "tinh hinh chung"]
-        if any(keyword in text_lower for keyword in overview_keywords):
+        if parsed.intent == INTENT_OVERVIEW:
             return data_service.get_overview_data()
         
-        pred_service = get_prediction_service()
-        
-        # Trích xuất tên quốc gia từ text
-        country = pred_service.country_mapper.find_country(text)
-        
-        # Trích xuất ngày cụ thể (nếu có)
-        target_date = extract_date_from_text(text)
+        country = parsed.country
+        target_date = parsed.target_date
         
         if country and target_date:
             # Truy vấn dữ liệu cho quốc gia và ngày cụ thể
@@ -126,68 +276,30 @@ def handle_data_query_request(text):
 
 def extract_date_from_text(text):
     """Trích xuất ngày cụ thể từ text input (nếu có)"""
-    text_lower = text.lower()
-    
-    # Pattern cho định dạng ngày dd/mm/yyyy hoặc dd/mm/yy
-    date_patterns = [
-        r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})',  # dd/mm/yyyy
-        r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})'   # dd/mm/yy
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text_lower)
-        if match:
-            day, month, year = match.groups()
-            # Xử lý năm 2 chữ số
-            if len(year) == 2:
-                year = "20" + year if int(year) < 50 else "19" + year # Giả định năm 20xx cho <50, 19xx cho >=50
-            try:
-                return datetime(int(year), int(month), int(day)).date()
-            except ValueError:
-                continue
-                
-    # Pattern cho các từ khóa như "ngày mai", "hôm sau", "tuần tới", "tháng tới"
-    if "ngày mai" in text_lower or "ngay mai" in text_lower:
-        return (datetime.now() + timedelta(days=1)).date()
-    if "ngày kia" in text_lower or "ngay kia" in text_lower:
-        return (datetime.now() + timedelta(days=2)).date()
-    if "tuần tới" in text_lower or "tuan toi" in text_lower:
-        return (datetime.now() + timedelta(weeks=1)).date()
-    if "tháng tới" in text_lower or "thang toi" in text_lower:
-        return (datetime.now() + timedelta(days=30)).date() # Ước lượng 30 ngày cho tháng tới
-
-    return None
-
-def handle_prediction_request(text):
+    text_lower = normalize_message(text)
+    _, matched_keywords = match_keywords(text_lower)
+    return parse_date(text_lower, matched_keywords)
+
+def handle_prediction_request(text, parsed=None, state=None):
     """Xử lý yêu cầu dự đoán từ người dùng"""
-    text_lower = text.lower()
-    
-    # Các từ khóa để nhận diện yêu cầu dự đoán
-    prediction_keywords = [
-        "dự đoán", "du doan", "predict", "forecast", 
-        "dự báo", "du bao", "tương lai", "tuong lai",
-        "ngày tới", "ngay toi", "sắp tới", "sap toi",
-        "ở ngày", "o ngay", "vào ngày", "vao ngay"
-    ]
+    if parsed is None:
+        parsed = route_message(text)
     
     # Kiểm tra xem có từ khóa dự đoán không
-    has_prediction_keyword = any(keyword in text_lower for keyword in prediction_keywords)
-    
-    if not has_prediction_keyword:
+    if parsed.intent != INTENT_PREDICTION:
         return None
     
     try:
         # Lấy prediction service
         pred_service = get_prediction_service()
         
-        # Trích xuất tên quốc gia từ text sử dụng CountryMapper
-        country = pred_service.country_mapper.find_country(text)
+        country = parsed.country
         if not country:
             available_countries = pred_service.country_mapper.get_supported_countries()
             return f"Tôi cần biết quốc gia để dự đoán. Các quốc gia được hỗ trợ: {', '.join(available_countries[:5])}... \n\nVí dụ: 'Dự đoán COVID cho {available_countries[0] if available_countries else 'Vietnam'} 5 ngày tới'"
         
         # Trích xuất ngày cụ thể (nếu có)
-        target_date = extract_date_from_text(text)
+        target_date = parsed.target_date
         
         days_ahead = 3 # Mặc định là 3 ngày
         if target_date:
@@ -196,48 +308,40 @@ def handle_prediction_request(text):
             delta = target_date - today
             days_ahead = max(1, delta.days) # Đảm bảo ít nhất 1 ngày
         else:
-            # Nếu không có ngày cụ thể, trích xuất số ngày tới
-            days_ahead = extract_days_from_text(text)
-        
-        # Thực hiện dự đoán
-        predictions, error = pred_service.predict_cases(country, target_date, days_ahead)
+            # Nếu không có ngày cụ thể, dùng số ngày tới đã trích xuất
+            days_ahead = parsed.horizon
         
-        if error:
-            return f"Lỗi dự đoán: {error}"
+        # Dùng lại dự đoán đã tính trong hội thoại nếu có, nếu không thì chạy mô hình
+        start_date = target_date or datetime.now().date()
+        model_version = pred_service.model_version
+        cached = state.get_forecast(country, start_date, days_ahead, model_version) if state else None
+        if cached is not None:
+            predictions, intervals = cached
+        else:
+            predictions, error = pred_service.predict_cases(country, target_date, days_ahead)
+            
+            if error:
+                return f"Lỗi dự đoán: {error}"
+            # Khoảng dự đoán Monte-Carlo dropout; lỗi ở bước này không làm mất dự đoán điểm
+            intervals, _ = pred_service.predict_intervals(country, target_date, days_ahead)
+            if state:
+                state.store_forecast(country, start_date, predictions, model_version, intervals)
         
         # Lấy thông tin độ tin cậy
-        confidence_level, confidence_msg = pred_service.get_prediction_confidence(country, target_date)
+        confidence_level, confidence_msg = pred_service.get_prediction_confidence(country, target_date, intervals)
         
-        # Định dạng phản hồi
-        response = pred_service.format_prediction_response(
-            country, predictions, confidence_level, confidence_msg
-        )
-        
-        return response
+        # Kết quả có cấu trúc: giao diện chat hiển thị văn bản kèm biểu đồ thực tế/dự đoán
+        if not predictions:
+            return "Không thể thực hiện dự đoán."
+        return pred_service.build_forecast_result(country, predictions, confidence_level, confidence_msg,
+                                                  intervals=intervals)
         
     except Exception as e:
         return f"Lỗi khi xử lý yêu cầu dự đoán: {e}"
 
 def extract_days_from_text(text):
     """Trích xuất số ngày dự đoán từ text"""
-    # Tìm số ngày trong text
-    
-    # Pattern để tìm số + "ngày"
-    patterns = [
-        r'(\d+)\s*ngày',
-        r'(\d+)\s*day',
-        r'(\d+)\s*days'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text.lower())
-        if match:
-            days = int(match.group(1))
-            # Giới hạn số ngày dự đoán
-            return min(days, 30)  # Tối đa 30 ngày
-    
-    # Mặc định là 3 ngày nếu không tìm thấy
-    return 3
+    return parse_horizon(normalize_message(text))
 
 def show_chatbot_ui():
     """Hiển thị giao diện người dùng cho chatbot."""
@@ -254,24 +358,71 @@ def show_chatbot_ui():
     
     st.write("Bạn có thể hỏi tôi các câu hỏi về dữ liệu COVID-19 hoặc yêu cầu dự đoán!")
 
+    _, client_error = get_dialogflow_client()
+    if client_error:
+        st.error(client_error)
+
+    _chat_panel()
+
+@st.fragment
+def _chat_panel():
+    """Khung chat là một fragment: gửi tin nhắn, xóa lịch sử hay chờ câu trả lời chỉ chạy lại khung này,
+    không chạy lại cả dashboard (CSS, sidebar, lọc dữ liệu, KPI)."""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
     if 'history' not in st.session_state:
         st.session_state['history'] = []
+    if 'pending_turns' not in st.session_state:
+        st.session_state.pending_turns = set()
     
     if st.button("Xóa lịch sử chat"):
+        for i in st.session_state.pending_turns:
+            st.session_state.history[i][1].cancel()
         st.session_state['history'] = []
-        st.rerun()
-
-    if st.session_state.history:
-        for i, (user_msg, bot_msg) in enumerate(st.session_state.history):
-            message(user_msg, is_user=True, key=f"user_{i}")
-            message(bot_msg, key=f"bot_{i}")
+        st.session_state.pending_turns = set()
+        st.session_state.history_visible = CHAT_HISTORY_PAGE_SIZE
+        st.session_state.dialogue_state = DialogueState()
 
+    # Vùng lịch sử được tạo trước ô nhập để hiển thị phía trên, nhưng được vẽ sau khi đã nhận tin nhắn mới
+    history_box = st.container()
     user_input = st.chat_input("Nhập câu hỏi của bạn...")
 
     if user_input:
-        bot_response = detect_intent_texts(user_input)
-        st.session_state.history.append((user_input, bot_response))
-        st.rerun()
-
+        dialogue_state = _get_dialogue_state()
+        query = dialogue_state.resolve(route_message(user_input))
+        pending = get_chat_pipeline().submit(user_input, st.session_state.session_id, query, dialogue_state)
+        st.session_state.history.append((user_input, pending))
+        st.session_state.pending_turns.add(len(st.session_state.history) - 1)
 
+    with history_box:
+        # Không chờ trong lần chạy này: câu đã xong được vẽ ngay, câu còn chờ tự cập nhật trong fragment riêng
+        finished = collect_finished_replies(st.session_state.history, st.session_state.pending_turns)
+        render_history(st.session_state.history, stream_indices=finished)
+        _render_chatbot_stats()
 
+def _render_chatbot_stats():
+    """Thống kê hiệu năng của chatbot trong process hiện tại"""
+    nlu_stats = get_nlu().get_stats()
+    if not nlu_stats["requests"]:
+        return
+    cache_stats = get_response_cache().get_stats()
+    with st.expander("Thống kê chatbot", expanded=False):
+        st.caption(
+            f"NLU cục bộ: {nlu_stats['local_hits']}/{nlu_stats['requests']} câu trả lời tại chỗ "
+            f"({nlu_stats['local_hit_rate']:.0%}), TB {nlu_stats['avg_local_ms']:.1f} ms so với "
+            f"{nlu_stats['avg_remote_ms']:.0f} ms khi gọi Dialogflow; tiết kiệm ước tính {nlu_stats['saved_ms'] / 1000:.1f} s."
+        )
+        st.caption(
+            f"Cache câu trả lời: {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']} lần trúng "
+            f"({cache_stats['hit_rate']:.0%}, {cache_stats['sqlite_hits']} từ SQLite), "
+            f"{cache_stats['entries']} mục, {cache_stats['evictions']} mục bị loại."
+        )
+        client, _ = get_dialogflow_client()
+        if client is not None:
+            client_stats = client.get_stats()
+            st.caption(
+                f"Dialogflow: {client_stats['calls']} lời gọi, p50 ≤ {client_stats['p50_ms']:.0f} ms, "
+                f"p95 ≤ {client_stats['p95_ms']:.0f} ms, {client_stats['retries']} lần thử lại, "
+                f"{client_stats['failures']} lỗi; circuit breaker: {client_stats['breaker_state']} "
+                f"({client_stats['rejected']} câu trả lời tại chỗ khi mạch mở, {nlu_stats['fallbacks']} lần dự phòng)."
+            )
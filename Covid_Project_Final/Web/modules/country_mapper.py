@@ -5,17 +5,29 @@ import numpy as np
 from pathlib import Path
 from sklearn.preprocessing import LabelEncoder
 import re
+from .text_normalization import build_trie_pattern
+
+_WORD_CHAR = re.compile(r'\w')
 
 class CountryMapper:
     """Class để mapping quốc gia với model embedding một cách thông minh"""
     
-    def __init__(self, data_path=None):
+    def __init__(self, data_path=None, data=None, label_encoder=None):
         self.data = None
         self.country_mapping = {}
         self.supported_countries = []
         self.country_aliases = {}
-        self.label_encoder = LabelEncoder()
-        self.load_data(data_path)
+        # label_encoder: encoder đã lưu khi huấn luyện (model bundle); None thì fit mới trên dữ liệu
+        self.pretrained_encoder = label_encoder is not None
+        self.label_encoder = label_encoder if label_encoder is not None else LabelEncoder()
+        self._country_lookup = {}
+        self._country_matcher = None
+        self._alias_matcher = None
+        if data is not None:
+            # Dùng DataFrame đã tải sẵn (vd. bản dùng chung của CovidPredictionService)
+            self.data = data
+        else:
+            self.load_data(data_path)
         self.setup_country_mapping()
         self.setup_aliases()
     
@@ -37,13 +49,18 @@ class CountryMapper:
         
         # Lấy tất cả các quốc gia duy nhất từ cột 'location'
         all_countries = sorted(self.data["location"].unique().tolist())
-        self.supported_countries = all_countries
-        
-        # Fit LabelEncoder với tất cả các quốc gia
-        self.label_encoder.fit(self.supported_countries)
+        if self.pretrained_encoder:
+            # Chỉ hỗ trợ các quốc gia mà mô hình đã học embedding
+            known = set(self.label_encoder.classes_)
+            self.supported_countries = [country for country in all_countries if country in known]
+        else:
+            # Fit LabelEncoder với tất cả các quốc gia
+            self.supported_countries = all_countries
+            self.label_encoder.fit(self.supported_countries)
         
-        # Tạo mapping từ tên quốc gia sang ID (chỉ số của LabelEncoder)
-        self.country_mapping = {country: self.label_encoder.transform([country])[0] for country in self.supported_countries}
+        # Tạo mapping từ tên quốc gia sang ID (chỉ số của LabelEncoder) bằng một lần transform cho cả danh sách
+        ids = self.label_encoder.transform(self.supported_countries) if self.supported_countries else []
+        self.country_mapping = dict(zip(self.supported_countries, (int(i) for i in ids)))
         
         print(f"CountryMapper đã được thiết lập với {len(self.supported_countries)} quốc gia.")
     
@@ -81,27 +98,54 @@ class CountryMapper:
         # Thêm các alias tự động từ tên quốc gia nếu cần
         for country in self.supported_countries:
             self.country_aliases[country.lower()] = country
+        self._compile_country_patterns()
+
+    @staticmethod
+    def _compile_names(lookup):
+        """Chuẩn bị (regex, thứ hạng, tiền tố) cho bảng tên -> quốc gia, thứ hạng theo thứ tự của bảng.
+
+        Regex dạng trie bọc trong lookahead để quét cả các khớp chồng lấn; tại mỗi vị trí nó chỉ trả về tên
+        dài nhất, nên các tên ngắn hơn là tiền tố của nó (kết thúc ở ranh giới từ) được liệt kê sẵn.
+        """
+        if not lookup:
+            return None
+        rank = {name: i for i, name in enumerate(lookup)}
+        prefixes = {
+            name: [name[:end] for end in range(1, len(name))
+                   if name[:end] in rank and bool(_WORD_CHAR.match(name[end - 1])) != bool(_WORD_CHAR.match(name[end]))]
+            for name in lookup
+        }
+        pattern = re.compile(r'(?=\b(' + build_trie_pattern(lookup) + r')\b)')
+        return pattern, rank, prefixes
+
+    def _compile_country_patterns(self):
+        self._country_lookup = {}
+        for country in self.supported_countries:
+            self._country_lookup.setdefault(country.lower(), country)
+        self._country_matcher = self._compile_names(self._country_lookup)
+        self._alias_matcher = self._compile_names(self.country_aliases)
 
     def find_country(self, text):
         """Tìm quốc gia từ text input"""
-        text_lower = text.lower().strip()
-        
-        # Ưu tiên tìm kiếm khớp chính xác với tên quốc gia được hỗ trợ
-        for country in self.supported_countries:
-            if country.lower() in text_lower:
-                # Kiểm tra nếu tên quốc gia là một từ riêng biệt hoặc được bao quanh bởi khoảng trắng/dấu câu
-                pattern = r'\b' + re.escape(country.lower()) + r'\b'
-                if re.search(pattern, text_lower):
-                    return country
-        
-        # Sau đó kiểm tra aliases
-        for alias, country in self.country_aliases.items():
-            if alias in text_lower:
-                # Kiểm tra nếu alias là một từ riêng biệt hoặc được bao quanh bởi khoảng trắng/dấu câu
-                pattern = r'\b' + re.escape(alias) + r'\b'
-                if re.search(pattern, text_lower):
-                    return country
-        
+        return self.find_country_in_lowered(text.lower().strip())
+
+    def find_country_in_lowered(self, text_lower):
+        """Tìm quốc gia trong text đã chuyển chữ thường bằng hai regex biên dịch sẵn (tên chính thức trước, alias sau).
+
+        Khi câu nhắc nhiều quốc gia, kết quả giống cách quét cũ: tên đứng trước trong danh sách quốc gia
+        (hoặc alias khai báo trước) được chọn, không phải tên xuất hiện trước trong câu.
+        """
+        for matcher, lookup in ((self._country_matcher, self._country_lookup), (self._alias_matcher, self.country_aliases)):
+            if matcher is None:
+                continue
+            pattern, rank, prefixes = matcher
+            found = set()
+            for match in pattern.finditer(text_lower):
+                name = match.group(1)
+                found.add(name)
+                found.update(prefixes[name])
+            if found:
+                return lookup[min(found, key=rank.__getitem__)]
         return None
     
     def get_country_id(self, country):
@@ -1,24 +1,105 @@
+import os
+import numpy as np
 import pandas as pd
 import streamlit as st
 from pathlib import Path
+from .shared_dataset import load_shared_frame, source_fingerprint
+
+# Đặt COVID_DATASET_STRICT=1 để kiểm tra cả nội dung (hash) dữ liệu dùng chung ở mỗi lần rerun (chậm, dùng khi debug)
+STRICT_MUTATION_CHECK = os.environ.get("COVID_DATASET_STRICT") == "1"
+DASHBOARD_DATA_PATH = Path(__file__).parent.parent / "data" / "covid_cleaned_country_data.csv"
+
+def _read_dashboard_csv(data_path):
+    df = pd.read_csv(data_path)
+    df["date"] = pd.to_datetime(df["date"])
+
+    # Tính toán các metrics bổ sung
+    df["case_fatality_rate"] = (df["total_deaths"] / df["total_cases"] * 100).fillna(0)
+    df["vaccination_rate"] = df["people_fully_vaccinated_per_hundred"].fillna(0)
+    df["cases_per_million"] = df["total_cases_per_million"].fillna(0)
+    df["new_cases_per_million"] = df["new_cases_per_million"].fillna(0)
+
+    df.replace([float('inf'), float('-inf')], 0, inplace=True)
+    return df
 
-@st.cache_data(ttl=3600)
 def load_data():
-    """Tải và xử lý dữ liệu COVID-19"""
+    """Tải và xử lý dữ liệu COVID-19 (dùng chung qua file Arrow memory-map khi bật COVID_SHARED_DATASET_DIR)"""
+    data_path = DASHBOARD_DATA_PATH
     try:
-        data_path = Path(__file__).parent.parent / "data" / "covid_cleaned_country_data.csv"
-        df = pd.read_csv(data_path)
-        df["date"] = pd.to_datetime(df["date"])
-        
-        # Tính toán các metrics bổ sung
-        df["case_fatality_rate"] = (df["total_deaths"] / df["total_cases"] * 100).fillna(0)
-        df["vaccination_rate"] = df["people_fully_vaccinated_per_hundred"].fillna(0)
-        df["cases_per_million"] = df["total_cases_per_million"].fillna(0)
-        df["new_cases_per_million"] = df["new_cases_per_million"].fillna(0)
-        
-        df.replace([float('inf'), float('-inf')], 0, inplace=True)
-        
-        return df
+        return load_shared_frame("dashboard", data_path, lambda: _read_dashboard_csv(data_path))
     except FileNotFoundError:
         st.error(f"Không tìm thấy tệp dữ liệu tại: {data_path}. Vui lòng đảm bảo file có tên đúng và nằm trong thư mục data/.")
         return None
+
+class DatasetMutationError(RuntimeError):
+    """DataFrame dùng chung đã bị sửa trực tiếp (thêm/xóa cột, đổi kiểu hoặc nội dung)"""
+
+def freeze_frame(df):
+    """Dựng lại DataFrame từ view chỉ đọc của từng cột (không sao chép dữ liệu, chỉ dùng API công khai): ghi trực tiếp
+    (df.loc[...] = ..., fillna(inplace=True)...) sẽ báo lỗi ngay thay vì âm thầm sửa dữ liệu của mọi phiên.
+    Các phép lọc/biến đổi trả về bản sao vẫn dùng bình thường. Cột kiểu extension (chuỗi, Arrow...) giữ nguyên."""
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, np.dtype):
+            values = series.to_numpy().view()
+            values.setflags(write=False)
+            columns[column] = values
+        else:
+            columns[column] = series
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+class DatasetHandle:
+    """Dataset dùng chung, chỉ đọc, một bản cho mỗi process; mọi tab dùng chung `frame` thay vì bản sao riêng.
+
+    `check_unchanged()` phát hiện thay đổi cấu trúc (cột, số dòng, kiểu) mà cờ chỉ đọc không chặn được,
+    và cả nội dung khi bật STRICT_MUTATION_CHECK.
+    """
+
+    def __init__(self, df, version=None, strict=STRICT_MUTATION_CHECK):
+        self.frame = freeze_frame(df)
+        # Với Copy-on-Write (mặc định từ pandas 3), ghi vào cột đang có tham chiếu khác không báo lỗi mà thay cột bằng
+        # bản sao: giữ lại mảng gốc để check_unchanged() phát hiện cột bị thay
+        self._buffers = {column: self.frame[column].to_numpy() for column in self.frame.columns
+                         if isinstance(self.frame[column].dtype, np.dtype)}
+        # Khóa cache của mọi bảng/biểu đồ dựng từ dataset này: tính một lần khi tải, các tab nhận lại giá trị này
+        self.version = version or compute_dataset_version(df)
+        self.strict = strict
+        self._signature = self._structure_signature()
+        self._content_hash = self._compute_content_hash() if strict else None
+
+    def _structure_signature(self):
+        return tuple(self.frame.columns), self.frame.shape, tuple(map(str, self.frame.dtypes))
+
+    def _compute_content_hash(self):
+        return int(pd.util.hash_pandas_object(self.frame, index=False).sum())
+
+    def check_unchanged(self):
+        if self._structure_signature() != self._signature:
+            raise DatasetMutationError("Dataset dùng chung đã bị thay đổi cấu trúc (cột/số dòng/kiểu dữ liệu). Hãy làm việc trên bản sao.")
+        replaced = [column for column, buffer in self._buffers.items()
+                    if not np.may_share_memory(self.frame[column].to_numpy(), buffer)]
+        if replaced:
+            raise DatasetMutationError(f"Cột {replaced} của dataset dùng chung đã bị ghi đè. Hãy làm việc trên bản sao.")
+        if self.strict and self._compute_content_hash() != self._content_hash:
+            raise DatasetMutationError("Nội dung dataset dùng chung đã bị thay đổi. Hãy làm việc trên bản sao.")
+
+@st.cache_resource(ttl=3600, show_spinner="Đang tải dữ liệu...")
+def get_dataset():
+    """Dataset dùng chung cho mọi phiên (cache_resource: không pickle/unpickle, không sao chép ở mỗi lần rerun); None nếu lỗi"""
+    df = load_data()
+    if df is None:
+        return None
+    return DatasetHandle(df, compute_dataset_version(df, DASHBOARD_DATA_PATH))
+
+def compute_dataset_version(df, source_path=None):
+    """Khóa phiên bản của dữ liệu, tính một lần khi tải (không gọi ở mỗi lần rerun): fingerprint file nguồn
+    (đường dẫn, kích thước, thời điểm sửa) nếu có, nếu không thì hash toàn bộ nội dung"""
+    if df is None or df.empty:
+        return "empty"
+    if source_path is not None:
+        try:
+            return f"file-{source_fingerprint(source_path)}"
+        except OSError:
+            pass
+    return f"content-{int(pd.util.hash_pandas_object(df, index=False).sum()) & (2**64 - 1):016x}"
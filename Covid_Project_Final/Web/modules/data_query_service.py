@@ -1,25 +1,54 @@
 import pandas as pd
+import streamlit as st
 from pathlib import Path
 from datetime import datetime
 import numpy as np
+from .data_processing import compute_dataset_version
+from .date_index import CountryDateIndex, day_number_to_date
+from .shared_dataset import load_shared_frame
+
+# Các trường số liệu trả về dạng có cấu trúc (API HTTP)
+RECORD_FIELDS = ["total_cases", "new_cases", "total_deaths", "new_deaths", "people_fully_vaccinated"]
+
+def _record_value(value):
+    """Giá trị JSON được: NaN/thiếu -> None"""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
 
 class DataQueryService:
     def __init__(self, data_path=None):
         self.data = None
+        self.snapshot_version = None
+        self.data_version = None
+        self.latest_by_country = {}
+        self.country_summaries = {}
+        self.country_records = {}
+        self.overview_response = None
+        self.overview_record = None
+        self.latest_frame = None
+        self.date_index = None
         self.load_data(data_path)
 
+    @staticmethod
+    def _read_data(data_path):
+        data = pd.read_csv(data_path)
+        # Cải thiện việc xử lý ngày tháng
+        data["date"] = pd.to_datetime(data["date"], errors='coerce')
+        # Loại bỏ các dòng có ngày không hợp lệ
+        data = data.dropna(subset=['date'])
+        # Chuẩn hóa timezone về UTC
+        if data["date"].dt.tz is not None:
+            data["date"] = data["date"].dt.tz_convert('UTC').dt.tz_localize(None)
+        return data
+
     def load_data(self, data_path=None):
         if data_path is None:
             data_path = Path(__file__).parent.parent / "data" / "Covid19_cleaned_to_model.csv"
         try:
-            self.data = pd.read_csv(data_path)
-            # Cải thiện việc xử lý ngày tháng
-            self.data["date"] = pd.to_datetime(self.data["date"], errors='coerce')
-            # Loại bỏ các dòng có ngày không hợp lệ
-            self.data = self.data.dropna(subset=['date'])
-            # Chuẩn hóa timezone về UTC
-            if self.data["date"].dt.tz is not None:
-                self.data["date"] = self.data["date"].dt.tz_convert('UTC').dt.tz_localize(None)
+            # Khi bật COVID_SHARED_DATASET_DIR, các process cùng máy dùng chung một bản memory-map
+            self.data = load_shared_frame("data_query", data_path, lambda: self._read_data(data_path))
+            self.data_version = compute_dataset_version(self.data, data_path)
             
             print(f"Đã tải {len(self.data)} bản ghi.")
             print(f"Khoảng thời gian dữ liệu: {self.data['date'].min()} đến {self.data['date'].max()}")
@@ -27,6 +56,87 @@ class DataQueryService:
             print("Dữ liệu COVID đã được tải vào DataQueryService.")
         except Exception as e:
             print(f"Lỗi khi tải dữ liệu vào DataQueryService: {e}")
+        self.refresh_snapshot()
+
+    def refresh_snapshot(self, force=False):
+        """Dựng bảng snapshot (hàng mới nhất mỗi quốc gia + tổng toàn cầu) và câu trả lời dựng sẵn; chỉ dựng lại khi dữ liệu đổi"""
+        if self.data is None or self.data.empty:
+            self.snapshot_version = None
+            self.latest_by_country, self.country_summaries, self.overview_response = {}, {}, None
+            self.country_records = {}
+            self.overview_record, self.latest_frame, self.date_index = None, None, None
+            return
+
+        version = self.data_version or compute_dataset_version(self.data)
+        if not force and version == self.snapshot_version:
+            return
+
+        # Ngày trùng lặp: giữ hàng xuất hiện trước trong dữ liệu, như `country_data[date == max].iloc[0]` trước đây
+        latest_rows = self.data.sort_values("date", ascending=False, kind="stable").groupby("location", sort=False).head(1)
+        self.latest_by_country = {
+            row["location"].lower(): row for _, row in latest_rows.iterrows()
+        }
+        self.country_summaries = {
+            key: self._format_data_row(
+                row, f"Dữ liệu COVID-19 mới nhất cho {row['location']} đến ngày {row['date'].strftime('%d/%m/%Y')}:\n"
+            )
+            for key, row in self.latest_by_country.items()
+        }
+        self.country_records = {key: self._row_record(row) for key, row in self.latest_by_country.items()}
+        self.latest_frame = latest_rows[["location", "date"] + [c for c in RECORD_FIELDS if c in latest_rows.columns]] \
+            .sort_values("location").reset_index(drop=True)
+        self.overview_record = self._build_overview_record()
+        self.overview_response = self._build_overview_response()
+        self.date_index = CountryDateIndex(self.data)
+        self.snapshot_version = version
+
+    def _build_overview_record(self):
+        latest_date = self.data["date"].max()
+        latest_data = self.data[self.data['date'] == latest_date]
+        
+        # Xử lý NaN values
+        return {
+            "date": latest_date.date().isoformat(),
+            "total_cases": float(latest_data["total_cases"].fillna(0).sum()),
+            "total_deaths": float(latest_data["total_deaths"].fillna(0).sum()),
+            "total_vaccinated": float(latest_data["people_fully_vaccinated"].fillna(0).sum()),
+            "countries": int(len(latest_data)),
+        }
+
+    def _build_overview_response(self):
+        record = self.overview_record
+        latest_date = pd.Timestamp(record["date"])
+        response = f"Dữ liệu COVID-19 tổng quan đến ngày {latest_date.strftime('%d/%m/%Y')}:\n"
+        response += f"- Tổng số ca nhiễm: {record['total_cases']:,.0f}\n"
+        response += f"- Tổng số ca tử vong: {record['total_deaths']:,.0f}\n"
+        response += f"- Tổng số người được tiêm chủng đầy đủ: {record['total_vaccinated']:,.0f}\n"
+        response += f"- Số quốc gia/vùng lãnh thổ có dữ liệu: {record['countries']}\n"
+        return response
+
+    @staticmethod
+    def _row_record(data_row):
+        """Một hàng dữ liệu quốc gia dạng dict (cho API)"""
+        record = {"location": data_row["location"], "date": data_row["date"].date().isoformat()}
+        for field in RECORD_FIELDS:
+            record[field] = _record_value(data_row.get(field))
+        return record
+
+    @staticmethod
+    def _format_data_row(data_row, header):
+        """Định dạng một hàng dữ liệu quốc gia thành câu trả lời"""
+        response = header
+        response += f"- Tổng số ca nhiễm: {data_row.get('total_cases', 0):,.0f}\n"
+        response += f"- Ca nhiễm mới: {data_row.get('new_cases', 0):,.0f}\n"
+        response += f"- Tổng số ca tử vong: {data_row.get('total_deaths', 0):,.0f}\n"
+        response += f"- Ca tử vong mới: {data_row.get('new_deaths', 0):,.0f}\n"
+        
+        # Xử lý dữ liệu vaccination có thể null
+        vaccination_data = data_row.get('people_fully_vaccinated', 0)
+        if pd.isna(vaccination_data):
+            response += f"- Số người được tiêm chủng đầy đủ: Chưa có dữ liệu\n"
+        else:
+            response += f"- Số người được tiêm chủng đầy đủ: {vaccination_data:,.0f}\n"
+        return response
 
     def _normalize_date(self, date_input):
         """Chuẩn hóa ngày đầu vào thành datetime object"""
@@ -53,9 +163,9 @@ class DataQueryService:
             return None
         try:
             if country:
-                country_data = self.data[self.data["location"].str.lower() == country.lower()]
-                if not country_data.empty:
-                    return country_data["date"].max().date()
+                latest_row = self.latest_by_country.get(country.lower())
+                if latest_row is not None:
+                    return latest_row["date"].date()
                 else:
                     return None
             return self.data["date"].max().date()
@@ -67,33 +177,16 @@ class DataQueryService:
         if self.data is None or self.data.empty:
             return "Không có dữ liệu để hiển thị tổng quan."
         
-        try:
-            latest_date = self.data["date"].max()
-            latest_data = self.data[self.data['date'] == latest_date]
-            
-            # Xử lý NaN values
-            total_cases = latest_data["total_cases"].fillna(0).sum()
-            total_deaths = latest_data["total_deaths"].fillna(0).sum()
-            total_vaccinated = latest_data["people_fully_vaccinated"].fillna(0).sum()
-            
-            response = f"Dữ liệu COVID-19 tổng quan đến ngày {latest_date.strftime('%d/%m/%Y')}:\n"
-            response += f"- Tổng số ca nhiễm: {total_cases:,.0f}\n"
-            response += f"- Tổng số ca tử vong: {total_deaths:,.0f}\n"
-            response += f"- Tổng số người được tiêm chủng đầy đủ: {total_vaccinated:,.0f}\n"
-            response += f"- Số quốc gia/vùng lãnh thổ có dữ liệu: {len(latest_data)}\n"
-            
-            return response
-        except Exception as e:
-            return f"Lỗi khi lấy dữ liệu tổng quan: {e}"
+        return self.overview_response
 
     def get_country_data_summary(self, country):
         if self.data is None or self.data.empty:
             return "Không có dữ liệu để hiển thị."
         
         try:
-            # Tìm kiếm không phân biệt hoa thường
-            country_data = self.data[self.data["location"].str.lower() == country.lower()]
-            if country_data.empty:
+            # Tìm kiếm không phân biệt hoa thường trong bảng snapshot
+            summary = self.country_summaries.get(country.lower())
+            if summary is None:
                 # Thử tìm kiếm gần đúng
                 similar_countries = self.data[self.data["location"].str.contains(country, case=False, na=False)]
                 if not similar_countries.empty:
@@ -101,35 +194,40 @@ class DataQueryService:
                     return f"Không tìm thấy '{country}'. Có thể bạn muốn tìm: {', '.join(available_countries)}"
                 return f"Không tìm thấy dữ liệu cho '{country}'."
             
-            latest_date = country_data["date"].max()
-            latest_country_data = country_data[country_data["date"] == latest_date].iloc[0]
-            
-            response = f"Dữ liệu COVID-19 mới nhất cho {latest_country_data['location']} đến ngày {latest_date.strftime('%d/%m/%Y')}:\n"
-            response += f"- Tổng số ca nhiễm: {latest_country_data.get('total_cases', 0):,.0f}\n"
-            response += f"- Ca nhiễm mới: {latest_country_data.get('new_cases', 0):,.0f}\n"
-            response += f"- Tổng số ca tử vong: {latest_country_data.get('total_deaths', 0):,.0f}\n"
-            response += f"- Ca tử vong mới: {latest_country_data.get('new_deaths', 0):,.0f}\n"
-            
-            # Xử lý dữ liệu vaccination có thể null
-            vaccination_data = latest_country_data.get('people_fully_vaccinated', 0)
-            if pd.isna(vaccination_data):
-                response += f"- Số người được tiêm chủng đầy đủ: Chưa có dữ liệu\n"
-            else:
-                response += f"- Số người được tiêm chủng đầy đủ: {vaccination_data:,.0f}\n"
-            
-            return response
+            return summary
             
         except Exception as e:
             return f"Lỗi khi lấy dữ liệu cho {country}: {e}"
 
+    def get_country_record(self, country):
+        """Hàng mới nhất của quốc gia dạng dict; None nếu không có"""
+        return self.country_records.get(country.lower())
+
+    def get_record_by_date(self, country, target_date):
+        """(dict của hàng khớp hoặc gần nhất, khớp chính xác?); (None, False) nếu không có quốc gia hoặc ngày không hợp lệ"""
+        if self.date_index is None:
+            return None, False
+        normalized_date = self._normalize_date(target_date)
+        if normalized_date is None or pd.isna(normalized_date):
+            return None, False
+        position, exact = self.date_index.lookup(country, normalized_date)
+        if position is None:
+            return None, False
+        return self._row_record(self.data.iloc[position]), exact
+
+    def suggest_countries(self, country, limit=5):
+        if self.data is None or self.data.empty:
+            return []
+        similar_countries = self.data[self.data["location"].str.contains(country, case=False, na=False, regex=False)]
+        return similar_countries["location"].unique()[:limit].tolist()
+
     def get_data_by_date_and_country(self, country, target_date):
         if self.data is None or self.data.empty:
             return "Không có dữ liệu để hiển thị."
         
         try:
             # Chuẩn hóa tên quốc gia
-            country_data = self.data[self.data["location"].str.lower() == country.lower()]
-            if country_data.empty:
+            if country not in self.date_index:
                 similar_countries = self.data[self.data["location"].str.contains(country, case=False, na=False)]
                 if not similar_countries.empty:
                     available_countries = similar_countries["location"].unique()[:3]
@@ -141,30 +239,18 @@ class DataQueryService:
             if normalized_date is None:
                 return f"Định dạng ngày '{target_date}' không hợp lệ. Vui lòng sử dụng YYYY-MM-DD, DD/MM/YYYY hoặc MM/DD/YYYY."
 
-            # Tìm dữ liệu cho ngày cụ thể
-            specific_date_data = country_data[country_data["date"].dt.date == normalized_date.date()]
+            # Tìm ngày khớp chính xác hoặc gần nhất bằng tìm kiếm nhị phân trên chỉ mục ngày của quốc gia
+            position, exact = self.date_index.lookup(country, normalized_date)
+            data_row = self.data.iloc[position]
             
-            if not specific_date_data.empty:
-                data_row = specific_date_data.iloc[0]
+            if exact:
                 country_name = data_row['location']
                 
-                response = f"Dữ liệu COVID-19 cho {country_name} vào ngày {normalized_date.strftime('%d/%m/%Y')}:\n"
-                response += f"- Tổng số ca nhiễm: {data_row.get('total_cases', 0):,.0f}\n"
-                response += f"- Ca nhiễm mới: {data_row.get('new_cases', 0):,.0f}\n"
-                response += f"- Tổng số ca tử vong: {data_row.get('total_deaths', 0):,.0f}\n"
-                response += f"- Ca tử vong mới: {data_row.get('new_deaths', 0):,.0f}\n"
-                
-                vaccination_data = data_row.get('people_fully_vaccinated', 0)
-                if pd.isna(vaccination_data):
-                    response += f"- Số người được tiêm chủng đầy đủ: Chưa có dữ liệu\n"
-                else:
-                    response += f"- Số người được tiêm chủng đầy đủ: {vaccination_data:,.0f}\n"
-                
-                return response
+                return self._format_data_row(
+                    data_row, f"Dữ liệu COVID-19 cho {country_name} vào ngày {normalized_date.strftime('%d/%m/%Y')}:\n"
+                )
             else:
-                # Tìm ngày gần nhất có dữ liệu
-                available_dates = country_data["date"].dt.date.unique()
-                closest_date = min(available_dates, key=lambda x: abs((x - normalized_date.date()).days))
+                closest_date = data_row["date"]
                 
                 return f"Không có dữ liệu cho {country} vào ngày {normalized_date.strftime('%d/%m/%Y')}.\n" \
                        f"Ngày gần nhất có dữ liệu: {closest_date.strftime('%d/%m/%Y')}"
@@ -183,16 +269,17 @@ class DataQueryService:
         if self.data is None or self.data.empty:
             return None
         
-        country_data = self.data[self.data["location"].str.lower() == country.lower()]
-        if country_data.empty:
+        days = self.date_index.country_days(country) if self.date_index else None
+        if days is None or len(days) == 0:
             return None
             
         return {
-            'min_date': country_data["date"].min().date(),
-            'max_date': country_data["date"].max().date(),
-            'total_records': len(country_data)
+            'min_date': day_number_to_date(days[0]),
+            'max_date': day_number_to_date(days[-1]),
+            'total_records': len(days)
         }
 
-# Khởi tạo service toàn cục
+# Khởi tạo service toàn cục (một lần cho mỗi process, giống get_prediction_service)
+@st.cache_resource
 def get_data_query_service():
     return DataQueryService()
\ No newline at end of file
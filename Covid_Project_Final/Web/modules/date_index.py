@@ -0,0 +1,99 @@
+# modules/date_index.py
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+def to_day_number(value):
+    """Chuyển date/datetime/chuỗi/Timestamp thành số ngày kể từ 1970-01-01 (int64)"""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return np.datetime64(value, "D").astype(np.int64)
+    return np.datetime64(pd.Timestamp(value).normalize().date(), "D").astype(np.int64)
+
+
+def day_number_to_date(day_number):
+    return np.datetime64(int(day_number), "D").astype(date)
+
+
+class CountryDateIndex:
+    """Chỉ mục ngày đã sắp xếp theo từng quốc gia trên mảng int64 (số ngày), tra cứu O(log n) bằng np.searchsorted.
+
+    Vị trí trả về là vị trí hàng (iloc) trong DataFrame gốc.
+    """
+
+    def __init__(self, data, location_col="location", date_col="date"):
+        locations = data[location_col].str.lower().to_numpy()
+        day_numbers = data[date_col].to_numpy().astype("datetime64[D]").astype(np.int64)
+        location_codes, uniques = pd.factorize(locations)
+
+        order = np.lexsort((day_numbers, location_codes))
+        self.positions = order
+        self.day_numbers = day_numbers[order]
+
+        sorted_codes = location_codes[order]
+        starts = np.searchsorted(sorted_codes, np.arange(len(uniques)), side="left")
+        ends = np.searchsorted(sorted_codes, np.arange(len(uniques)), side="right")
+        self.bounds = {country: (int(s), int(e)) for country, s, e in zip(uniques, starts, ends)}
+
+    def __contains__(self, country):
+        return country.lower() in self.bounds
+
+    def country_positions(self, country):
+        """Vị trí các hàng của quốc gia, theo thứ tự ngày tăng dần (None nếu không có)"""
+        bounds = self.bounds.get(country.lower())
+        if bounds is None:
+            return None
+        return self.positions[bounds[0]:bounds[1]]
+
+    def country_days(self, country):
+        bounds = self.bounds.get(country.lower())
+        if bounds is None:
+            return None
+        return self.day_numbers[bounds[0]:bounds[1]]
+
+    def latest_position(self, country):
+        """Vị trí hàng của ngày mới nhất; ngày trùng lặp thì lấy hàng xuất hiện trước trong DataFrame"""
+        bounds = self.bounds.get(country.lower())
+        if bounds is None or bounds[0] == bounds[1]:
+            return None
+        start, end = bounds
+        days = self.day_numbers[start:end]
+        return int(self.positions[start + int(np.searchsorted(days, days[-1], side="left"))])
+
+    def lookup(self, country, target_date):
+        """Trả về (vị trí hàng, khớp chính xác?) cho ngày khớp hoặc ngày gần nhất; (None, False) nếu không có quốc gia.
+
+        Khi hai ngày cách đều ngày cần tìm thì chọn ngày sớm hơn; ngày trùng lặp thì lấy hàng xuất hiện trước.
+        """
+        bounds = self.bounds.get(country.lower())
+        if bounds is None or bounds[0] == bounds[1]:
+            return None, False
+        start, end = bounds
+        days = self.day_numbers[start:end]
+        target = to_day_number(target_date)
+
+        i = int(np.searchsorted(days, target, side="left"))
+        if i < len(days) and days[i] == target:
+            return int(self.positions[start + i]), True
+        if i == 0:
+            nearest = 0
+        elif i == len(days):
+            nearest = len(days) - 1
+        else:
+            nearest = i - 1 if target - days[i - 1] <= days[i] - target else i
+        nearest = int(np.searchsorted(days, days[nearest], side="left"))  # hàng đầu tiên của ngày đó
+        return int(self.positions[start + nearest]), False
+
+    def lookup_range(self, country, start_date, end_date):
+        """Vị trí các hàng của quốc gia trong [start_date, end_date] (một lát cắt, không lọc toàn bảng)"""
+        bounds = self.bounds.get(country.lower())
+        if bounds is None:
+            return None
+        start, end = bounds
+        days = self.day_numbers[start:end]
+        lo = np.searchsorted(days, to_day_number(start_date), side="left")
+        hi = np.searchsorted(days, to_day_number(end_date), side="right")
+        return self.positions[start + lo:start + hi]
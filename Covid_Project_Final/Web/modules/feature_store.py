@@ -0,0 +1,137 @@
+# modules/feature_store.py
+import numpy as np
+import pyarrow as pa
+
+from .shared_dataset import SHARED_DATASET_DIR, attach_or_build, read_arrow_table, source_fingerprint, write_arrow_table
+
+# Cột nguồn -> cột đặc trưng đã scale (khóa của dict scalers giống lúc huấn luyện)
+SCALED_FEATURES = {
+    "stringency_index": "stringency_scaled",
+    "people_fully_vaccinated_per_hundred": "vaccinated_scaled",
+}
+
+
+def compute_feature_matrix(data, scalers, features):
+    """Ma trận đặc trưng (số hàng của data, len(features)) float32 cho toàn bộ dữ liệu:
+    mỗi scaler chỉ transform một lần trên cả cột, NaN/thiếu cột -> 0 (như khi chuẩn bị từng cửa sổ trước đây)"""
+    columns = {}
+    for source, target in SCALED_FEATURES.items():
+        if source in scalers and source in data.columns:
+            columns[target] = scalers[source].transform(data[[source]]).ravel()
+    matrix = np.zeros((len(data), len(features)), dtype=np.float32)
+    for i, feature in enumerate(features):
+        values = columns.get(feature)
+        if values is None and feature in data.columns:
+            values = data[feature].to_numpy(dtype=np.float64, na_value=np.nan)
+        if values is not None:
+            matrix[:, i] = np.nan_to_num(values, nan=0.0)
+    return matrix
+
+
+class FeatureStore:
+    """Đặc trưng đầu vào mô hình dựng sẵn lúc tải: các hàng xếp theo (quốc gia, ngày) trong một mảng float32 liên tục,
+    nên mảng (số ngày, số feature) của mỗi quốc gia là một lát cắt liên tục; lấy cửa sổ đầu vào chỉ là cắt mảng."""
+
+    def __init__(self, features, countries, day_numbers, values):
+        self.features = list(features)
+        self.day_numbers = day_numbers
+        self.values = values
+        # countries: mảng tên quốc gia (chữ thường) theo từng hàng, đã gom liền theo quốc gia
+        self.bounds = {}
+        if len(countries):
+            starts = np.flatnonzero(np.r_[True, countries[1:] != countries[:-1]])
+            ends = np.r_[starts[1:], len(countries)]
+            self.bounds = {countries[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    @classmethod
+    def build(cls, data, scalers, features, date_index):
+        """Dựng từ DataFrame và CountryDateIndex (thứ tự hàng theo quốc gia rồi ngày tăng dần)"""
+        matrix = compute_feature_matrix(data, scalers, features)
+        order = date_index.positions
+        countries = np.empty(len(order), dtype=object)
+        for country, (start, end) in date_index.bounds.items():
+            countries[start:end] = country
+        return cls(features, countries, date_index.day_numbers, np.ascontiguousarray(matrix[order]))
+
+    def __contains__(self, country):
+        return country.lower() in self.bounds
+
+    def country_days(self, country):
+        bounds = self.bounds.get(country.lower())
+        return None if bounds is None else self.day_numbers[bounds[0]:bounds[1]]
+
+    def country_values(self, country):
+        """Mảng (số ngày, số feature) của quốc gia (view, không sao chép)"""
+        bounds = self.bounds.get(country.lower())
+        return None if bounds is None else self.values[bounds[0]:bounds[1]]
+
+    def last_day_before(self, country, end_day):
+        """Ngày có dữ liệu gần nhất trước `end_day` (số ngày); None nếu không có"""
+        days = self.country_days(country)
+        if days is None:
+            return None
+        i = int(np.searchsorted(days, end_day, side="left"))
+        return int(days[i - 1]) if i else None
+
+    def window(self, country, end_day, length):
+        """`length` ngày có dữ liệu cuối cùng trước ngày `end_day` (số ngày, không tính end_day).
+
+        Trả về (mảng (length, số feature), số ngày có sẵn); mảng là None nếu không đủ dữ liệu hoặc không có quốc gia.
+        """
+        bounds = self.bounds.get(country.lower())
+        if bounds is None:
+            return None, 0
+        start, end = bounds
+        hi = start + int(np.searchsorted(self.day_numbers[start:end], end_day, side="left"))
+        available = hi - start
+        if available < length:
+            return None, available
+        return self.values[hi - length:hi], available
+
+    def to_table(self):
+        countries = np.empty(len(self.values), dtype=object)
+        for country, (start, end) in self.bounds.items():
+            countries[start:end] = country
+        flat = pa.array(self.values.reshape(-1), type=pa.float32())
+        return pa.table({
+            "country": pa.array(countries, type=pa.string()).dictionary_encode(),
+            "day": pa.array(self.day_numbers, type=pa.int64()),
+            "features": pa.FixedSizeListArray.from_arrays(flat, len(self.features)),
+        }, metadata={"features": ",".join(self.features)})
+
+    @classmethod
+    def from_table(cls, table):
+        """Từ bảng Arrow (thường là memory-map): cột ngày và ma trận đặc trưng dùng trực tiếp vùng nhớ của bảng"""
+        features = table.schema.metadata[b"features"].decode().split(",")
+        country_column = table.column("country").combine_chunks()
+        countries = np.asarray(country_column.dictionary.to_pylist(), dtype=object)[
+            country_column.indices.to_numpy(zero_copy_only=False)
+        ]
+        day_numbers = table.column("day").combine_chunks().to_numpy()
+        values = table.column("features").combine_chunks().flatten().to_numpy().reshape(-1, len(features))
+        return cls(features, countries, day_numbers, values)
+
+
+def write_feature_store(store, path):
+    write_arrow_table(store.to_table(), path)
+
+
+def read_feature_store(path):
+    return FeatureStore.from_table(read_arrow_table(path))
+
+
+def load_feature_store(data, scalers, features, date_index, source_path=None, model_version=None, directory=None):
+    """FeatureStore dựng một lần lúc tải; khi bật COVID_SHARED_DATASET_DIR thì được lưu thành file Arrow cạnh các
+    DataFrame dùng chung (khóa theo file nguồn + phiên bản mô hình vì scaler thuộc về mô hình)"""
+    def build():
+        return FeatureStore.build(data, scalers, features, date_index)
+
+    directory = directory or SHARED_DATASET_DIR
+    if not directory or source_path is None:
+        return build()
+    try:
+        fingerprint = source_fingerprint(source_path, extra=f"{model_version}:{','.join(features)}")
+    except OSError:
+        return build()
+    return attach_or_build("features", fingerprint, build, directory,
+                           write=write_feature_store, read=read_feature_store)
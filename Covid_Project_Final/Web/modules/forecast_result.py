@@ -0,0 +1,153 @@
+# modules/forecast_result.py
+from datetime import datetime
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Số ngày dữ liệu thực tế hiển thị trước phần dự đoán trên biểu đồ
+FORECAST_HISTORY_DAYS = 30
+
+
+def forecast_accuracy(predicted, actual):
+    """Độ chính xác theo ngày (%) = max(0, 100 - |thực tế - dự đoán| / max(thực tế, 1) * 100); NaN khi chưa có số liệu thực tế"""
+    predicted = np.asarray(predicted, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    return np.maximum(0.0, 100.0 - np.abs(actual - predicted) / np.maximum(actual, 1.0) * 100.0)
+
+
+class ForecastResult:
+    """Kết quả dự đoán có cấu trúc: các mảng ngày/giá trị dự đoán/thực tế/độ chính xác và chuỗi quan sát gần nhất.
+
+    Cả câu trả lời văn bản và biểu đồ đều được dựng từ cùng các mảng này.
+    """
+
+    def __init__(self, country, dates, predicted, actual, history_dates, history_values,
+                 confidence_level=None, confidence_msg=None, created_at=None, model_version=None,
+                 lower=None, upper=None, interval_level=None):
+        self.country = country
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.predicted = np.asarray(predicted, dtype=np.float64)
+        self.actual = np.asarray(actual, dtype=np.float64)
+        self.accuracy = forecast_accuracy(self.predicted, self.actual)
+        self.history_dates = np.asarray(history_dates, dtype="datetime64[D]")
+        self.history_values = np.asarray(history_values, dtype=np.float64)
+        self.confidence_level = confidence_level
+        self.confidence_msg = confidence_msg
+        self.created_at = created_at or datetime.now()
+        # Phiên bản mô hình (bundle_id) đã tạo dự đoán
+        self.model_version = model_version
+        # Khoảng dự đoán Monte-Carlo dropout (cận dưới/trên theo ngày, None nếu không tính); interval_level vd. 0.8
+        self.lower = None if lower is None else np.asarray(lower, dtype=np.float64)
+        self.upper = None if upper is None else np.asarray(upper, dtype=np.float64)
+        self.interval_level = interval_level
+        self._figure = None
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __str__(self):
+        return self.to_text()
+
+    @property
+    def has_actuals(self):
+        return bool(np.isfinite(self.actual).any())
+
+    @property
+    def has_intervals(self):
+        return self.lower is not None and bool(np.isfinite(self.lower).any())
+
+    def to_text(self):
+        """Câu trả lời dạng văn bản (giữ định dạng cũ của format_prediction_response)"""
+        if len(self) == 0:
+            return "Không thể thực hiện dự đoán."
+
+        lines = [f"Dự đoán COVID-19 cho {self.country}\n"]
+        labels = [day.strftime('%d/%m/%Y') for day in self.dates.astype(object)]
+        lower = self.lower if self.has_intervals else np.full(len(self), np.nan)
+        upper = self.upper if self.has_intervals else np.full(len(self), np.nan)
+        for label, pred_value, actual_value, accuracy, low, high in zip(
+                labels, self.predicted, self.actual, self.accuracy, lower, upper):
+            line = f"{label}: {pred_value:.0f} ca mới"
+            if np.isfinite(low):
+                line += f" [{low:.0f} - {high:.0f}]"
+            if np.isfinite(actual_value):
+                line += f" (Thực tế: {actual_value:.0f}, Độ chính xác: {accuracy:.1f}%)"
+            lines.append(line)
+
+        response = "\n".join(lines) + "\n"
+        if self.has_intervals:
+            response += f"\nKhoảng trong ngoặc: khoảng dự đoán {self.interval_level:.0%} (Monte-Carlo dropout)\n"
+        if self.has_actuals:
+            response += f"\nĐộ chính xác trung bình: {np.nanmean(self.accuracy):.1f}%\n"
+        if self.confidence_level is not None:
+            response += f"\nĐộ tin cậy: {self.confidence_level}\n{self.confidence_msg}\n"
+        response += f"\nDự đoán được thực hiện lúc: {self.created_at.strftime('%H:%M %d/%m/%Y')}"
+        return response
+
+    def to_dict(self):
+        """Dạng JSON được (API HTTP): NaN -> None, ngày theo ISO"""
+        def values(array):
+            return [float(v) if np.isfinite(v) else None for v in array]
+
+        return {
+            "country": self.country,
+            "dates": [str(day) for day in self.dates],
+            "predicted": values(self.predicted),
+            "actual": values(self.actual),
+            "accuracy": values(self.accuracy),
+            "lower": values(self.lower) if self.has_intervals else None,
+            "upper": values(self.upper) if self.has_intervals else None,
+            "interval_level": self.interval_level if self.has_intervals else None,
+            "confidence_level": self.confidence_level,
+            "confidence_msg": self.confidence_msg,
+            "model_version": self.model_version,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+        }
+
+    @property
+    def figure(self):
+        """Figure dựng một lần và dùng lại ở các lần rerun sau"""
+        if self._figure is None:
+            self._figure = self.to_figure()
+        return self._figure
+
+    def to_figure(self, height=280):
+        """Biểu đồ gọn: quan sát gần nhất, dự đoán và (nếu có) thực tế trong khoảng dự đoán"""
+        fig = go.Figure()
+        if self.has_intervals:
+            # Dải khoảng dự đoán: cận trên rồi cận dưới, tô kín giữa hai đường
+            fig.add_trace(go.Scatter(
+                x=np.concatenate([self.dates, self.dates[::-1]]),
+                y=np.concatenate([self.upper, self.lower[::-1]]),
+                fill="toself", fillcolor="rgba(214, 39, 40, 0.15)", line=dict(width=0),
+                name=f"Khoảng dự đoán {self.interval_level:.0%}", hoverinfo="skip"
+            ))
+        if len(self.history_dates):
+            fig.add_trace(go.Scatter(
+                x=self.history_dates, y=self.history_values, mode="lines",
+                name="Thực tế", line=dict(color="#1f77b4")
+            ))
+        # Nối đường dự đoán với điểm quan sát cuối cùng để không bị đứt đoạn
+        if len(self.history_dates) and len(self) and self.history_dates[-1] < self.dates[0]:
+            pred_x = np.concatenate([self.history_dates[-1:], self.dates])
+            pred_y = np.concatenate([self.history_values[-1:], self.predicted])
+        else:
+            pred_x, pred_y = self.dates, self.predicted
+        fig.add_trace(go.Scatter(
+            x=pred_x, y=pred_y, mode="lines+markers",
+            name="Dự đoán", line=dict(color="#d62728", dash="dash")
+        ))
+        if self.has_actuals:
+            observed = np.isfinite(self.actual)
+            fig.add_trace(go.Scatter(
+                x=self.dates[observed], y=self.actual[observed], mode="markers",
+                name="Thực tế (khoảng dự đoán)", marker=dict(color="#1f77b4", symbol="circle-open", size=8),
+                customdata=self.accuracy[observed],
+                hovertemplate="%{x|%d/%m/%Y}: %{y:,.0f} ca<br>Độ chính xác: %{customdata:.1f}%<extra></extra>"
+            ))
+        fig.update_layout(
+            title=f"Ca mới tại {self.country}: thực tế và dự đoán",
+            yaxis_title="Ca mới", template="plotly_white", height=height,
+            margin=dict(l=10, r=10, t=40, b=10), legend=dict(orientation="h", y=-0.2)
+        )
+        return fig
@@ -0,0 +1,286 @@
+# modules/http_api.py
+"""API HTTP (ASGI, Starlette) cho các hệ thống khác: truy vấn dữ liệu và dự báo hàng loạt, không cần Streamlit.
+
+Chạy từ thư mục Web:  uvicorn api:app --host 127.0.0.1 --port 8000
+
+- GET  /health
+- GET  /overview
+- GET  /countries                       hàng mới nhất của mọi quốc gia
+- GET  /countries/{country}             hàng mới nhất của một quốc gia
+- GET  /countries/{country}/data?date=YYYY-MM-DD
+- POST /forecast   {"requests": [{"country": "Vietnam", "start_date": "2022-01-01", "days": 7}, ...]}
+                   start_date: "YYYY-MM-DD" hoặc "DD-MM-YYYY" (bỏ trống = hôm nay)
+
+Mặc định trả JSON; thêm ?format=arrow hoặc header Accept: application/vnd.apache.arrow.stream để nhận Arrow IPC stream
+(với /forecast, yêu cầu lỗi là một dòng có cột error, các cột số liệu để trống).
+Truy vấn dữ liệu chạy ngay trong handler (tra chỉ mục trong bộ nhớ); suy luận mô hình chạy trong process pool.
+"""
+import asyncio
+import math
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+import pyarrow as pa
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from .data_query_service import DataQueryService
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+# Số process suy luận; nên dùng cùng COVID_MODEL_SERVER (một model cho mọi process) và COVID_SHARED_DATASET_DIR
+FORECAST_WORKERS = int(os.environ.get("COVID_API_FORECAST_WORKERS", "2"))
+FORECAST_BATCH_LIMIT = 200
+FORECAST_MAX_DAYS = 30
+FORECAST_DEFAULT_DAYS = 3
+
+_forecast_service = None
+
+
+def _init_forecast_worker():
+    """Khởi tạo CovidPredictionService một lần trong mỗi process của pool"""
+    global _forecast_service
+    from .prediction_service import CovidPredictionService
+    _forecast_service = CovidPredictionService()
+
+
+def _forecast_batch(items):
+    """Chạy trong process pool: dự báo cho từng yêu cầu, trả về dict JSON được (lỗi của một yêu cầu không làm hỏng cả lô).
+
+    `start_date` của mỗi yêu cầu là date đã kiểm tra ở handler. Các yêu cầu cùng ngày bắt đầu/số ngày được dự đoán chung: một lần _rollout cho giá trị dự đoán và một lần
+    (Monte-Carlo dropout) cho khoảng dự đoán, mỗi bước một lời gọi mô hình cho cả nhóm."""
+    service = _forecast_service
+    results = [None] * len(items)
+    groups = {}
+    for index, item in enumerate(items):
+        groups.setdefault((item["start_date"], item["days"]), []).append(index)
+
+    for (start_date, days), indices in groups.items():
+        predictions, errors = service.predict_cases_batch([items[i]["country"] for i in indices], start_date, days)
+        intervals = None
+        if predictions:
+            intervals, _ = service.predict_intervals_batch(list(predictions), start_date, days)
+        for index in indices:
+            country = items[index]["country"]
+            if country not in predictions:
+                results[index] = {"country": country, "error": errors.get(country) or "Không thể thực hiện dự đoán."}
+                continue
+            country_intervals = intervals.get(country) if intervals else None
+            confidence_level, confidence_msg = service.get_prediction_confidence(country, start_date, country_intervals)
+            results[index] = service.build_forecast_result(
+                country, predictions[country], confidence_level, confidence_msg, intervals=country_intervals
+            ).to_dict()
+    return results
+
+
+def _chunks(items, n_chunks):
+    size = math.ceil(len(items) / max(1, n_chunks))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def wants_arrow(request):
+    return request.query_params.get("format") == "arrow" or ARROW_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+FORECAST_ARROW_SCHEMA = pa.schema([
+    ("country", pa.string()), ("date", pa.string()), ("predicted", pa.float64()), ("actual", pa.float64()),
+    ("lower", pa.float64()), ("upper", pa.float64()), ("error", pa.string())
+])
+
+
+def forecast_arrow_table(results):
+    """Bảng Arrow một dòng mỗi (quốc gia, ngày); yêu cầu lỗi thành một dòng chỉ có country và error"""
+    rows = []
+    for r in results:
+        if "error" in r:
+            rows.append({"country": r["country"], "error": r["error"]})
+            continue
+        n_days = len(r["dates"])
+        rows.extend(
+            {"country": r["country"], "date": day, "predicted": pred, "actual": actual, "lower": lower, "upper": upper}
+            for day, pred, actual, lower, upper in zip(
+                r["dates"], r["predicted"], r["actual"], r["lower"] or [None] * n_days, r["upper"] or [None] * n_days
+            )
+        )
+    return pa.Table.from_pylist(rows, schema=FORECAST_ARROW_SCHEMA)
+
+
+def arrow_response(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+
+def error_response(status_code, message, **extra):
+    return JSONResponse({"error": message, **extra}, status_code=status_code)
+
+
+def respond(request, payload, rows):
+    """JSON `payload`, hoặc bảng Arrow dựng từ danh sách dict `rows` khi client yêu cầu Arrow"""
+    if wants_arrow(request):
+        return arrow_response(pa.Table.from_pylist(rows))
+    return JSONResponse(payload)
+
+
+def _data_service(request):
+    service = request.app.state.data_service
+    if service is None or service.data is None or service.data.empty:
+        return None
+    return service
+
+
+async def health(request):
+    service = _data_service(request)
+    return JSONResponse({
+        "status": "ok" if service else "no_data",
+        "records": 0 if service is None else len(service.data),
+        "snapshot_version": None if service is None else service.snapshot_version,
+        "forecast_workers": request.app.state.forecast_workers,
+    })
+
+
+async def overview(request):
+    service = _data_service(request)
+    if service is None:
+        return error_response(503, "Không có dữ liệu.")
+    return respond(request, service.overview_record, [service.overview_record])
+
+
+async def list_countries(request):
+    service = _data_service(request)
+    if service is None:
+        return error_response(503, "Không có dữ liệu.")
+    if wants_arrow(request):
+        return arrow_response(pa.Table.from_pandas(service.latest_frame, preserve_index=False))
+    return JSONResponse([service.country_records[country.lower()] for country in service.latest_frame["location"]])
+
+
+async def country_summary(request):
+    service = _data_service(request)
+    if service is None:
+        return error_response(503, "Không có dữ liệu.")
+    country = request.path_params["country"]
+    record = service.get_country_record(country)
+    if record is None:
+        return error_response(404, f"Không tìm thấy dữ liệu cho '{country}'.", suggestions=service.suggest_countries(country))
+    return respond(request, record, [record])
+
+
+async def country_data_by_date(request):
+    service = _data_service(request)
+    if service is None:
+        return error_response(503, "Không có dữ liệu.")
+    country = request.path_params["country"]
+    target_date = request.query_params.get("date")
+    if not target_date:
+        return error_response(400, "Thiếu tham số date (YYYY-MM-DD).")
+    if country not in service.date_index:
+        return error_response(404, f"Không tìm thấy dữ liệu cho '{country}'.", suggestions=service.suggest_countries(country))
+
+    record, exact = service.get_record_by_date(country, target_date)
+    if record is None:
+        return error_response(400, f"Định dạng ngày '{target_date}' không hợp lệ.")
+    return respond(request, {"exact": exact, "record": record}, [{"exact": exact, **record}])
+
+
+def _parse_start_date(value):
+    """start_date của yêu cầu dự báo: None (hôm nay), "YYYY-MM-DD" hoặc "DD-MM-YYYY"; sai định dạng -> ValueError"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        for date_format in ("%Y-%m-%d", "%d-%m-%Y"):
+            try:
+                return datetime.strptime(value, date_format).date()
+            except ValueError:
+                continue
+    raise ValueError(value)
+
+
+def _validate_forecast_requests(body):
+    """Trả về (danh sách yêu cầu đã chuẩn hóa, thông báo lỗi)"""
+    items = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, 'Body cần có dạng {"requests": [{"country": ..., "start_date": ..., "days": ...}]}.'
+    if len(items) > FORECAST_BATCH_LIMIT:
+        return None, f"Tối đa {FORECAST_BATCH_LIMIT} yêu cầu mỗi lô."
+
+    normalized = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("country"), str):
+            return None, f"Yêu cầu {i}: thiếu 'country'."
+        days = item.get("days", FORECAST_DEFAULT_DAYS)
+        if not isinstance(days, int) or isinstance(days, bool) or not 1 <= days <= FORECAST_MAX_DAYS:
+            return None, f"Yêu cầu {i}: 'days' phải là số nguyên từ 1 đến {FORECAST_MAX_DAYS}."
+        try:
+            start_date = _parse_start_date(item.get("start_date"))
+        except ValueError:
+            return None, f"Yêu cầu {i}: 'start_date' phải có dạng YYYY-MM-DD hoặc DD-MM-YYYY."
+        normalized.append({"country": item["country"], "start_date": start_date, "days": days})
+    return normalized, None
+
+
+async def forecast(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return error_response(400, "Body không phải JSON hợp lệ.")
+    items, error = _validate_forecast_requests(body)
+    if error:
+        return error_response(400, error)
+    # Yêu cầu không có start_date bắt đầu từ hôm nay (một ngày chung cho cả lô)
+    today = date.today()
+    for item in items:
+        if item["start_date"] is None:
+            item["start_date"] = today
+
+    # Xếp các yêu cầu cùng ngày bắt đầu/số ngày cạnh nhau để mỗi phần gửi cho pool gồm ít nhóm nhất,
+    # chia cho các process trong pool, chờ bất đồng bộ để event loop vẫn phục vụ truy vấn dữ liệu
+    order = sorted(range(len(items)), key=lambda i: (str(items[i]["start_date"]), items[i]["days"]))
+    loop = asyncio.get_running_loop()
+    pool = request.app.state.forecast_pool
+    try:
+        chunk_results = await asyncio.gather(*[
+            loop.run_in_executor(pool, _forecast_batch, chunk)
+            for chunk in _chunks([items[i] for i in order], request.app.state.forecast_workers)
+        ])
+    except Exception as e:
+        # Pool hỏng (vd. process không tải được model)
+        return error_response(503, f"Dịch vụ dự báo không khả dụng: {e}")
+    results = [None] * len(items)
+    for index, result in zip(order, (result for chunk in chunk_results for result in chunk)):
+        results[index] = result
+
+    if wants_arrow(request):
+        return arrow_response(forecast_arrow_table(results))
+    return JSONResponse({"results": results})
+
+
+def create_app(data_path=None, forecast_workers=FORECAST_WORKERS):
+    """Tạo ứng dụng ASGI; dữ liệu được tải và pool suy luận được khởi tạo khi server khởi động"""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.data_service = await asyncio.to_thread(DataQueryService, data_path)
+        app.state.forecast_workers = forecast_workers
+        # spawn: không fork process đang chạy event loop/thread; mỗi process tự tải model (hoặc kết nối model server)
+        app.state.forecast_pool = ProcessPoolExecutor(
+            max_workers=forecast_workers, mp_context=mp.get_context("spawn"), initializer=_init_forecast_worker
+        )
+        try:
+            yield
+        finally:
+            app.state.forecast_pool.shutdown(wait=False, cancel_futures=True)
+
+    routes = [
+        Route("/health", health),
+        Route("/overview", overview),
+        Route("/countries", list_countries),
+        Route("/countries/{country}", country_summary),
+        Route("/countries/{country}/data", country_data_by_date),
+        Route("/forecast", forecast, methods=["POST"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
@@ -0,0 +1,195 @@
+# modules/intent_classifier.py
+import argparse
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from .text_normalization import normalize_text
+from .nlu_client import NLUUnavailableError
+
+# Khi NLU từ xa không dùng được, chấp nhận câu trả lời tại chỗ với ngưỡng thấp hơn
+FALLBACK_MIN_SCORE = 0.45
+DEGRADED_MESSAGE = "Xin lỗi, hệ thống hỏi đáp đang tạm thời gián đoạn. Bạn vẫn có thể hỏi về dữ liệu hoặc dự đoán COVID-19 theo quốc gia."
+
+DEFAULT_INTENTS_PATH = Path(__file__).parent.parent / "data" / "local_intents.json"
+# Thư mục agent Dialogflow ES đã giải nén; nếu đặt thì intent tại chỗ lấy trực tiếp từ đó thay cho local_intents.json
+DIALOGFLOW_EXPORT_DIR = os.environ.get("DIALOGFLOW_EXPORT_DIR")
+SEED_SOURCE = "seed"
+EXPORT_SOURCE = "dialogflow-export"
+
+
+def load_intents(path=None, export_dir=DIALOGFLOW_EXPORT_DIR):
+    """Đọc tập intent/câu mẫu/câu trả lời: từ agent Dialogflow đã export nếu có `export_dir`,
+    nếu không thì từ file định dạng local_intents.json (cảnh báo khi file chỉ là bộ mẫu viết tay)"""
+    if export_dir:
+        return load_intents_from_dialogflow_export(export_dir)
+    path = Path(path) if path else DEFAULT_INTENTS_PATH
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("source", SEED_SOURCE) == SEED_SOURCE:
+        print(f"Cảnh báo: {path.name} là bộ intent mẫu, câu trả lời tại chỗ có thể khác Dialogflow. "
+              "Đặt DIALOGFLOW_EXPORT_DIR hoặc tạo lại file từ agent đã export.")
+    return data["intents"]
+
+
+def save_intents(intents, path=DEFAULT_INTENTS_PATH, source=EXPORT_SOURCE, language_code="vi"):
+    """Ghi tập intent theo định dạng local_intents.json, kèm nguồn gốc của dữ liệu"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "language_code": language_code, "source": source, "intents": intents},
+                  f, ensure_ascii=False, indent=2)
+
+
+def load_intents_from_dialogflow_export(export_dir, language_code="vi"):
+    """Chuyển thư mục agent Dialogflow ES đã giải nén (intents/*.json) sang cùng định dạng với load_intents"""
+    intents = []
+    intents_dir = Path(export_dir) / "intents"
+    for intent_file in sorted(intents_dir.glob("*.json")):
+        if "_usersays_" in intent_file.stem:
+            continue
+        with open(intent_file, encoding="utf-8") as f:
+            intent = json.load(f)
+
+        usersays_file = intents_dir / f"{intent_file.stem}_usersays_{language_code}.json"
+        if not usersays_file.exists():
+            continue
+        with open(usersays_file, encoding="utf-8") as f:
+            phrases = ["".join(part["text"] for part in example["data"]) for example in json.load(f)]
+
+        response = None
+        for block in intent.get("responses", []):
+            for msg in block.get("messages", []):
+                if msg.get("lang", language_code) == language_code and msg.get("speech"):
+                    speech = msg["speech"]
+                    response = speech[0] if isinstance(speech, list) else speech
+                    break
+            if response:
+                break
+
+        # Intent có tham số/ngữ cảnh phụ thuộc phiên thì không trả lời tại chỗ
+        if phrases and response and not intent.get("contexts") and not intent.get("webhookUsed"):
+            intents.append({"intent": intent["name"], "phrases": phrases, "response": response})
+    return intents
+
+
+class LocalIntentClassifier:
+    """Phân loại intent tại chỗ bằng TF-IDF ký tự + láng giềng gần nhất (cosine)"""
+
+    def __init__(self, intents, min_score=0.75, min_margin=0.1):
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.responses = {item["intent"]: item["response"] for item in intents}
+
+        phrases, labels = [], []
+        for item in intents:
+            for phrase in item["phrases"]:
+                phrases.append(normalize_text(phrase))
+                labels.append(item["intent"])
+        self.labels = np.array(labels)
+        # char_wb bắt được cả lỗi gõ và câu không dấu; vector đã chuẩn hóa L2 nên tích vô hướng = cosine
+        self.vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True)
+        self.phrase_matrix = self.vectorizer.fit_transform(phrases)
+
+    def classify(self, text):
+        """Trả về (intent, điểm, khoảng cách với intent đứng thứ hai)"""
+        query = self.vectorizer.transform([normalize_text(text)])
+        scores = (self.phrase_matrix @ query.T).toarray().ravel()
+        if not scores.any():
+            return None, 0.0, 0.0
+
+        order = np.argsort(scores)[::-1]
+        best_intent, best_score = str(self.labels[order[0]]), scores[order[0]]
+        runner_up = next((scores[i] for i in order[1:] if self.labels[i] != best_intent), 0.0)
+        return best_intent, float(best_score), float(best_score - runner_up)
+
+    def answer(self, text, min_score=None, min_margin=None):
+        """Trả về câu trả lời đã lưu nếu đủ tự tin, ngược lại None (để chuyển lên Dialogflow)"""
+        min_score = self.min_score if min_score is None else min_score
+        min_margin = self.min_margin if min_margin is None else min_margin
+        intent, score, margin = self.classify(text)
+        if intent is None or score < min_score or margin < min_margin:
+            return None
+        return self.responses[intent]
+
+
+class LocalFirstNLU:
+    """Thử phân loại tại chỗ trước, chỉ gọi NLU từ xa khi không chắc chắn; ghi nhận tỷ lệ trúng và thời gian tiết kiệm.
+
+    Nếu NLU từ xa ném NLUUnavailableError thì trả lời tại chỗ với ngưỡng thấp hơn (hoặc thông báo gián đoạn).
+    """
+
+    def __init__(self, classifier, remote, fallback_min_score=FALLBACK_MIN_SCORE):
+        self.classifier = classifier
+        self.remote = remote
+        self.fallback_min_score = fallback_min_score
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.remote_calls = 0
+        self.fallbacks = 0
+        self.local_ms_total = 0.0
+        self.remote_ms_total = 0.0
+
+    def __call__(self, text, session_id):
+        start = time.perf_counter()
+        answer = self.classifier.answer(text) if self.classifier else None
+        local_ms = (time.perf_counter() - start) * 1000
+        if answer is not None:
+            with self._lock:
+                self.local_hits += 1
+                self.local_ms_total += local_ms
+            return answer
+
+        start = time.perf_counter()
+        try:
+            answer = self.remote(text, session_id)
+        except NLUUnavailableError:
+            with self._lock:
+                self.fallbacks += 1
+            return self.fallback_answer(text)
+        with self._lock:
+            self.remote_calls += 1
+            self.remote_ms_total += (time.perf_counter() - start) * 1000
+        return answer
+
+    def fallback_answer(self, text):
+        answer = None
+        if self.classifier:
+            answer = self.classifier.answer(text, min_score=self.fallback_min_score, min_margin=0.0)
+        return answer or DEGRADED_MESSAGE
+
+    def get_stats(self):
+        with self._lock:
+            total = self.local_hits + self.remote_calls + self.fallbacks
+            avg_remote_ms = self.remote_ms_total / self.remote_calls if self.remote_calls else 0.0
+            avg_local_ms = self.local_ms_total / self.local_hits if self.local_hits else 0.0
+            return {
+                "requests": total,
+                "local_hits": self.local_hits,
+                "remote_calls": self.remote_calls,
+                "fallbacks": self.fallbacks,
+                "local_hit_rate": self.local_hits / total if total else 0.0,
+                "avg_local_ms": avg_local_ms,
+                "avg_remote_ms": avg_remote_ms,
+                # Ước lượng: mỗi lần trúng tại chỗ tiết kiệm một lần gọi từ xa trung bình
+                "saved_ms": self.local_hits * max(avg_remote_ms - avg_local_ms, 0.0)
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo local_intents.json từ agent Dialogflow ES đã export")
+    parser.add_argument("export_dir", help="Thư mục agent đã giải nén (chứa intents/*.json)")
+    parser.add_argument("--output", default=str(DEFAULT_INTENTS_PATH))
+    parser.add_argument("--language-code", default="vi")
+    args = parser.parse_args()
+
+    intents = load_intents_from_dialogflow_export(args.export_dir, args.language_code)
+    save_intents(intents, args.output, language_code=args.language_code)
+    print(f"Đã ghi {len(intents)} intent vào {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# modules/intent_router.py
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+
+from .text_normalization import build_trie_pattern
+
+# Các họ từ khóa (giữ nguyên danh sách của chatbot.py; so khớp theo chuỗi con trên text chữ thường)
+DATA_QUERY_KEYWORDS = [
+    "dữ liệu", "du lieu", "data", "tổng quan",
+    "tong quan", "overview", "số liệu", "so lieu",
+    "statistics", "thống kê", "thong ke"
+]
+PREDICTION_EXCLUSION_KEYWORDS = [
+    "dự đoán", "du doan", "predict", "forecast",
+    "dự báo", "du bao", "tương lai", "tuong lai",
+    "ngày tới", "ngay toi", "sắp tới", "sap toi"
+]
+PREDICTION_KEYWORDS = PREDICTION_EXCLUSION_KEYWORDS + ["ở ngày", "o ngay", "vào ngày", "vao ngay"]
+OVERVIEW_KEYWORDS = ["tổng quan", "tong quan", "overview", "tình hình chung", "tinh hinh chung"]
+# Dấu hiệu câu hỏi nối tiếp ("còn Thái Lan?", "Nhật thì sao?") - chỉ có tác dụng khi đi kèm quốc gia/ngày/số ngày.
+# Khác các họ trên, các từ này khớp theo ranh giới từ ("va o" không được khớp trong "java on")
+FOLLOWUP_KEYWORDS = ["còn", "thì sao", "thi sao", "what about", "how about", "và ở", "va o"]
+
+KEYWORD_FAMILIES = {
+    "data": DATA_QUERY_KEYWORDS,
+    "prediction_exclusion": PREDICTION_EXCLUSION_KEYWORDS,
+    "prediction": PREDICTION_KEYWORDS,
+    "overview": OVERVIEW_KEYWORDS
+}
+
+# Thử dd/mm/yyyy trước rồi mới đến dd/mm/yy, mỗi mẫu chỉ lấy khớp đầu tiên (như cách quét cũ)
+DATE_PATTERNS = [
+    re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})'),
+    re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})')
+]
+# "ngày" được ưu tiên trước "day(s)" dù đứng sau trong câu (như cách quét cũ)
+HORIZON_PATTERNS = [re.compile(r'(\d+)\s*ngày'), re.compile(r'(\d+)\s*days?')]
+RELATIVE_DATE_OFFSETS = [
+    (("ngày mai", "ngay mai"), timedelta(days=1)),
+    (("ngày kia", "ngay kia"), timedelta(days=2)),
+    (("tuần tới", "tuan toi"), timedelta(weeks=1)),
+    (("tháng tới", "thang toi"), timedelta(days=30))  # Ước lượng 30 ngày cho tháng tới
+]
+DEFAULT_HORIZON = 3
+MAX_HORIZON = 30
+
+INTENT_DATA_QUERY = "data_query"
+INTENT_OVERVIEW = "overview"
+INTENT_PREDICTION = "prediction"
+
+
+def _build_keyword_matcher():
+    """Một regex duy nhất cho mọi họ từ khóa; lookahead cho phép tìm cả các khớp chồng lấn như `in` của chuỗi con"""
+    families_by_keyword = {}
+    for family, keywords in KEYWORD_FAMILIES.items():
+        for keyword in keywords:
+            families_by_keyword.setdefault(keyword, set()).add(family)
+    for (words, _) in RELATIVE_DATE_OFFSETS:
+        for word in words:
+            families_by_keyword.setdefault(word, set()).add("relative_date")
+    return re.compile(f"(?=({build_trie_pattern(families_by_keyword)}))"), families_by_keyword
+
+
+KEYWORD_PATTERN, FAMILIES_BY_KEYWORD = _build_keyword_matcher()
+FOLLOWUP_PATTERN = re.compile(r'\b(?:' + build_trie_pattern(FOLLOWUP_KEYWORDS) + r')\b')
+
+
+def normalize_message(text):
+    """Chuẩn hóa một lần cho mọi bước so khớp: Unicode NFC + chữ thường + bỏ khoảng trắng thừa hai đầu"""
+    return unicodedata.normalize("NFC", text or "").lower().strip()
+
+
+def match_keywords(text_lower):
+    """Trả về (các họ từ khóa xuất hiện, các từ khóa đã khớp) sau một lần quét"""
+    families, matched = set(), set()
+    for match in KEYWORD_PATTERN.finditer(text_lower):
+        keyword = match.group(1)
+        if keyword not in matched:
+            matched.add(keyword)
+            families |= FAMILIES_BY_KEYWORD[keyword]
+    if FOLLOWUP_PATTERN.search(text_lower):
+        families.add("followup")
+    return families, matched
+
+
+def parse_date(text_lower, matched_keywords=(), today=None):
+    """Trích xuất ngày dd/mm/yyyy, dd/mm/yy hoặc ngày tương đối (ngày mai, tuần tới...)"""
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(text_lower)
+        if not match:
+            continue
+        day, month, year = match.groups()
+        if len(year) == 2:
+            year = "20" + year if int(year) < 50 else "19" + year  # Giả định năm 20xx cho <50, 19xx cho >=50
+        try:
+            return datetime(int(year), int(month), int(day)).date()
+        except ValueError:
+            continue
+
+    now = datetime.now() if today is None else datetime.combine(today, datetime.min.time())
+    for words, offset in RELATIVE_DATE_OFFSETS:
+        if any(word in matched_keywords for word in words):
+            return (now + offset).date()
+    return None
+
+
+def find_horizon(text_lower):
+    """Số ngày dự đoán được nêu rõ (ví dụ '5 ngày', '7 days'), tối đa MAX_HORIZON; None nếu không có"""
+    for pattern in HORIZON_PATTERNS:
+        match = pattern.search(text_lower)
+        if match:
+            return min(int(match.group(1)), MAX_HORIZON)
+    return None
+
+
+def parse_horizon(text_lower):
+    """Như find_horizon nhưng mặc định DEFAULT_HORIZON"""
+    horizon = find_horizon(text_lower)
+    return DEFAULT_HORIZON if horizon is None else horizon
+
+
+class ParsedQuery:
+    """Kết quả phân tích một tin nhắn: intent, quốc gia, ngày và số ngày dự đoán"""
+
+    def __init__(self, text, text_lower, intent, families, country, target_date, horizon, horizon_explicit=False):
+        self.text = text
+        self.text_lower = text_lower
+        self.intent = intent
+        self.families = families
+        self.country = country
+        self.target_date = target_date
+        self.horizon = horizon
+        self.horizon_explicit = horizon_explicit
+
+    @property
+    def is_local(self):
+        """True nếu tin nhắn được xử lý bằng dữ liệu/mô hình cục bộ (không cần NLU từ xa)"""
+        return self.intent is not None
+
+    @property
+    def is_followup(self):
+        """Câu nối tiếp chưa rõ intent nhưng có thực thể để ghép với ngữ cảnh trước đó"""
+        return (self.intent is None and "followup" in self.families
+                and (self.country is not None or self.target_date is not None or self.horizon_explicit))
+
+    def replace(self, **changes):
+        """Tạo bản sao với một số trường thay đổi (dùng khi ghép với ngữ cảnh hội thoại)"""
+        fields = dict(self.__dict__)
+        fields.update(changes)
+        return ParsedQuery(**fields)
+
+    def __repr__(self):
+        return (f"ParsedQuery(intent={self.intent!r}, country={self.country!r}, "
+                f"target_date={self.target_date!r}, horizon={self.horizon!r})")
+
+
+class IntentRouter:
+    """Bộ định tuyến một lượt: chuẩn hóa một lần, một regex cho mọi họ từ khóa, regex biên dịch sẵn cho quốc gia/ngày.
+
+    `country_mapper_factory` chỉ được gọi khi lần đầu cần tìm quốc gia, để câu hỏi thường không phải tải mô hình.
+    """
+
+    def __init__(self, country_mapper_factory):
+        self._country_mapper_factory = country_mapper_factory
+        self._country_mapper = None
+        self._lock = threading.Lock()
+
+    @property
+    def country_mapper(self):
+        if self._country_mapper is None:
+            with self._lock:
+                if self._country_mapper is None:
+                    self._country_mapper = self._country_mapper_factory()
+        return self._country_mapper
+
+    @staticmethod
+    def resolve_intent(families):
+        """Cùng thứ tự ưu tiên như trước: dữ liệu (nếu không kèm từ khóa dự đoán) rồi mới đến dự đoán"""
+        if "data" in families and "prediction_exclusion" not in families:
+            return INTENT_OVERVIEW if "overview" in families else INTENT_DATA_QUERY
+        if "prediction" in families:
+            return INTENT_PREDICTION
+        return None
+
+    def parse(self, text, today=None):
+        text_lower = normalize_message(text)
+        families, matched = match_keywords(text_lower)
+        intent = self.resolve_intent(families)
+
+        country = target_date = horizon = None
+        horizon_explicit = False
+        if intent in (INTENT_DATA_QUERY, INTENT_PREDICTION) or (intent is None and "followup" in families):
+            mapper = self.country_mapper
+            country = mapper.find_country_in_lowered(text_lower) if mapper else None
+            target_date = parse_date(text_lower, matched, today)
+            explicit_horizon = find_horizon(text_lower)
+            horizon_explicit = explicit_horizon is not None
+            horizon = explicit_horizon if horizon_explicit else DEFAULT_HORIZON
+        return ParsedQuery(text, text_lower, intent, families, country, target_date, horizon, horizon_explicit)
@@ -1,10 +1,109 @@
+import time
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from sklearn.cluster import KMeans
+import plotly.graph_objects as go
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 
-def show_enhanced_advanced_analysis(df):
+CLUSTER_FEATURES = ["cases_per_million", "vaccination_rate", "case_fatality_rate", "gdp_per_capita"]
+CLUSTER_MODES = {
+    "Ảnh chụp mới nhất": "snapshot",
+    "Chuỗi thời gian đầy đủ": "timeseries"
+}
+
+# Các kết quả dưới đây chỉ giữ cho phiên bản dữ liệu hiện tại và phiên bản trước
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_latest_snapshot(_df, dataset_version):
+    """Hàng cuối cùng của mỗi quốc gia, tính một lần cho mỗi phiên bản dữ liệu"""
+    return _df.groupby("location").last().reset_index()
+
+def build_timeseries_features(df):
+    """Đặc trưng theo toàn bộ chuỗi thời gian của từng quốc gia (thay vì chỉ hàng cuối)"""
+    grouped = df.sort_values("date").groupby("location")
+    features = pd.DataFrame({
+        "new_cases_pm_mean": grouped["new_cases_per_million"].mean(),
+        "new_cases_pm_std": grouped["new_cases_per_million"].std(),
+        "new_cases_pm_p90": grouped["new_cases_per_million"].quantile(0.9),
+        "new_cases_pm_max": grouped["new_cases_per_million"].max(),
+        "vaccination_rate_mean": grouped["vaccination_rate"].mean(),
+        "vaccination_rate_max": grouped["vaccination_rate"].max(),
+        "case_fatality_rate_mean": grouped["case_fatality_rate"].mean(),
+        "case_fatality_rate_last": grouped["case_fatality_rate"].last(),
+        "gdp_per_capita": grouped["gdp_per_capita"].last(),
+    })
+    if "stringency_index" in df.columns:
+        features["stringency_mean"] = grouped["stringency_index"].mean()
+    return features.reset_index()
+
+def fit_clusters(features, n_clusters=4, use_minibatch=False):
+    """Chuẩn hóa và phân cụm; trả về (nhãn cụm, thời gian fit tính bằng ms)"""
+    start = time.perf_counter()
+    scaled_features = StandardScaler().fit_transform(features)
+    if use_minibatch:
+        model = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init='auto', batch_size=256)
+    else:
+        model = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
+    labels = model.fit_predict(scaled_features)
+    return labels, (time.perf_counter() - start) * 1000
+
+# 2 phiên bản × 2 chế độ đặc trưng × 2 thuật toán
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_cluster_results(_df, dataset_version, mode="snapshot", use_minibatch=False, n_clusters=4):
+    """Kết quả phân cụm được cache theo phiên bản dữ liệu, chế độ đặc trưng và thuật toán"""
+    latest_data = get_latest_snapshot(_df, dataset_version)
+    cluster_data = latest_data[CLUSTER_FEATURES + ["location", "continent"]].dropna()
+    if mode == "timeseries":
+        features = build_timeseries_features(_df).drop(columns="gdp_per_capita").dropna()
+        cluster_data = cluster_data.merge(features, on="location", how="inner")
+        feature_columns = [c for c in features.columns if c != "location"] + ["gdp_per_capita"]
+    else:
+        feature_columns = CLUSTER_FEATURES
+
+    if len(cluster_data) <= 10:
+        return None, 0.0
+
+    labels, fit_ms = fit_clusters(cluster_data[feature_columns], n_clusters, use_minibatch)
+    cluster_data = cluster_data.assign(cluster=labels)
+    return cluster_data, fit_ms
+
+def fit_ols_line(x, y):
+    """Hồi quy tuyến tính một biến bằng bình phương tối thiểu; trả về (hệ số góc, hệ số chặn, R²)"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    slope, intercept = np.polyfit(x, y, 1)
+    residual = y - (slope * x + intercept)
+    total = y - y.mean()
+    r2 = 1 - (residual @ residual) / (total @ total) if total.any() else 0.0
+    return slope, intercept, r2
+
+def fit_ols_lines_by_group(data, x, y, group):
+    """Một đường OLS cho mỗi nhóm (như trendline="ols" của px.scatter khi có color=group):
+    {nhóm: (hệ số góc, hệ số chặn, R², x nhỏ nhất, x lớn nhất)}; bỏ qua nhóm có ít hơn 2 giá trị x khác nhau"""
+    lines = {}
+    valid = data.dropna(subset=[x, y, group])
+    for name, rows in valid.groupby(group, sort=True):
+        if rows[x].nunique() < 2:
+            continue
+        slope, intercept, r2 = fit_ols_line(rows[x], rows[y])
+        lines[name] = (slope, intercept, r2, rows[x].min(), rows[x].max())
+    return lines
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_vaccination_regression(_df, dataset_version):
+    """Dữ liệu và các đường hồi quy tiêm chủng - ca mới theo châu lục, cache theo phiên bản dữ liệu"""
+    latest_data = get_latest_snapshot(_df, dataset_version)
+    vaccination_data = latest_data[
+        (latest_data["people_fully_vaccinated_per_hundred"] > 0) &
+        (latest_data["total_cases"] > 1000)
+    ].copy()
+    regressions = fit_ols_lines_by_group(
+        vaccination_data, "people_fully_vaccinated_per_hundred", "new_cases_per_million", "continent"
+    )
+    return vaccination_data, regressions
+
+def show_enhanced_advanced_analysis(df, dataset_version):
     """Hiển thị phân tích nâng cao với ML insights"""
     st.markdown("### 🔬 Phân tích nâng cao & Machine Learning")
     
@@ -12,7 +111,7 @@ def show_enhanced_advanced_analysis(df):
         st.warning("Không có dữ liệu để thực hiện phân tích nâng cao.")
         return
 
-    latest_data = df.groupby("location").last().reset_index()
+    latest_data = get_latest_snapshot(df, dataset_version)
     
     col1, col2 = st.columns(2)
 
@@ -34,10 +133,7 @@ def show_enhanced_advanced_analysis(df):
     
     with col2:
         st.markdown("#### Hiệu quả tiêm chủng")
-        vaccination_data = latest_data[
-            (latest_data["people_fully_vaccinated_per_hundred"] > 0) &
-            (latest_data["total_cases"] > 1000)
-        ].copy()
+        vaccination_data, regressions = get_vaccination_regression(df, dataset_version)
         
         if not vaccination_data.empty:
             fig_vax = px.scatter(
@@ -48,22 +144,30 @@ def show_enhanced_advanced_analysis(df):
                 color="continent",
                 hover_name="location",
                 title="Tương quan: Tỷ lệ tiêm chủng và Ca nhiễm mới",
-                trendline="ols",
                 labels={"people_fully_vaccinated_per_hundred": "Tỷ lệ tiêm chủng (%)", "new_cases_per_million": "Ca mới/triệu dân"}
             )
+            # Mỗi châu lục một đường OLS cùng màu với nhóm điểm (như trendline="ols" theo color)
+            colors = {trace.name: trace.marker.color for trace in fig_vax.data}
+            for continent, (slope, intercept, r2, x_min, x_max) in regressions.items():
+                x_line = np.array([x_min, x_max])
+                fig_vax.add_trace(go.Scatter(
+                    x=x_line, y=slope * x_line + intercept, mode="lines", legendgroup=continent, showlegend=False,
+                    name=f"OLS {continent}", hovertemplate=f"OLS {continent} (R²={r2:.2f})<extra></extra>",
+                    line=dict(color=colors.get(continent))
+                ))
             fig_vax.update_layout(height=500)
             st.plotly_chart(fig_vax, use_container_width=True)
 
     st.markdown("#### 🎯 Phân nhóm quốc gia theo đặc điểm COVID-19")
-    cluster_features = ["cases_per_million", "vaccination_rate", "case_fatality_rate", "gdp_per_capita"]
-    cluster_data = latest_data[cluster_features + ["location", "continent"]].dropna()
+    col_mode, col_algo = st.columns(2)
+    with col_mode:
+        cluster_mode_label = st.radio("Đặc trưng phân cụm:", list(CLUSTER_MODES.keys()), key="cluster_mode", horizontal=True)
+    with col_algo:
+        use_minibatch = st.checkbox("Dùng MiniBatchKMeans (nhanh hơn với dữ liệu lớn)", key="cluster_minibatch")
+    cluster_data, fit_ms = get_cluster_results(df, dataset_version, CLUSTER_MODES[cluster_mode_label], use_minibatch)
     
-    if len(cluster_data) > 10:
-        scaler = StandardScaler()
-        scaled_features = scaler.fit_transform(cluster_data[cluster_features])
-        
-        kmeans = KMeans(n_clusters=4, random_state=42, n_init='auto')
-        cluster_data["cluster"] = kmeans.fit_predict(scaled_features)
+    if cluster_data is not None:
+        st.caption(f"Thời gian fit mô hình ({'MiniBatchKMeans' if use_minibatch else 'KMeans'}, {cluster_mode_label.lower()}): {fit_ms:.1f} ms (đo ở lần tính đầu tiên; kết quả và thời gian này được lấy từ cache theo phiên bản dữ liệu)")
         
         fig_cluster = px.scatter(
             cluster_data,
@@ -86,7 +190,7 @@ def show_enhanced_advanced_analysis(df):
         cluster_summary.columns = ["Ca/triệu dân (TB)", "Tỷ lệ tiêm chủng (TB)", "Tỷ lệ tử vong (TB)", "GDP/người (TB)", "Số quốc gia"]
         st.dataframe(cluster_summary, use_container_width=True)
 
-def show_ai_insights(df):
+def show_ai_insights(df, dataset_version):
     """Hiển thị insights và phân tích AI"""
     st.markdown("### 🎯 Insights từ Dữ liệu")
     
@@ -94,7 +198,7 @@ def show_ai_insights(df):
         st.warning("Không có dữ liệu để tạo insights.")
         return
 
-    latest_data = df.groupby("location").last().reset_index()
+    latest_data = get_latest_snapshot(df, dataset_version)
     
     insights = []
     
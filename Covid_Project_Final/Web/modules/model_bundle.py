@@ -0,0 +1,108 @@
+# modules/model_bundle.py
+"""Bundle mô hình có phiên bản do pipeline huấn luyện tạo ra (predict_case/save_utils.save_model_bundle):
+
+    data/model_bundles/
+        LATEST                      tên bundle mới nhất
+        LATEST-recursive            bundle mới nhất của mô hình một bước (dự báo nhiều ngày bằng cách gọi lặp)
+        LATEST-direct               bundle mới nhất của mô hình dự đoán trực tiếp H ngày (đầu ra Dense(H))
+        <bundle_id>/
+            manifest.json           bundle_id, thời điểm tạo, features, timesteps, horizon, số quốc gia, sha256 từng file
+            model.h5                trọng số BiLSTM
+            preprocessing.joblib    LabelEncoder, scalers đã fit, danh sách feature, timesteps, horizon
+
+Khi phục vụ chỉ cần đọc bundle một lần: không fit lại scaler/encoder trên toàn bộ dữ liệu.
+"""
+import json
+import os
+from pathlib import Path
+
+import joblib
+
+MODEL_BUNDLES_DIR = Path(__file__).parent.parent / "data" / "model_bundles"
+# Ghim một bundle cụ thể (bundle_id hoặc đường dẫn thư mục); không đặt thì dùng LATEST
+MODEL_BUNDLE = os.environ.get("COVID_MODEL_BUNDLE")
+# Loại mô hình khi không ghim bundle: "recursive" / "direct" (LATEST-<loại>); không đặt thì dùng LATEST
+MODEL_TYPE = os.environ.get("COVID_MODEL_TYPE")
+MODEL_TYPES = ("recursive", "direct")
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "model.h5"
+PREPROCESSING_FILE = "preprocessing.joblib"
+# Khóa cache khi chạy bằng file .h5 cũ (không có bundle)
+LEGACY_MODEL_VERSION = "legacy"
+
+
+class ModelBundleError(Exception):
+    """Bundle thiếu file hoặc không khớp manifest"""
+
+
+def resolve_bundle_path(bundle=None, bundles_dir=MODEL_BUNDLES_DIR, model_type=None):
+    """Thư mục bundle cần dùng: `bundle` (id hoặc đường dẫn), hoặc bundle ghi trong LATEST (LATEST-<model_type> nếu chọn
+    loại mô hình); None nếu chưa có bundle nào"""
+    bundles_dir = Path(bundles_dir)
+    if bundle:
+        path = Path(bundle)
+        return path if path.is_dir() else bundles_dir / str(bundle)
+    if model_type and model_type not in MODEL_TYPES:
+        raise ModelBundleError(f"Loại mô hình không hợp lệ: {model_type} (chọn một trong {', '.join(MODEL_TYPES)})")
+    latest = bundles_dir / (f"{LATEST_FILE}-{model_type}" if model_type else LATEST_FILE)
+    if not latest.exists():
+        return None
+    return bundles_dir / latest.read_text().strip()
+
+
+class ModelBundle:
+    """Các thành phần đã huấn luyện của một phiên bản mô hình; `bundle_id` dùng làm định danh/khóa cache"""
+
+    def __init__(self, path, manifest, label_encoder, scalers, features, timesteps, horizon=1):
+        self.path = Path(path)
+        self.manifest = manifest
+        self.label_encoder = label_encoder
+        self.scalers = scalers
+        self.features = list(features)
+        self.timesteps = timesteps
+        # Số ngày mô hình dự đoán trong một lần chạy (bundle cũ không ghi horizon: 1)
+        self.horizon = horizon
+
+    @property
+    def bundle_id(self):
+        return self.manifest["bundle_id"]
+
+    @property
+    def model_type(self):
+        return MODEL_TYPES[0] if self.horizon == 1 else MODEL_TYPES[1]
+
+    @property
+    def model_path(self):
+        return self.path / MODEL_FILE
+
+    @property
+    def num_countries(self):
+        return len(self.label_encoder.classes_)
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        manifest_path = path / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise ModelBundleError(f"Không tìm thấy {MANIFEST_FILE} trong {path}")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        for name in manifest.get("files", {}):
+            if not (path / name).exists():
+                raise ModelBundleError(f"Bundle {manifest.get('bundle_id')} thiếu file {name}")
+
+        preprocessing = joblib.load(path / PREPROCESSING_FILE)
+        if list(preprocessing["features"]) != list(manifest["features"]):
+            raise ModelBundleError(f"Danh sách feature của bundle {manifest['bundle_id']} không khớp manifest")
+        return cls(
+            path, manifest, preprocessing["label_encoder"], preprocessing["scalers"],
+            preprocessing["features"], preprocessing["timesteps"], preprocessing.get("horizon", 1)
+        )
+
+
+def load_model_bundle(bundle=None, bundles_dir=MODEL_BUNDLES_DIR, model_type=None):
+    """ModelBundle theo `bundle`, hoặc LATEST (LATEST-<model_type>); None nếu chưa có bundle nào (dùng file .h5 cũ)"""
+    path = resolve_bundle_path(bundle, bundles_dir, model_type)
+    if path is None:
+        return None
+    return ModelBundle.load(path)
@@ -0,0 +1,322 @@
+# modules/model_server.py
+"""Model server cục bộ: một process giữ TensorFlow + BiLSTM cho mọi worker Streamlit trên cùng máy.
+
+Khởi động (từ thư mục Web):
+    python -m modules.model_server --address /tmp/covid-model.sock
+rồi chạy Streamlit với COVID_MODEL_SERVER=/tmp/covid-model.sock.
+
+multiprocessing.connection unpickle mọi tin nhắn nhận được, nên ai kết nối được và biết khóa xác thực đều chạy được
+mã tùy ý trong server: server chỉ nghe trên Unix socket (quyền 0600) hoặc TCP loopback, và khóa xác thực lấy từ
+COVID_MODEL_SERVER_AUTHKEY hoặc file khóa ngẫu nhiên quyền 0600 (COVID_MODEL_SERVER_AUTHKEY_FILE) do server tạo
+lần đầu chạy; worker đọc cùng file đó.
+Các yêu cầu predict đến cùng lúc từ mọi worker được gom thành một lô (micro-batch) trong vài ms
+và chạy bằng một lời gọi model.predict.
+"""
+import argparse
+import ipaddress
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+import numpy as np
+
+from .model_bundle import LEGACY_MODEL_VERSION, MODEL_BUNDLE, MODEL_TYPE, MODEL_TYPES, load_model_bundle
+
+MODEL_PATH = Path(__file__).parent.parent / "data" / "bilstm_covid19_model_with_emb.h5"
+# Địa chỉ model server: đường dẫn Unix socket hoặc "127.0.0.1:port"; không đặt thì mỗi process tự tải model
+MODEL_SERVER_ADDRESS = os.environ.get("COVID_MODEL_SERVER")
+# Khóa xác thực kết nối (server và worker phải dùng cùng giá trị): biến môi trường, nếu không có thì file khóa
+MODEL_SERVER_AUTHKEY = os.environ.get("COVID_MODEL_SERVER_AUTHKEY")
+MODEL_SERVER_AUTHKEY_FILE = Path(os.environ.get(
+    "COVID_MODEL_SERVER_AUTHKEY_FILE", Path.home() / ".covid-model-server.key"
+))
+MAX_BATCH_SIZE = 64
+MAX_BATCH_WAIT = 0.004
+CLIENT_TIMEOUT = 10.0
+
+
+class ModelServerUnavailableError(Exception):
+    """Không kết nối được hoặc không nhận được trả lời từ model server"""
+
+
+def load_authkey(create=False, path=None):
+    """Khóa xác thực: COVID_MODEL_SERVER_AUTHKEY nếu có, nếu không thì đọc file khóa.
+
+    create=True (server): tạo file khóa ngẫu nhiên quyền 0600 nếu chưa có. Worker không tạo khóa: thiếu file thì
+    ModelServerUnavailableError (không bao giờ dùng khóa mặc định công khai).
+    """
+    if MODEL_SERVER_AUTHKEY:
+        return MODEL_SERVER_AUTHKEY.encode()
+    path = Path(path or MODEL_SERVER_AUTHKEY_FILE)
+    if create and not path.exists():
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # process khác vừa tạo
+        else:
+            with os.fdopen(fd, "w") as f:
+                f.write(secrets.token_hex(32))
+    try:
+        key = path.read_text().strip()
+    except OSError as e:
+        raise ModelServerUnavailableError(
+            f"Không có khóa xác thực model server (đặt COVID_MODEL_SERVER_AUTHKEY hoặc tạo {path}): {e}"
+        ) from e
+    if not key:
+        raise ModelServerUnavailableError(f"File khóa xác thực {path} rỗng")
+    return key.encode()
+
+
+def parse_address(address):
+    """"host:port" -> (host, port) cho TCP (chỉ chấp nhận loopback); còn lại là đường dẫn Unix socket"""
+    address = str(address)
+    if address.startswith("unix:"):
+        return address[len("unix:"):]
+    host, sep, port = address.rpartition(":")
+    if sep and host and port.isdigit():
+        host = host.strip("[]")
+        if not _is_loopback(host):
+            raise ValueError(f"Model server chỉ được nghe trên loopback (127.0.0.1, ::1, localhost), không phải {host}")
+        return host, int(port)
+    return address
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class MicroBatcher:
+    """Gom các yêu cầu đến trong khoảng max_wait giây (tối đa max_batch_size dòng) thành một lời gọi predict_batch.
+
+    `predict_batch(sequences, countries)` nhận mảng (N, 7, 5) và (N, 1), trả về mảng (N, H) giá trị dự đoán
+    (H = số ngày mô hình dự đoán mỗi lần chạy).
+    """
+
+    def __init__(self, predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, sequences, countries):
+        future = Future()
+        self._queue.put((np.asarray(sequences, dtype=np.float32), np.asarray(countries).reshape(-1, 1), future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            sizes = [len(sequences) for sequences, _, _ in batch]
+            try:
+                predictions = np.asarray(self.predict_batch(
+                    np.concatenate([sequences for sequences, _, _ in batch]),
+                    np.concatenate([countries for _, countries, _ in batch])
+                )).reshape(sum(sizes), -1)
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.rows += len(predictions)
+            offsets = np.cumsum([0] + sizes)
+            for (_, _, future), start, end in zip(batch, offsets[:-1], offsets[1:]):
+                future.set_result(predictions[start:end])
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "avg_batch_size": self.rows / self.batches if self.batches else 0.0,
+            }
+
+
+class ModelServer:
+    """Nhận yêu cầu qua multiprocessing.connection (Unix socket hoặc localhost), mỗi kết nối một thread,
+    mọi yêu cầu đi qua chung một MicroBatcher."""
+
+    def __init__(self, model, address, authkey=None,
+                 max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT, model_version=None):
+        self.model = model
+        self.model_version = model_version
+        self.address = parse_address(address)
+        self.authkey = authkey or load_authkey(create=True)
+        self.batcher = MicroBatcher(self._predict_batch, max_batch_size, max_wait)
+        # Lô Monte-Carlo dropout (dropout bật) không gộp chung được với lô dự đoán thường
+        self.mc_batcher = MicroBatcher(self._predict_mc_batch, max_batch_size, max_wait)
+
+    def _predict_batch(self, sequences, countries):
+        return self.model.predict([sequences, countries], verbose=0)
+
+    def _predict_mc_batch(self, sequences, countries):
+        return np.asarray(self.model([sequences, countries], training=True))
+
+    def serve_forever(self, ready=None):
+        is_unix_socket = isinstance(self.address, str)
+        if is_unix_socket and os.path.exists(self.address):
+            os.unlink(self.address)  # socket cũ còn sót lại từ lần chạy trước
+        # umask 0177: socket được tạo với quyền 0600 ngay lúc bind, chmod lại cho chắc
+        old_umask = os.umask(0o177) if is_unix_socket else None
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            if old_umask is not None:
+                os.umask(old_umask)
+        if is_unix_socket:
+            os.chmod(self.address, 0o600)
+        with listener:
+            print(f"Model server đang lắng nghe tại {listener.address}")
+            if ready is not None:
+                ready.set()
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    # Sai khóa xác thực / client ngắt giữa chừng: bỏ qua kết nối đó
+                    print(f"Từ chối kết nối: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                op = message[0]
+                try:
+                    if op in ("predict", "predict_mc"):
+                        batcher = self.mc_batcher if op == "predict_mc" else self.batcher
+                        conn.send(("ok", batcher.submit(message[1], message[2]).result()))
+                    elif op == "ping":
+                        conn.send(("ok", {"model_version": self.model_version, **self.batcher.get_stats()}))
+                    else:
+                        conn.send(("error", f"Yêu cầu không hợp lệ: {op}"))
+                except Exception as e:
+                    try:
+                        conn.send(("error", str(e)))
+                    except OSError:
+                        return
+
+
+class ModelServerClient:
+    """Client dùng trong worker Streamlit: mỗi thread giữ một kết nối riêng tới model server"""
+
+    def __init__(self, address, authkey=None, timeout=CLIENT_TIMEOUT):
+        self.address = parse_address(address)
+        self.authkey = authkey or load_authkey()
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            conn.close()
+
+    def _request(self, *message):
+        try:
+            conn = self._connection()
+            conn.send(message)
+            if not conn.poll(self.timeout):
+                # Kết nối đang chờ câu trả lời cũ thì không dùng lại được
+                self._drop_connection()
+                raise ModelServerUnavailableError(f"Model server không trả lời sau {self.timeout} giây")
+            status, payload = conn.recv()
+        except (OSError, EOFError) as e:
+            self._drop_connection()
+            raise ModelServerUnavailableError(f"Không kết nối được model server {self.address}: {e}") from e
+        if status != "ok":
+            raise RuntimeError(payload)
+        return payload
+
+    def ping(self):
+        return self._request("ping")
+
+    def predict(self, sequences, countries, mc_dropout=False):
+        op = "predict_mc" if mc_dropout else "predict"
+        return self._request(op, np.asarray(sequences, dtype=np.float32), np.asarray(countries).reshape(-1, 1))
+
+
+class RemoteModel:
+    """Thay thế model Keras trong CovidPredictionService: cùng giao diện predict([sequence, country], verbose=0)
+    và model([sequence, country], training=...)"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, inputs, verbose=0):
+        sequences, countries = inputs
+        return np.asarray(self.client.predict(sequences, countries)).reshape(len(sequences), -1)
+
+    def __call__(self, inputs, training=False):
+        """Như gọi model Keras trực tiếp; training=True chạy với dropout bật (Monte-Carlo dropout)"""
+        sequences, countries = inputs
+        return np.asarray(self.client.predict(sequences, countries, mc_dropout=training)).reshape(len(sequences), -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model server BiLSTM dùng chung cho các worker Streamlit")
+    parser.add_argument("--address", default=MODEL_SERVER_ADDRESS or "/tmp/covid-model.sock",
+                        help='Đường dẫn Unix socket hoặc "127.0.0.1:port" (chỉ loopback)')
+    parser.add_argument("--bundle", default=None, help="bundle_id hoặc thư mục bundle (mặc định: LATEST)")
+    parser.add_argument("--model-type", default=MODEL_TYPE, choices=MODEL_TYPES,
+                        help="Loại mô hình khi không ghim bundle (LATEST-<loại>)")
+    parser.add_argument("--model", default=None, help="File .h5 khi không dùng bundle")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_BATCH_WAIT * 1000)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    bundle = None if args.model else load_model_bundle(args.bundle or MODEL_BUNDLE, model_type=args.model_type)
+    model_path = bundle.model_path if bundle else (args.model or MODEL_PATH)
+    model_version = bundle.bundle_id if bundle else LEGACY_MODEL_VERSION
+    print(f"Tải model {model_version} từ {model_path}")
+    model = load_model(str(model_path))
+    ModelServer(model, args.address, max_batch_size=args.max_batch_size,
+                max_wait=args.max_wait_ms / 1000, model_version=model_version).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
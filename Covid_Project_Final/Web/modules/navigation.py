@@ -0,0 +1,29 @@
+# modules/navigation.py
+import streamlit as st
+
+# Widget của các mục dashboard; Streamlit xóa state của widget không được vẽ trong một lần chạy,
+# nên các key này được gán lại mỗi lần chạy để giữ lựa chọn khi chuyển qua mục khác rồi quay lại
+PERSISTENT_WIDGET_KEYS = (
+    "world_map_metric", "world_map_color_scale", "world_map_mode", "world_map_anim_range", "world_map_anim_step",
+    "overview_metric_select",
+    "compare_countries", "compare_metric",
+    "cluster_mode", "cluster_minibatch",
+)
+
+
+def keep_widget_state(keys=PERSISTENT_WIDGET_KEYS):
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+
+def render_active_view(views, key="active_view"):
+    """Thanh chọn mục + chỉ chạy hàm của mục đang chọn (khác st.tabs chạy thân của mọi tab ở mỗi lần rerun).
+
+    `views` là dict nhãn -> hàm không tham số; trả về nhãn của mục đang hiển thị.
+    """
+    keep_widget_state()
+    labels = list(views)
+    active = st.radio("Chọn mục:", labels, horizontal=True, key=key, label_visibility="collapsed")
+    views[active]()
+    return active
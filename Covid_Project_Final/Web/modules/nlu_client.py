@@ -0,0 +1,246 @@
+# modules/nlu_client.py
+import bisect
+import json
+import random
+import threading
+import time
+
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class NLUUnavailableError(Exception):
+    """NLU từ xa không trả lời được (hết hạn, lỗi liên tiếp hoặc circuit breaker đang mở)"""
+
+
+class LatencyHistogram:
+    """Histogram độ trễ (ms) theo các bucket cố định, an toàn khi nhiều thread cùng ghi"""
+
+    def __init__(self, buckets_ms=LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets_ms, ms)] += 1
+            self.count += 1
+            self.total_ms += ms
+
+    def quantile(self, q):
+        """Cận trên của bucket chứa phân vị q (ước lượng, đủ cho theo dõi p50/p95)"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for i, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else float("inf")
+            return float("inf")
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]}"]
+            return {
+                "count": self.count,
+                "avg_ms": self.total_ms / self.count if self.count else 0.0,
+                "buckets": dict(zip(labels, self.counts))
+            }
+
+
+class CircuitBreaker:
+    """Sau failure_threshold lỗi liên tiếp thì mở mạch trong reset_timeout giây (từ chối ngay, không gọi mạng),
+    sau đó cho một lời gọi thử (half-open): thành công thì đóng mạch, thất bại thì mở lại."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Đang mở, hoặc đã có một lời gọi thử đang chạy
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+
+    def record_ignored(self):
+        """Lời gọi kết thúc bằng lỗi không liên quan tới tính sẵn sàng: không đổi bộ đếm; nếu đó là lời gọi thử
+        (half-open) thì trả lại lượt thử (opened_at giữ nguyên nên lời gọi kế tiếp được thử ngay)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class RetryPolicy:
+    """Exponential backoff với full jitter: lần thử thứ n chờ ngẫu nhiên trong [0, min(max_delay, base_delay * 2^n)]"""
+
+    def __init__(self, max_attempts=3, base_delay=0.2, max_delay=2.0, rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def backoff(self, attempt):
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def retryable_errors():
+    """Lỗi tạm thời đáng thử lại; các lỗi khác (sai quyền, sai request...) không thử lại.
+    Import trễ để các lớp còn lại trong module dùng/kiểm thử được khi chưa cài thư viện Google."""
+    from google.api_core import exceptions as api_exceptions
+    return (
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded,
+        api_exceptions.InternalServerError,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.Aborted,
+    )
+
+
+class DialogflowClient:
+    """Client Dialogflow dùng chung cho mọi phiên trong process (một SessionsClient / một kênh gRPC).
+
+    Mỗi lời gọi có deadline tổng; lỗi tạm thời được thử lại với backoff + jitter trong phạm vi deadline;
+    sau nhiều lỗi tạm thời liên tiếp circuit breaker mở và lời gọi thất bại ngay bằng NLUUnavailableError.
+    Lỗi khác (InvalidArgument, PermissionDenied...) được ném lại nguyên vẹn, không thử lại và không tính vào breaker.
+    `api_endpoint` (vd. "localhost:50051") kết nối kênh không mã hóa tới server giả lập khi kiểm thử.
+    """
+
+    def __init__(self, project_id, credentials=None, api_endpoint=None, deadline=5.0,
+                 retry=None, breaker=None, sessions_client=None, retryable=None, sleep=time.sleep):
+        self.project_id = project_id
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self.session_client = sessions_client or self._create_sessions_client(credentials, api_endpoint)
+        self.retryable_errors = retryable or retryable_errors()
+        self.call_latency = LatencyHistogram()
+        self.attempt_latency = LatencyHistogram()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.client_errors = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_key_file(cls, key_path, **kwargs):
+        with open(key_path, "r") as f:
+            project_id = json.load(f).get("project_id")
+        from google.oauth2 import service_account
+        credentials = service_account.Credentials.from_service_account_file(key_path)
+        return cls(project_id, credentials=credentials, **kwargs)
+
+    @staticmethod
+    def _create_sessions_client(credentials, api_endpoint):
+        from google.cloud import dialogflow_v2 as dialogflow
+        if api_endpoint:
+            import grpc
+            from google.cloud.dialogflow_v2.services.sessions.transports import SessionsGrpcTransport
+            channel = grpc.insecure_channel(api_endpoint)
+            return dialogflow.SessionsClient(transport=SessionsGrpcTransport(channel=channel))
+        return dialogflow.SessionsClient(credentials=credentials)
+
+    def detect_intent(self, text, session_id, language_code="vi"):
+        """Trả về query_result của Dialogflow; ném NLUUnavailableError khi không có câu trả lời trong deadline"""
+        if not self.breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise NLUUnavailableError("Circuit breaker đang mở")
+
+        session = self.session_client.session_path(self.project_id, session_id)
+        request = {
+            "session": session,
+            "query_input": {"text": {"text": text, "language_code": language_code}}
+        }
+
+        started = time.monotonic()
+        deadline_at = started + self.deadline
+        last_error = None
+        with self._lock:
+            self.calls += 1
+        try:
+            for attempt in range(self.retry.max_attempts):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                attempt_start = time.monotonic()
+                try:
+                    # retry=None: tắt retry mặc định của thư viện, chỉ dùng RetryPolicy ở trên
+                    response = self.session_client.detect_intent(request=request, timeout=remaining, retry=None)
+                    self.breaker.record_success()
+                    return response.query_result
+                except self.retryable_errors as e:
+                    last_error = e
+                finally:
+                    self.attempt_latency.observe((time.monotonic() - attempt_start) * 1000)
+
+                if attempt + 1 < self.retry.max_attempts:
+                    delay = min(self.retry.backoff(attempt), deadline_at - time.monotonic())
+                    if delay <= 0:
+                        break
+                    with self._lock:
+                        self.retries += 1
+                    self.sleep(delay)
+        except Exception:
+            # Lỗi không thử lại được (sai request, sai quyền...): Dialogflow vẫn trả lời nên không tính vào circuit
+            # breaker dùng chung (vài câu hỏi lỗi không được làm mạch mở cho mọi phiên); ném lại cho nơi gọi xử lý
+            with self._lock:
+                self.client_errors += 1
+            self.breaker.record_ignored()
+            raise
+        finally:
+            self.call_latency.observe((time.monotonic() - started) * 1000)
+
+        with self._lock:
+            self.failures += 1
+        self.breaker.record_failure()
+        raise NLUUnavailableError(f"Dialogflow không phản hồi: {last_error or 'hết thời gian chờ'}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = {
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+                "client_errors": self.client_errors,
+                "rejected": self.rejected,
+            }
+        stats.update({
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.times_opened,
+            "p50_ms": self.call_latency.quantile(0.5),
+            "p95_ms": self.call_latency.quantile(0.95),
+            "call_latency": self.call_latency.snapshot(),
+            "attempt_latency": self.attempt_latency.snapshot(),
+        })
+        return stats
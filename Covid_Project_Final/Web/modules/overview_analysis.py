@@ -1,10 +1,62 @@
 # modules/overview_analysis.py
+import io
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import matplotlib.pyplot as plt
 from pywaffle import Waffle
 
+OVERVIEW_METRICS = {
+    "Tổng ca nhiễm": "total_cases",
+    "Tổng ca tử vong": "total_deaths",
+    "Tỷ lệ tiêm chủng đầy đủ (%)": "people_fully_vaccinated_per_hundred",
+    "Ca nhiễm/triệu dân": "total_cases_per_million",
+    "Tử vong/triệu dân": "total_deaths_per_million"
+}
+VACCINATION_MAX_METRIC = "people_vaccinated"
+VACCINATION_COLUMNS = ["population", "people_fully_vaccinated", "people_vaccinated"]
+
+def build_max_tables(df):
+    """Tính sẵn hàng có giá trị MAX theo từng quốc gia cho mỗi chỉ số tổng quan và chỉ số tiêm chủng"""
+    tables = {}
+    for metric in list(OVERVIEW_METRICS.values()) + [VACCINATION_MAX_METRIC]:
+        extra_columns = VACCINATION_COLUMNS if metric == VACCINATION_MAX_METRIC else []
+        columns = list(dict.fromkeys(["location", "continent", metric] + extra_columns))
+        valid = df.dropna(subset=[metric])
+        tables[metric] = valid.loc[valid.groupby('location')[metric].idxmax(), columns].reset_index(drop=True)
+    return tables
+
+# Chỉ giữ bảng của phiên bản dữ liệu hiện tại và phiên bản trước
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_max_tables(_df, dataset_version):
+    """Cache bảng MAX theo phiên bản dữ liệu, chỉ tính lại khi dữ liệu thay đổi"""
+    return build_max_tables(_df)
+
+def compute_waffle_data(max_vax_data):
+    """Tính tỷ lệ (%) đã tiêm đủ / tiêm 1 mũi / chưa tiêm từ bảng MAX tiêm chủng"""
+    global_population = max_vax_data['population'].sum()
+    global_fully_vaccinated = max_vax_data['people_fully_vaccinated'].sum()
+    global_partially_vaccinated = max_vax_data['people_vaccinated'].sum() - global_fully_vaccinated
+
+    fully_vaccinated_pct = (global_fully_vaccinated / global_population) * 100 if global_population > 0 else 0
+    partially_vaccinated_pct = (global_partially_vaccinated / global_population) * 100 if global_population > 0 else 0
+    unvaccinated_pct = 100 - fully_vaccinated_pct - partially_vaccinated_pct
+
+    partially_vaccinated_pct = max(0, partially_vaccinated_pct)
+    unvaccinated_pct = max(0, unvaccinated_pct)
+
+    data_for_waffle = {
+        'Đã tiêm đủ': round(fully_vaccinated_pct),
+        'Tiêm 1 mũi': round(partially_vaccinated_pct),
+        'Chưa tiêm': round(unvaccinated_pct)
+    }
+    
+    diff = 100 - sum(data_for_waffle.values())
+    if diff != 0:
+        max_key = max(data_for_waffle, key=data_for_waffle.get)
+        data_for_waffle[max_key] += diff
+    return data_for_waffle
+
 def create_waffle_chart(data_dict, title):
     fig = plt.figure(
         FigureClass=Waffle,
@@ -20,7 +72,22 @@ def create_waffle_chart(data_dict, title):
     fig.set_facecolor('#EEEEEE')
     return fig
 
-def show_overview_analysis(df):
+def render_waffle_png(data_dict, title, dpi=100):
+    """Vẽ waffle chart ra bytes PNG và đóng figure ngay để không rò rỉ bộ nhớ matplotlib"""
+    fig = create_waffle_chart(data_dict, title)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight", facecolor=fig.get_facecolor())
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_waffle_png(waffle_items, title):
+    """Cache ảnh waffle theo bộ giá trị (tuple các cặp nhãn/%), chỉ vẽ lại khi giá trị thay đổi"""
+    return render_waffle_png(dict(waffle_items), title)
+
+def show_overview_analysis(df, dataset_version):
     st.markdown("###  Phân tích tổng quan theo khu vực")
     st.info("Lưu ý: Tất cả các phân tích trong tab này đều dựa trên **số liệu cao nhất (max)** từng được ghi nhận của mỗi quốc gia để đảm bảo tính chính xác.")
 
@@ -28,14 +95,9 @@ def show_overview_analysis(df):
         st.warning("Không có dữ liệu để thực hiện phân tích.")
         return
 
-    # DỌN DẸP: Sử dụng trực tiếp tên cột có sẵn
-    metric_options = {
-        "Tổng ca nhiễm": "total_cases",
-        "Tổng ca tử vong": "total_deaths",
-        "Tỷ lệ tiêm chủng đầy đủ (%)": "people_fully_vaccinated_per_hundred", # <-- THAY ĐỔI Ở ĐÂY
-        "Ca nhiễm/triệu dân": "total_cases_per_million",
-        "Tử vong/triệu dân": "total_deaths_per_million"
-    }
+    metric_options = OVERVIEW_METRICS
+    max_tables = get_max_tables(df, dataset_version)
+
     selected_metric_label = st.selectbox(
         "Chọn chỉ số để phân tích tổng quan:", 
         list(metric_options.keys()),
@@ -43,8 +105,8 @@ def show_overview_analysis(df):
     )
     selected_metric = metric_options[selected_metric_label]
 
-    # Lấy hàng có giá trị MAX của chỉ số được chọn cho mỗi quốc gia
-    max_metric_data = df.loc[df.groupby('location')[selected_metric].idxmax()]
+    # Lấy hàng có giá trị MAX của chỉ số được chọn cho mỗi quốc gia (đã tính sẵn)
+    max_metric_data = max_tables[selected_metric]
 
     col1, col2 = st.columns(2)
 
@@ -84,34 +146,12 @@ def show_overview_analysis(df):
     st.markdown("---")
     st.markdown("###  Phân tích tỷ lệ tiêm chủng toàn cầu (Waffle Chart)")
 
-    max_vax_data = df.loc[df.groupby('location')['people_vaccinated'].idxmax()]
-    
-    global_population = max_vax_data['population'].sum()
-    global_fully_vaccinated = max_vax_data['people_fully_vaccinated'].sum()
-    global_partially_vaccinated = max_vax_data['people_vaccinated'].sum() - global_fully_vaccinated
-
-    fully_vaccinated_pct = (global_fully_vaccinated / global_population) * 100 if global_population > 0 else 0
-    partially_vaccinated_pct = (global_partially_vaccinated / global_population) * 100 if global_population > 0 else 0
-    unvaccinated_pct = 100 - fully_vaccinated_pct - partially_vaccinated_pct
-
-    partially_vaccinated_pct = max(0, partially_vaccinated_pct)
-    unvaccinated_pct = max(0, unvaccinated_pct)
-
-    data_for_waffle = {
-        'Đã tiêm đủ': round(fully_vaccinated_pct),
-        'Tiêm 1 mũi': round(partially_vaccinated_pct),
-        'Chưa tiêm': round(unvaccinated_pct)
-    }
-    
-    diff = 100 - sum(data_for_waffle.values())
-    if diff != 0:
-        max_key = max(data_for_waffle, key=data_for_waffle.get)
-        data_for_waffle[max_key] += diff
+    data_for_waffle = compute_waffle_data(max_tables[VACCINATION_MAX_METRIC])
 
     st.write(f"Dữ liệu được tính toán dựa trên **số liệu tiêm chủng cao nhất** của mỗi quốc gia. Mỗi ô vuông tương ứng với 1% dân số.")
     
-    fig_waffle = create_waffle_chart(
-        data_for_waffle,
+    waffle_png = get_waffle_png(
+        tuple(data_for_waffle.items()),
         'Tỷ lệ tiêm chủng COVID-19 trên toàn cầu'
     )
-    st.pyplot(fig_waffle)
+    st.image(waffle_png, use_container_width=True)
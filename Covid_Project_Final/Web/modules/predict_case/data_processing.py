@@ -16,17 +16,23 @@ def load_and_preprocess_data(filepath):
     scaler_robust = RobustScaler()
     df['stringency_scaled'] = scaler_minmax.fit_transform(df[['stringency_index']])
     df['vaccinated_scaled'] = scaler_robust.fit_transform(df[['people_fully_vaccinated_per_hundred']])
-    return df, le
+    # Lưu scaler đã fit theo tên cột gốc để phục vụ dùng lại, không fit lại
+    scalers = {"stringency_index": scaler_minmax, "people_fully_vaccinated_per_hundred": scaler_robust}
+    return df, le, scalers
 
-def create_sequences(df, features, timesteps=7):
-    """Tạo chuỗi thời gian cho model Bi-LSTM"""
+def create_sequences(df, features, timesteps=7, horizon=1):
+    """Tạo chuỗi thời gian cho model Bi-LSTM.
+
+    horizon=1: y là new_cases_log của ngày kế tiếp, dạng (số mẫu,); horizon>1: y là `horizon` ngày tiếp theo,
+    dạng (số mẫu, horizon) (chỉ lấy các cửa sổ còn đủ `horizon` ngày phía sau)."""
     X_seq, X_location, y = [], [], []
     for location_id, group in df.groupby('location_id'):
         group = group.dropna(subset=features + ['new_cases_log']).reset_index(drop=True)
         values = group[features].values
-        for i in range(len(values) - timesteps):
+        targets = group['new_cases_log'].values
+        for i in range(len(values) - timesteps - horizon + 1):
             X_seq.append(values[i:i+timesteps])
-            y.append(group['new_cases_log'].iloc[i+timesteps])
+            y.append(targets[i+timesteps] if horizon == 1 else targets[i+timesteps:i+timesteps+horizon])
             X_location.append(location_id)
     X_seq = np.array(X_seq)
     X_location = np.array(X_location).reshape(-1, 1)
@@ -42,3 +42,27 @@ def estimate_accuracy(y_test, y_pred):
     print(f"Trung bình tỉ lệ y_pred / y_true: {mean_ratio:.2f}")
     print(f"Ước lượng mô hình dự đoán đúng khoảng: {accuracy_est:.2f}%")
     return mean_ratio, accuracy_est
+
+def recursive_forecast(model, X_seq, X_country, horizon):
+    """Dự đoán `horizon` ngày bằng mô hình một bước: mỗi bước nối dự đoán (new_cases_log, feature đầu tiên)
+    vào cuối cửa sổ, các feature khác giữ như ngày cuối cùng. Trả về mảng (số mẫu, horizon)"""
+    sequences = np.array(X_seq, dtype=np.float32)
+    y_pred = np.empty((len(sequences), horizon))
+    for step in range(horizon):
+        output = model.predict({"sequence_input": sequences, "country_input": X_country}, verbose=0)
+        y_pred[:, step] = np.asarray(output).reshape(len(sequences), -1)[:, 0]
+        next_row = sequences[:, -1:].copy()
+        next_row[:, 0, 0] = y_pred[:, step]
+        sequences = np.concatenate([sequences[:, 1:], next_row], axis=1)
+    return y_pred
+
+def evaluate_horizons(y_test, y_pred):
+    """MAE và RMSE (thang log) theo từng ngày dự đoán; y dạng (số mẫu, horizon)"""
+    y_test = np.asarray(y_test).reshape(len(y_test), -1)
+    errors = np.asarray(y_pred).reshape(y_test.shape) - y_test
+    mae = np.abs(errors).mean(axis=0)
+    rmse = np.sqrt((errors ** 2).mean(axis=0))
+    print("Sai số theo từng ngày dự đoán:")
+    for step, (step_mae, step_rmse) in enumerate(zip(mae, rmse), start=1):
+        print(f"  Ngày +{step}: MAE {step_mae:.4f}, RMSE {step_rmse:.4f}")
+    return mae, rmse
@@ -1,7 +1,10 @@
 from tensorflow.keras import layers, models, Input
 
-def build_bilstm_model(timesteps, num_features, num_countries, emb_dim=18, lstm_units=128, dense_units=64):
-    """Xây dựng mô hình Bi-LSTM với embedding cho quốc gia."""
+def build_bilstm_model(timesteps, num_features, num_countries, emb_dim=18, lstm_units=128, dense_units=64, horizon=1):
+    """Xây dựng mô hình Bi-LSTM với embedding cho quốc gia.
+
+    horizon=1: dự đoán ngày kế tiếp (dự báo nhiều ngày bằng cách gọi lặp); horizon>1: đầu ra Dense(horizon)
+    dự đoán trực tiếp `horizon` ngày tiếp theo trong một lần chạy."""
     # Sequence input
     input_seq = Input(shape=(timesteps, num_features), name="sequence_input")
     # Country input (integer id)
@@ -18,7 +21,7 @@ def build_bilstm_model(timesteps, num_features, num_countries, emb_dim=18, lstm_
     x = layers.Concatenate()([x, country_emb])
     # Dense layers
     x = layers.Dense(dense_units, activation="relu")(x)
-    outputs = layers.Dense(1, activation="relu")(x)
+    outputs = layers.Dense(horizon, activation="relu")(x)
     # Model
     model = models.Model(inputs=[input_seq, input_country], outputs=outputs)
     model.compile(optimizer="adam", loss="huber", metrics=["mae"])
@@ -1,5 +1,19 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
 import joblib
 
+# Tên file trong bundle (giữ đồng bộ với modules/model_bundle.py)
+BUNDLE_MODEL_FILE = "model.h5"
+BUNDLE_PREPROCESSING_FILE = "preprocessing.joblib"
+BUNDLE_MANIFEST_FILE = "manifest.json"
+BUNDLE_LATEST_FILE = "LATEST"
+BUNDLE_FORMAT_VERSION = 1
+
 def save_model(model, model_path):
     """Lưu model keras đã train."""
     model.save(model_path)
@@ -10,3 +24,60 @@ def save_test_data(X_test_seq, X_test_country, y_test, le, out_dir):
     joblib.dump(X_test_country, f"{out_dir}/X_test_country.pkl")
     joblib.dump(y_test, f"{out_dir}/y_test.pkl")
     joblib.dump(le, f"{out_dir}/label_encoder.pkl")
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bundle_model_type(horizon):
+    """"recursive": mô hình một bước (gọi lặp khi dự báo nhiều ngày); "direct": dự đoán trực tiếp `horizon` ngày"""
+    return "recursive" if horizon == 1 else "direct"
+
+def save_model_bundle(model, le, scalers, features, timesteps, bundles_dir, horizon=1):
+    """Lưu model, label encoder, scalers đã fit và danh sách feature thành một bundle có phiên bản, rồi trỏ LATEST
+    (và LATEST-<loại mô hình>) tới nó.
+
+    bundle_id = thời điểm tạo + 12 ký tự đầu sha256 của nội dung, nên hai lần train khác nhau luôn có id khác nhau.
+    """
+    bundles_dir = Path(bundles_dir)
+    created_at = datetime.now()
+    tmp_dir = bundles_dir / f".tmp-{os.getpid()}"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    model.save(str(tmp_dir / BUNDLE_MODEL_FILE))
+    joblib.dump(
+        {"label_encoder": le, "scalers": scalers, "features": list(features), "timesteps": timesteps,
+         "horizon": horizon},
+        tmp_dir / BUNDLE_PREPROCESSING_FILE
+    )
+    files = {name: _sha256(tmp_dir / name) for name in (BUNDLE_MODEL_FILE, BUNDLE_PREPROCESSING_FILE)}
+    content_hash = hashlib.sha256("".join(files[name] for name in sorted(files)).encode()).hexdigest()
+    bundle_id = f"{created_at:%Y%m%d-%H%M%S}-{content_hash[:12]}"
+
+    manifest = {
+        "bundle_id": bundle_id,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": created_at.isoformat(timespec="seconds"),
+        "features": list(features),
+        "timesteps": timesteps,
+        "horizon": horizon,
+        "model_type": bundle_model_type(horizon),
+        "num_countries": len(le.classes_),
+        "scalers": {column: type(scaler).__name__ for column, scaler in scalers.items()},
+        "files": files,
+    }
+    with open(tmp_dir / BUNDLE_MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp_dir, bundles_dir / bundle_id)
+    for latest_name in (BUNDLE_LATEST_FILE, f"{BUNDLE_LATEST_FILE}-{bundle_model_type(horizon)}"):
+        latest_tmp = bundles_dir / f"{latest_name}.tmp"
+        latest_tmp.write_text(bundle_id)
+        os.replace(latest_tmp, bundles_dir / latest_name)
+    print(f"Đã lưu model bundle {bundle_id} vào {bundles_dir}")
+    return bundle_id
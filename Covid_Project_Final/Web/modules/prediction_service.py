@@ -2,36 +2,117 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, date
 import streamlit as st
-from tensorflow.keras.models import load_model
 from pathlib import Path
 from sklearn.preprocessing import MinMaxScaler, RobustScaler
 from .country_mapper import CountryMapper
+from .date_index import CountryDateIndex, to_day_number
+from .forecast_result import ForecastResult, FORECAST_HISTORY_DAYS
+from .shared_dataset import load_shared_frame
+from .model_server import MODEL_PATH, MODEL_SERVER_ADDRESS, ModelServerClient, RemoteModel
+from .model_bundle import MODEL_BUNDLE, MODEL_TYPE, MODEL_TYPES, LEGACY_MODEL_VERSION, load_model_bundle
+from .feature_store import load_feature_store
+
+# Thứ tự feature đầu vào mặc định (khi không có model bundle)
+MODEL_FEATURES = [
+    'new_cases_log', 'new_deaths_log', 'vaccinations_log',
+    'vaccinated_scaled', 'stringency_scaled'
+]
+
+# Monte-Carlo dropout: số mẫu mỗi dự báo và phân vị của khoảng dự đoán (10%-90%)
+MC_DROPOUT_SAMPLES = 32
+INTERVAL_QUANTILES = (0.1, 0.9)
+# Độ rộng tương đối tối đa của khoảng dự đoán cho từng mức độ tin cậy (rộng hơn nữa là "Rất thấp")
+INTERVAL_CONFIDENCE_LEVELS = ((0.5, "Cao"), (1.0, "Trung bình"), (2.0, "Thấp"))
 
 class CovidPredictionService:
-    def __init__(self):
+    def __init__(self, model_server=MODEL_SERVER_ADDRESS, bundle=MODEL_BUNDLE, model_type=MODEL_TYPE):
+        # model_server: địa chỉ model server dùng chung (xem modules/model_server.py); None = tải model trong process
+        self.model_server = model_server
+        # bundle: bundle_id/đường dẫn cần ghim; None = bundle LATEST trong data/model_bundles
+        self.bundle_ref = bundle
+        # model_type: "recursive" (một bước, gọi lặp) / "direct" (H ngày mỗi lần chạy); None = bundle LATEST bất kỳ loại
+        self.model_type_ref = model_type
+        self.bundle = None
+        # Số ngày mô hình dự đoán trong một lần chạy (file .h5 cũ: 1)
+        self.horizon = 1
+        self.features = list(MODEL_FEATURES)
         self.model = None
         self.data = None
         self.country_mapper = None
         self.scalers = {}
+        self.date_index = None
+        self.feature_store = None
         self.load_model_and_data()
 
+    @property
+    def model_version(self):
+        """Định danh mô hình đang phục vụ (bundle_id), dùng trong khóa cache của các kết quả dự đoán"""
+        return self.bundle.bundle_id if self.bundle else LEGACY_MODEL_VERSION
+
+    @property
+    def model_type(self):
+        return self.bundle.model_type if self.bundle else MODEL_TYPES[0]
+
+    def _load_bundle(self):
+        try:
+            bundle = load_model_bundle(self.bundle_ref, model_type=self.model_type_ref)
+            if bundle is not None:
+                print(f"Dùng model bundle {bundle.bundle_id} ({bundle.model_type}, {bundle.horizon} ngày/lần, {bundle.num_countries} quốc gia)")
+            elif self.model_type_ref and self.model_type_ref != MODEL_TYPES[0]:
+                st.warning(f"Chưa có bundle loại {self.model_type_ref}, dùng file model một bước cũ.")
+            return bundle
+        except Exception as e:
+            st.warning(f"Không đọc được model bundle ({e}), dùng file model cũ và fit lại scaler.")
+            return None
+
+    def _connect_model_server(self):
+        try:
+            client = ModelServerClient(self.model_server)
+            server_info = client.ping()
+            if server_info.get("model_version") != self.model_version:
+                st.warning(f"Model server đang chạy {server_info.get('model_version')}, khác bundle {self.model_version} của worker.")
+            st.success(f"Đã kết nối model server tại {self.model_server}")
+            return RemoteModel(client)
+        except Exception as e:
+            st.warning(f"Không kết nối được model server ({e}), tải model trong process.")
+            return None
+
     def load_model_and_data(self):
         try:
-            model_path = Path(__file__).parent.parent / "data" / "bilstm_covid19_model_with_emb.h5"
-            if model_path.exists():
-                self.model = load_model(str(model_path))
-                st.success("Model BiLSTM đã được tải thành công!")
-            else:
-                st.error("Không tìm thấy file model BiLSTM")
-                return
+            self.bundle = self._load_bundle()
+            if self.bundle:
+                self.horizon = self.bundle.horizon
+            if self.model_server:
+                self.model = self._connect_model_server()
+            if self.model is None:
+                model_path = self.bundle.model_path if self.bundle else MODEL_PATH
+                if model_path.exists():
+                    # Import trễ: ở chế độ model server worker không cần nạp TensorFlow
+                    from tensorflow.keras.models import load_model
+                    self.model = load_model(str(model_path))
+                    st.success("Model BiLSTM đã được tải thành công!")
+                else:
+                    st.error("Không tìm thấy file model BiLSTM")
+                    return
 
             data_path = Path(__file__).parent.parent / "data" / "Covid19_cleaned_to_model.csv"
             if data_path.exists():
-                self.country_mapper = CountryMapper(data_path)
-                self.data = self.country_mapper.data
-                
-                self._preprocess_dates()
-                self._preprocess_and_fit_scalers()
+                # Khi bật COVID_SHARED_DATASET_DIR, DataFrame đã tiền xử lý được dùng chung giữa các process
+                self.data = load_shared_frame("prediction", data_path, lambda: self._build_model_frame(data_path))
+                if self.bundle:
+                    # Encoder/scaler/feature đã lưu khi huấn luyện: không fit lại
+                    self.scalers = dict(self.bundle.scalers)
+                    self.features = list(self.bundle.features)
+                    self.country_mapper = CountryMapper(data=self.data, label_encoder=self.bundle.label_encoder)
+                else:
+                    self.country_mapper = CountryMapper(data=self.data)
+                    self._fit_scalers()
+                self.date_index = CountryDateIndex(self.data)
+                # Đặc trưng đã scale của mọi quốc gia, dựng một lần (dùng chung qua file Arrow khi bật COVID_SHARED_DATASET_DIR)
+                self.feature_store = load_feature_store(
+                    self.data, self.scalers, self.features, self.date_index,
+                    source_path=data_path, model_version=self.model_version
+                )
 
                 print(self.data.head())
                 print(f"Khoảng thời gian dữ liệu: {self.data['date'].min()} đến {self.data['date'].max()}")
@@ -42,55 +123,68 @@ class CovidPredictionService:
             st.error(f"Lỗi khi tải model/dữ liệu: {e}")
             print(f"Chi tiết lỗi: {e}")
 
-    def _preprocess_dates(self):
-        if self.data is None:
-            return
-            
+    @classmethod
+    def _build_model_frame(cls, data_path):
+        """Đọc CSV và tạo các cột đặc trưng của mô hình (không phụ thuộc scaler)"""
+        data = pd.read_csv(data_path)
+        data["date"] = pd.to_datetime(data["date"])
+        data = cls._preprocess_dates(data)
+        return cls._add_model_features(data)
+
+    @staticmethod
+    def _preprocess_dates(data):
         try:
-            if 'date' in self.data.columns:
+            if 'date' in data.columns:
                 date_formats = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%Y/%m/%d']
                 
                 for fmt in date_formats:
                     try:
-                        self.data['date'] = pd.to_datetime(self.data['date'], format=fmt, errors='raise')
+                        data['date'] = pd.to_datetime(data['date'], format=fmt, errors='raise')
                         print(f"Thành công với format: {fmt}")
                         break
                     except (ValueError, TypeError):
                         continue
                 else:
-                    self.data['date'] = pd.to_datetime(self.data['date'], errors='coerce', dayfirst=True)
+                    data['date'] = pd.to_datetime(data['date'], errors='coerce', dayfirst=True)
                 
-                initial_rows = len(self.data)
-                self.data = self.data.dropna(subset=['date'])
-                final_rows = len(self.data)
+                initial_rows = len(data)
+                data = data.dropna(subset=['date'])
+                final_rows = len(data)
                 
                 if initial_rows != final_rows:
                     print(f"Đã loại bỏ {initial_rows - final_rows} dòng có ngày không hợp lệ")
                 
-                self.data = self.data.sort_values('date').reset_index(drop=True)
+                data = data.sort_values('date').reset_index(drop=True)
                 
         except Exception as e:
             print(f"Lỗi khi xử lý ngày tháng: {e}")
+        return data
 
-    def _preprocess_and_fit_scalers(self):
-        if self.data is None:
-            return
-
+    @staticmethod
+    def _add_model_features(data):
         try:
             # Xử lý các giá trị âm và NaN trước khi log transform
-            self.data["new_cases"] = self.data["new_cases"].fillna(0).clip(lower=0)
-            self.data["new_deaths"] = self.data["new_deaths"].fillna(0).clip(lower=0)
-            self.data["new_vaccinations_smoothed"] = self.data["new_vaccinations_smoothed"].fillna(0).clip(lower=0)
+            data["new_cases"] = data["new_cases"].fillna(0).clip(lower=0)
+            data["new_deaths"] = data["new_deaths"].fillna(0).clip(lower=0)
+            data["new_vaccinations_smoothed"] = data["new_vaccinations_smoothed"].fillna(0).clip(lower=0)
             
             # Log transform
-            self.data["new_cases_log"] = np.log1p(self.data["new_cases"])
-            self.data["new_deaths_log"] = np.log1p(self.data["new_deaths"])
-            self.data["vaccinations_log"] = np.log1p(self.data["new_vaccinations_smoothed"])
+            data["new_cases_log"] = np.log1p(data["new_cases"])
+            data["new_deaths_log"] = np.log1p(data["new_deaths"])
+            data["vaccinations_log"] = np.log1p(data["new_vaccinations_smoothed"])
 
             # Xử lý các features khác
-            self.data["stringency_index"] = self.data["stringency_index"].fillna(0).clip(0, 100)
-            self.data["people_fully_vaccinated_per_hundred"] = self.data["people_fully_vaccinated_per_hundred"].fillna(0).clip(lower=0)
+            data["stringency_index"] = data["stringency_index"].fillna(0).clip(0, 100)
+            data["people_fully_vaccinated_per_hundred"] = data["people_fully_vaccinated_per_hundred"].fillna(0).clip(lower=0)
+        except Exception as e:
+            print(f"Lỗi khi preprocessing dữ liệu: {e}")
+        return data
 
+    def _fit_scalers(self):
+        if self.data is None:
+            return
+
+        try:
             # Fit scalers
             if not self.data["stringency_index"].isna().all():
                 self.scalers["stringency_index"] = MinMaxScaler().fit(self.data[["stringency_index"]])
@@ -103,30 +197,7 @@ class CovidPredictionService:
             print("Scalers đã được fit thành công")
             
         except Exception as e:
-            print(f"Lỗi khi preprocessing dữ liệu: {e}")
-
-    def _scale_features(self, df):
-        df_scaled = df.copy()
-        
-        try:
-            if "stringency_index" in self.scalers and "stringency_index" in df.columns:
-                df_scaled["stringency_scaled"] = self.scalers["stringency_index"].transform(df[["stringency_index"]])
-            else:
-                df_scaled["stringency_scaled"] = 0
-                
-            if "people_fully_vaccinated_per_hundred" in self.scalers and "people_fully_vaccinated_per_hundred" in df.columns:
-                df_scaled["vaccinated_scaled"] = self.scalers["people_fully_vaccinated_per_hundred"].transform(
-                    df[["people_fully_vaccinated_per_hundred"]]
-                )
-            else:
-                df_scaled["vaccinated_scaled"] = 0
-                
-        except Exception as e:
-            print(f"Lỗi khi scale features: {e}")
-            df_scaled["stringency_scaled"] = 0
-            df_scaled["vaccinated_scaled"] = 0
-            
-        return df_scaled
+            print(f"Lỗi khi fit scalers: {e}")
 
     def _inverse_scale_new_cases(self, scaled_value):
         try:
@@ -140,10 +211,10 @@ class CovidPredictionService:
             return None
             
         try:
-            country_data = self.data[self.data["location"].str.lower() == country.lower()]
-            if country_data.empty:
+            position = self.date_index.latest_position(country)
+            if position is None:
                 return None
-            return country_data["date"].max().date()
+            return self.data["date"].iat[position].date()
         except Exception as e:
             print(f"Lỗi khi lấy ngày mới nhất: {e}")
             return None
@@ -154,18 +225,9 @@ class CovidPredictionService:
             return None
             
         try:
-            country_data = self.data[self.data["location"].str.lower() == country.lower()]
-            if country_data.empty:
-                return None
-                
-            if isinstance(target_date, date):
-                target_date_dt = datetime.combine(target_date, datetime.min.time())
-            else:
-                target_date_dt = pd.to_datetime(target_date)
-            
-            actual_data = country_data[country_data["date"].dt.date == target_date_dt.date()]
-            if not actual_data.empty:
-                return actual_data.iloc[0]["new_cases"]
+            position, exact = self.date_index.lookup(country, target_date)
+            if position is not None and exact:
+                return self.data["new_cases"].iat[position]
         except Exception as e:
             print(f"Lỗi khi lấy dữ liệu thực tế: {e}")
             
@@ -182,37 +244,19 @@ class CovidPredictionService:
                 suggestions = self.country_mapper.suggest_alternatives(country)
                 return None, f"Quốc gia '{country}' không được hỗ trợ. Gợi ý: {', '.join(suggestions[:3])}"
 
-            country_data = self.data[self.data["location"].str.lower() == country.lower()].copy()
-            if country_data.empty:
+            if self.feature_store is None or country not in self.feature_store:
                 return None, f"Không tìm thấy dữ liệu cho {country}"
-                
-            country_data = country_data.sort_values("date")
 
             # Tính ngày kết thúc cho sequence
-            if isinstance(start_date, date):
-                start_date = datetime.combine(start_date, datetime.min.time())
+            if isinstance(start_date, datetime):
+                start_date = start_date.date()
             end_date_for_sequence = start_date - timedelta(days=1)
-            
-            relevant_data = country_data[country_data["date"].dt.date <= end_date_for_sequence.date()].tail(days_back)
-
-            if len(relevant_data) < days_back:
-                return None, f"Không đủ dữ liệu lịch sử cho {country} đến ngày {end_date_for_sequence.strftime('%d/%m/%Y')} (cần ít nhất {days_back} ngày, chỉ có {len(relevant_data)} ngày)"
-
-            # Scale features
-            relevant_data_scaled = self._scale_features(relevant_data.copy())
-
-            # Định nghĩa features cần thiết
-            features = [
-                'new_cases_log', 'new_deaths_log', 'vaccinations_log',
-                'vaccinated_scaled', 'stringency_scaled'
-            ]
 
-            # Đảm bảo tất cả features đều có
-            for feature in features:
-                if feature not in relevant_data_scaled.columns:
-                    relevant_data_scaled[feature] = 0
+            # Cửa sổ đầu vào: days_back ngày có dữ liệu cuối cùng trước start_date, cắt thẳng từ feature store
+            sequence_data, available = self.feature_store.window(country, to_day_number(start_date), days_back)
+            if sequence_data is None:
+                return None, f"Không đủ dữ liệu lịch sử cho {country} đến ngày {end_date_for_sequence.strftime('%d/%m/%Y')} (cần ít nhất {days_back} ngày, chỉ có {available} ngày)"
 
-            sequence_data = relevant_data_scaled[features].fillna(0).values
             country_encoded = np.array([country_id])
 
             return (sequence_data, country_encoded), None
@@ -246,6 +290,56 @@ class CovidPredictionService:
         else:
             return datetime.today().date()
 
+    def _predict_scaled(self, sequences, country_input, mc_dropout=False):
+        """Một lời gọi mô hình cho cả lô (số hàng, 7, số feature) -> mảng (số hàng, horizon);
+        mc_dropout=True giữ dropout bật (Monte-Carlo dropout)"""
+        if mc_dropout:
+            output = self.model([sequences, country_input], training=True)
+        else:
+            output = self.model.predict([sequences, country_input], verbose=0)
+        return np.asarray(output, dtype=np.float64).reshape(len(sequences), -1)
+
+    def _rollout(self, countries, target_date, days_ahead, samples=1, mc_dropout=False):
+        """Dự đoán days_ahead ngày từ target_date cho N quốc gia × `samples` mẫu; mỗi lời gọi mô hình chạy cả lô
+        (N·samples, 7, số feature) và cho `horizon` ngày (mô hình một bước: mỗi ngày một lời gọi).
+
+        Đầu mỗi đoạn nếu có đủ dữ liệu quan sát đến hôm trước thì dùng cửa sổ thực tế; nếu không, mỗi mẫu nối giá trị
+        dự đoán của chính nó vào cửa sổ. Trả về (danh sách ngày, mảng (N, samples, days_ahead) giá trị log dự đoán, lỗi).
+        """
+        country_ids = [self.country_mapper.get_country_id(country) if self.country_mapper else None for country in countries]
+        for country, country_id in zip(countries, country_ids):
+            if country_id is None:
+                return None, None, f"Quốc gia '{country}' không được hỗ trợ"
+
+        dates = [target_date + timedelta(days=day) for day in range(days_ahead)]
+        country_input = np.repeat(np.asarray(country_ids), samples).reshape(-1, 1)
+        scaled = np.empty((len(countries) * samples, days_ahead))
+        sequences = None
+        for block_start in range(0, days_ahead, self.horizon):
+            current_day = to_day_number(dates[block_start])
+            for i, country in enumerate(countries):
+                if block_start > 0 and self.feature_store.last_day_before(country, current_day) != current_day - 1:
+                    continue
+                input_data, error = self.prepare_sequence_data(country, dates[block_start], days_back=7)
+                if error:
+                    return None, None, error
+                window = input_data[0]
+                if sequences is None:
+                    sequences = np.empty((len(countries) * samples,) + window.shape, dtype=np.float32)
+                sequences[i * samples:(i + 1) * samples] = window
+
+            block = self._predict_scaled(sequences, country_input, mc_dropout)
+            block_end = min(block_start + block.shape[1], days_ahead)
+            scaled[:, block_start:block_end] = block[:, :block_end - block_start]
+
+            # Cập nhật sequence cho đoạn tiếp theo: nối các ngày vừa dự đoán của từng mẫu vào cuối cửa sổ
+            if block_end < days_ahead:
+                next_rows = np.repeat(sequences[:, -1:], block.shape[1], axis=1)
+                next_rows[:, :, 0] = block
+                sequences = np.concatenate([sequences, next_rows], axis=1)[:, -sequences.shape[1]:]
+
+        return dates, scaled.reshape(len(countries), samples, days_ahead), None
+
     def predict_cases(self, country, target_date=None, days_ahead=3):
         """Dự đoán số ca nhiễm mới"""
         target_date = self._parse_target_date(target_date)
@@ -254,44 +348,83 @@ class CovidPredictionService:
             if self.model is None or self.data is None:
                 return None, "Model hoặc dữ liệu chưa được tải"
 
-            predictions = {}
-            current_date = target_date - timedelta(days=1)
+            dates, scaled, error = self._rollout([country], target_date, days_ahead)
+            if error:
+                return None, error
+            values = self._inverse_scale_new_cases(scaled[0, 0])
+            return dict(zip(dates, values)), None
 
-            # Validate country trước khi bắt đầu prediction
-            if not self.country_mapper or self.country_mapper.get_country_id(country) is None:
-                return None, f"Quốc gia '{country}' không được hỗ trợ"
-
-            for day in range(days_ahead):
-                current_date += timedelta(days=1)
-                input_data, error = self.prepare_sequence_data(country, current_date, days_back=7)
-                
-                if error:
-                    return None, error
-
-                sequence_data, country_encoded = input_data
-                
-                sequence_input = sequence_data.reshape(1, 7, len(sequence_data[0]))
-                country_input = country_encoded.reshape(1, 1)
+        except Exception as e:
+            return None, f"Lỗi khi dự đoán: {e}"
 
-                # Predict
-                pred_scaled = self.model.predict([sequence_input, country_input], verbose=0)[0][0]
-                predicted_value = self._inverse_scale_new_cases(pred_scaled)
+    def predict_cases_batch(self, countries, target_date=None, days_ahead=3):
+        """Dự đoán cho nhiều quốc gia cùng ngày bắt đầu/số ngày bằng một lần _rollout (mỗi bước một lời gọi mô hình
+        cho cả lô). Trả về ({quốc gia: {ngày: số ca}}, {quốc gia: lỗi}); quốc gia lỗi không làm hỏng cả lô."""
+        target_date = self._parse_target_date(target_date)
+        countries = list(dict.fromkeys(countries))
+        if self.model is None or self.data is None:
+            return {}, {country: "Model hoặc dữ liệu chưa được tải" for country in countries}
+
+        # Loại trước các quốc gia không hỗ trợ/thiếu dữ liệu vì _rollout dừng ở lỗi đầu tiên
+        errors = {}
+        for country in countries:
+            _, error = self.prepare_sequence_data(country, target_date, days_back=7)
+            if error:
+                errors[country] = error
+        valid = [country for country in countries if country not in errors]
+        if not valid:
+            return {}, errors
 
-                predictions[current_date] = predicted_value
+        try:
+            dates, scaled, error = self._rollout(valid, target_date, days_ahead)
+        except Exception as e:
+            dates, scaled, error = None, None, f"Lỗi khi dự đoán: {e}"
+        if error:
+            errors.update({country: error for country in valid})
+            return {}, errors
+        values = self._inverse_scale_new_cases(scaled[:, 0])
+        return {country: dict(zip(dates, values[i])) for i, country in enumerate(valid)}, errors
+
+    def predict_intervals_batch(self, countries, target_date=None, days_ahead=3,
+                                samples=MC_DROPOUT_SAMPLES, quantiles=INTERVAL_QUANTILES):
+        """Khoảng dự đoán bằng Monte-Carlo dropout cho nhiều quốc gia cùng ngày bắt đầu/số ngày.
+
+        Mỗi quốc gia có `samples` quỹ đạo tự hồi quy (dropout bật) nên độ bất định được lan truyền qua các bước;
+        phân vị lấy theo từng ngày trên thang log rồi đổi về số ca. Trả về ({quốc gia: {ngày: (cận dưới, cận trên)}}, lỗi).
+        """
+        target_date = self._parse_target_date(target_date)
 
-                # Cập nhật sequence cho prediction tiếp theo
-                if day < days_ahead - 1:  # Không cần cập nhật ở lần cuối
-                    new_row_for_sequence = sequence_data[-1].copy()
-                    new_row_for_sequence[0] = pred_scaled
-                    sequence_data = np.vstack((sequence_data[1:], new_row_for_sequence))
+        try:
+            if self.model is None or self.data is None:
+                return None, "Model hoặc dữ liệu chưa được tải"
 
-            return predictions, None
+            dates, scaled, error = self._rollout(list(countries), target_date, days_ahead, samples, mc_dropout=True)
+            if error:
+                return None, error
+            bounds = self._inverse_scale_new_cases(np.quantile(scaled, quantiles, axis=1))  # (2, N, days)
+            return {
+                country: {day: (bounds[0, i, j], bounds[-1, i, j]) for j, day in enumerate(dates)}
+                for i, country in enumerate(countries)
+            }, None
 
         except Exception as e:
-            return None, f"Lỗi khi dự đoán: {e}"
-
-    def get_prediction_confidence(self, country, target_date):
-        """Đánh giá độ tin cậy của dự đoán"""
+            return None, f"Lỗi khi tính khoảng dự đoán: {e}"
+
+    def predict_intervals(self, country, target_date=None, days_ahead=3, samples=MC_DROPOUT_SAMPLES):
+        intervals, error = self.predict_intervals_batch([country], target_date, days_ahead, samples)
+        return (intervals[country] if intervals else None), error
+
+    @staticmethod
+    def _interval_confidence(intervals, latest_data_date):
+        """Độ tin cậy theo độ rộng tương đối (trung vị theo ngày) của khoảng dự đoán Monte-Carlo dropout"""
+        bounds = np.array(list(intervals.values()), dtype=np.float64)
+        midpoints = np.maximum((bounds[:, 0] + bounds[:, 1]) / 2, 1.0)
+        width = float(np.nanmedian((bounds[:, 1] - bounds[:, 0]) / midpoints))
+        level = next((label for limit, label in INTERVAL_CONFIDENCE_LEVELS if width <= limit), "Rất thấp")
+        return level, f"Khoảng dự đoán rộng khoảng {width:.0%} so với giá trị giữa khoảng.\nDữ liệu mới nhất: {latest_data_date.strftime('%d/%m/%Y')}"
+
+    def get_prediction_confidence(self, country, target_date, intervals=None):
+        """Đánh giá độ tin cậy của dự đoán: theo khoảng dự đoán nếu có, nếu không thì theo khoảng cách tới dữ liệu mới nhất"""
         try:
             latest_data_date = self.get_latest_data_date(country)
             if not latest_data_date:
@@ -300,6 +433,9 @@ class CovidPredictionService:
             if target_date <= latest_data_date:
                 return "Cao", f"Dữ liệu thực tế có sẵn cho ngày {target_date.strftime('%d/%m/%Y')}.\nDữ liệu mới nhất: {latest_data_date.strftime('%d/%m/%Y')}"
 
+            if intervals:
+                return self._interval_confidence(intervals, latest_data_date)
+
             data_to_target_gap_days = (target_date - latest_data_date).days
             
             if data_to_target_gap_days <= 3:
@@ -326,27 +462,51 @@ class CovidPredictionService:
             return self.country_mapper.find_country(text)
         return None
 
+    def build_forecast_result(self, country, predictions, confidence_level=None, confidence_msg=None,
+                              history_days=FORECAST_HISTORY_DAYS, intervals=None):
+        """Dựng ForecastResult: số liệu thực tế (N ngày trước khoảng dự đoán + trong khoảng dự đoán) lấy từ một lát cắt duy nhất của chuỗi quốc gia"""
+        pred_days = np.array([to_day_number(day) for day in predictions], dtype=np.int64)
+        predicted = np.fromiter(predictions.values(), dtype=np.float64, count=len(predictions))
+        actual = np.full(len(pred_days), np.nan)
+        history_days_arr = np.empty(0, dtype=np.int64)
+        history_values = np.empty(0, dtype=np.float64)
+
+        positions = self.date_index.country_positions(country) if self.date_index and len(pred_days) else None
+        if positions is not None and len(positions):
+            days = self.date_index.country_days(country)
+            first_pred, last_pred = pred_days.min(), pred_days.max()
+            lo = np.searchsorted(days, first_pred - history_days, side="left")
+            hi = np.searchsorted(days, last_pred, side="right")
+            window_days = days[lo:hi]
+            window_values = self.data["new_cases"].to_numpy(dtype=np.float64)[positions[lo:hi]]
+
+            # Thực tế cho từng ngày dự đoán: tìm nhị phân trên lát cắt, chỉ nhận khớp chính xác
+            idx = np.clip(np.searchsorted(window_days, pred_days), 0, max(len(window_days) - 1, 0))
+            if len(window_days):
+                exact = window_days[idx] == pred_days
+                actual[exact] = window_values[idx[exact]]
+
+            before = window_days < first_pred
+            history_days_arr, history_values = window_days[before], window_values[before]
+
+        # Khoảng dự đoán (nếu có) theo đúng thứ tự ngày của predictions
+        lower = upper = None
+        if intervals:
+            lower = np.array([intervals.get(day, (np.nan, np.nan))[0] for day in predictions], dtype=np.float64)
+            upper = np.array([intervals.get(day, (np.nan, np.nan))[1] for day in predictions], dtype=np.float64)
+
+        return ForecastResult(
+            country, pred_days.astype("datetime64[D]"), predicted, actual,
+            history_days_arr.astype("datetime64[D]"), history_values,
+            confidence_level, confidence_msg, model_version=self.model_version,
+            lower=lower, upper=upper, interval_level=INTERVAL_QUANTILES[-1] - INTERVAL_QUANTILES[0]
+        )
+
     def format_prediction_response(self, country, predictions, confidence_level, confidence_msg):
         """Format response cho prediction"""
         if not predictions:
             return "Không thể thực hiện dự đoán."
-
-        response = f"Dự đoán COVID-19 cho {country}\n\n"
-        
-        for pred_date, pred_value in predictions.items():
-            actual_value = self.get_actual_data(country, pred_date)
-            response += f"{pred_date.strftime('%d/%m/%Y')}: {pred_value:.0f} ca mới"
-            
-            if actual_value is not None:
-                diff = abs(actual_value - pred_value)
-                accuracy = max(0, 100 - (diff / max(actual_value, 1) * 100))
-                response += f" (Thực tế: {actual_value:.0f}, Độ chính xác: {accuracy:.1f}%)"
-            response += "\n"
-        
-        response += f"\nĐộ tin cậy: {confidence_level}\n{confidence_msg}\n"
-        response += f"\nDự đoán được thực hiện lúc: {datetime.now().strftime('%H:%M %d/%m/%Y')}"
-        
-        return response
+        return self.build_forecast_result(country, predictions, confidence_level, confidence_msg).to_text()
 
 @st.cache_resource
 def get_prediction_service():
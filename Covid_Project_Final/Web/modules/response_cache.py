@@ -0,0 +1,157 @@
+# modules/response_cache.py
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .text_normalization import normalize_text
+
+
+class ResponseCache:
+    """Cache câu trả lời theo câu hỏi đã chuẩn hóa: LRU + TTL trong bộ nhớ, tùy chọn dùng chung giữa các process qua SQLite.
+
+    Bảng SQLite được dọn khi mở và sau mỗi lần ghi: xóa dòng hết hạn, giữ tối đa `sqlite_max_rows` dòng
+    (bỏ các dòng sắp hết hạn nhất, tức các dòng ghi sớm nhất vì TTL như nhau).
+    """
+
+    def __init__(self, max_entries=2048, ttl_seconds=6 * 3600, sqlite_path=None, sqlite_max_rows=16384):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_max_rows = sqlite_max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.sqlite_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if sqlite_path:
+            self._open_sqlite(sqlite_path)
+
+    def _open_sqlite(self, sqlite_path):
+        try:
+            self._db = sqlite3.connect(str(sqlite_path), timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)")
+            self._prune_sqlite(time.time())
+        except sqlite3.Error as e:
+            print(f"Không thể mở cache SQLite tại {sqlite_path}: {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(text):
+        return normalize_text(text)
+
+    def get(self, text):
+        key = self.make_key(text)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            row = self._sqlite_get(key, now)
+            if row is not None:
+                value, expires_at = row
+                self.hits += 1
+                self.sqlite_hits += 1
+                # Giữ nguyên thời điểm hết hạn đã lưu, không tính lại TTL từ lúc đọc
+                self._store(key, value, expires_at)
+                return value
+
+            self.misses += 1
+            return None
+
+    def set(self, text, value):
+        key = self.make_key(text)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at)
+                    )
+                    self._prune_sqlite(expires_at - self.ttl_seconds)
+                except sqlite3.Error as e:
+                    print(f"Lỗi khi ghi cache SQLite: {e}")
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_sqlite(self, now):
+        """Xóa dòng hết hạn rồi cắt bảng về tối đa sqlite_max_rows dòng (ném sqlite3.Error cho nơi gọi xử lý)"""
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.sqlite_max_rows
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+
+    def _sqlite_get(self, key, now):
+        """(câu trả lời, thời điểm hết hạn) còn hạn trong SQLite, hoặc None"""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Lỗi khi đọc cache SQLite: {e}")
+            return None
+        return tuple(row) if row else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM responses")
+                except sqlite3.Error as e:
+                    print(f"Lỗi khi xóa cache SQLite: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "sqlite_hits": self.sqlite_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class CachedRemoteNLU:
+    """Bọc lời gọi NLU từ xa bằng ResponseCache.
+
+    `remote` trả về (câu trả lời, có_thể_cache); câu trả lời của intent phụ thuộc phiên
+    (ngữ cảnh, tham số, webhook) hoặc lỗi kết nối sẽ không được cache.
+    """
+
+    def __init__(self, remote, cache):
+        self.remote = remote
+        self.cache = cache
+
+    def __call__(self, text, session_id):
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+        answer, cacheable = self.remote(text, session_id)
+        if cacheable and answer:
+            self.cache.set(text, answer)
+        return answer
@@ -0,0 +1,218 @@
+# modules/shared_dataset.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+# Bật chế độ dùng chung giữa các process Streamlit trên cùng máy bằng cách đặt thư mục chứa file Arrow:
+#   COVID_SHARED_DATASET_DIR=/dev/shm/covid  (hoặc thư mục bất kỳ trên đĩa)
+# Process đầu tiên dựng DataFrame và ghi file Arrow (không nén); các process khác memory-map file đó,
+# các cột số/ngày không có null được dùng trực tiếp trên vùng nhớ chung (zero-copy, chỉ đọc).
+SHARED_DATASET_DIR = os.environ.get("COVID_SHARED_DATASET_DIR")
+# Thời gian tối đa chờ process khác ghi xong file trước khi tự dựng bản riêng; khóa giữ lâu hơn được coi là bỏ dở
+SHARED_BUILD_TIMEOUT = 300.0
+LOCK_POLL_INTERVAL = 0.2
+# Số file Arrow giữ memory-map trong mỗi process (phiên bản hiện tại và trước đó của vài bộ dữ liệu)
+MAX_MEMORY_MAPS = 8
+
+_memory_maps = OrderedDict()
+_memory_maps_lock = threading.Lock()
+
+
+def shared_mode_enabled():
+    return bool(SHARED_DATASET_DIR)
+
+
+def source_fingerprint(*paths, extra=None):
+    """Khóa phiên bản theo đường dẫn, kích thước, thời điểm sửa của file nguồn (và `extra`, vd. phiên bản mô hình):
+    dữ liệu nguồn đổi thì tên file Arrow đổi"""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{Path(path).resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    if extra is not None:
+        digest.update(str(extra).encode())
+    return digest.hexdigest()[:16]
+
+
+def frame_to_table(df):
+    """Chuyển DataFrame sang bảng Arrow giữ nguyên NaN là giá trị số (không thành null),
+    để khi đọc lại các cột số không cần chép sang mảng mới"""
+    arrays = []
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if values.dtype.kind in "biuf":
+            arrays.append(pa.array(values, from_pandas=False))
+        else:
+            arrays.append(pa.array(values, from_pandas=True))
+    return pa.Table.from_arrays(arrays, names=[str(c) for c in df.columns])
+
+
+def write_arrow_table(table, path):
+    """Ghi bảng Arrow ra file IPC không nén qua file tạm rồi đổi tên (process khác không bao giờ thấy file ghi dở)"""
+    path = Path(path)
+    tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _memory_map(path):
+    """Memory-map của file, dùng lại cho mọi lần đọc trong process (file bị thay bằng os.replace thì map lại)"""
+    path = str(path)
+    stat = os.stat(path)
+    identity = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    with _memory_maps_lock:
+        entry = _memory_maps.get(path)
+        if entry is None or entry[0] != identity:
+            entry = (identity, pa.memory_map(path, "r"))
+            _memory_maps[path] = entry
+        _memory_maps.move_to_end(path)
+        while len(_memory_maps) > MAX_MEMORY_MAPS:
+            # Bảng đã đọc vẫn giữ vùng nhớ của map bị bỏ khỏi đây cho đến khi không còn dùng
+            _memory_maps.popitem(last=False)
+        return entry[1]
+
+
+def read_arrow_table(path):
+    """Memory-map file Arrow IPC: các buffer của bảng trỏ thẳng vào vùng nhớ map (chỉ đọc).
+
+    Các lần đọc cùng file trong một process dùng chung một vùng map, nên các bảng trả về chia sẻ buffer."""
+    return pa.ipc.open_file(_memory_map(path)).read_all()
+
+
+def write_arrow_file(df, path):
+    write_arrow_table(frame_to_table(df), path)
+
+
+def read_arrow_file(path):
+    """Tạo DataFrame từ file Arrow memory-map; cột số/ngày không null trỏ thẳng vào vùng nhớ map (chỉ đọc)"""
+    return read_arrow_table(path).to_pandas(split_blocks=True, date_as_object=False)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # process của user khác vẫn đang chạy
+    return True
+
+
+def _lock_owner(lock_path):
+    """Nội dung khóa "<pid> <thời điểm tạo>" và (pid, thời điểm tạo); pid None nếu chưa ghi xong/không đọc được"""
+    try:
+        owner = lock_path.read_text()
+        created_at = lock_path.stat().st_mtime
+    except FileNotFoundError:
+        return None, None, None
+    try:
+        pid, created_at = owner.split()
+        return owner, int(pid), float(created_at)
+    except ValueError:
+        return owner, None, created_at
+
+
+def _break_stale_lock(lock_path, timeout):
+    """Gỡ khóa của process dựng đã chết (PID không còn) hoặc giữ quá `timeout` giây; True nếu khóa không còn"""
+    owner, pid, created_at = _lock_owner(lock_path)
+    if owner is None:
+        return True
+    expired = time.time() - created_at > timeout
+    if not expired and (pid is None or _pid_alive(pid)):
+        return False
+
+    # Đổi tên trước rồi mới xóa: nếu trong lúc đó process khác đã gỡ khóa cũ và giành khóa mới thì trả khóa lại
+    stale_path = lock_path.with_name(f"{lock_path.name}.stale{os.getpid()}")
+    try:
+        os.replace(lock_path, stale_path)
+    except FileNotFoundError:
+        return True
+    if stale_path.read_text() != owner:
+        try:
+            os.link(stale_path, lock_path)
+        except FileExistsError:
+            pass
+        os.unlink(stale_path)
+        return False
+    os.unlink(stale_path)
+    print(f"Gỡ khóa bỏ dở {lock_path.name} (pid {pid}, {'quá hạn' if expired else 'process không còn'}).")
+    return True
+
+
+def attach_or_build(name, fingerprint, build, directory=None, timeout=SHARED_BUILD_TIMEOUT,
+                    write=write_arrow_file, read=read_arrow_file):
+    """Trả về dữ liệu dùng chung tên `name`: gắn vào file Arrow đã có, hoặc giành khóa để dựng bằng `build()` rồi ghi ra.
+
+    Mặc định dữ liệu là DataFrame; `write(obj, path)`/`read(path)` cho phép lưu kiểu khác (vd. FeatureStore).
+    Khóa ghi PID và thời điểm của process dựng; process chờ gỡ khóa nếu PID đó không còn hoặc khóa quá `timeout` giây.
+    Nếu không có thư mục dùng chung, hoặc chờ process khác quá `timeout` giây, thì dựng bản riêng như trước.
+    """
+    directory = directory or SHARED_DATASET_DIR
+    if not directory:
+        return build()
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}-{fingerprint}.arrow"
+    # Khóa theo từng (tên, fingerprint) như file Arrow: các phiên bản khác nhau của cùng dữ liệu dựng độc lập
+    lock_path = directory / f"{name}-{fingerprint}.lock"
+
+    deadline = time.monotonic() + timeout
+    while True:
+        if path.exists():
+            return read(path)
+        try:
+            lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if _break_stale_lock(lock_path, timeout):
+                continue
+            if time.monotonic() > deadline:
+                print(f"Hết thời gian chờ dữ liệu dùng chung '{name}', tự tải bản riêng.")
+                return build()
+            time.sleep(LOCK_POLL_INTERVAL)
+            continue
+
+        owner = f"{os.getpid()} {time.time()}"
+        try:
+            os.write(lock_fd, owner.encode())
+            data = build()
+            if data is None:
+                return None
+            write(data, path)
+            # Process dựng cũng dùng bản memory-map để không giữ thêm một bản riêng
+            return read(path)
+        finally:
+            os.close(lock_fd)
+            # Chỉ xóa khóa của chính mình (khóa có thể đã bị gỡ vì quá hạn và process khác đã giành khóa mới)
+            if _lock_owner(lock_path)[0] == owner:
+                os.unlink(lock_path)
+
+
+def load_shared_frame(name, source_path, build, directory=None):
+    """Dùng trong các hàm tải dữ liệu: `build()` đọc và xử lý `source_path` như bình thường"""
+    if not (directory or SHARED_DATASET_DIR):
+        return build()
+    try:
+        fingerprint = source_fingerprint(source_path)
+    except OSError:
+        # Thiếu file nguồn: để build() báo lỗi như cũ
+        return build()
+    return attach_or_build(name, fingerprint, build, directory)
+
+
+def shared_nbytes(df):
+    """Số byte của các cột đang nằm trên vùng nhớ dùng chung (không sở hữu dữ liệu và chỉ đọc)"""
+    total = 0
+    for column in df.columns:
+        values = df[column].to_numpy()
+        if isinstance(values, np.ndarray) and not values.flags.owndata and not values.flags.writeable:
+            total += values.nbytes
+    return total
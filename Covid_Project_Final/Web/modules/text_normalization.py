@@ -0,0 +1,55 @@
+# modules/text_normalization.py
+import re
+import unicodedata
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fold_diacritics(text):
+    """Bỏ dấu tiếng Việt: 'Covid là gì' -> 'Covid la gi' (đ/Đ được chuyển thành d/D)"""
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+
+def normalize_text(text, fold_accents=True):
+    """Chuẩn hóa câu hỏi: Unicode NFC, bỏ dấu (tùy chọn), bỏ dấu câu, chữ thường, gộp khoảng trắng"""
+    text = unicodedata.normalize("NFC", text or "")
+    if fold_accents:
+        text = fold_diacritics(text)
+    text = _PUNCTUATION_RE.sub(" ", text.casefold())
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def build_trie_pattern(words):
+    """Dựng biểu thức regex dạng trie (gộp tiền tố chung) cho danh sách từ.
+
+    Regex của Python thử lần lượt từng nhánh `a|b|c`, nên với vài trăm tên quốc gia/alias thì
+    gộp tiền tố giúp mỗi vị trí chỉ phải thử vài ký tự. Khớp dài nhất được ưu tiên.
+    """
+    trie = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def to_pattern(node):
+        branches = [(re.escape(ch), to_pattern(child)) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            body = branches[0][0] + branches[0][1]
+            single_char = not branches[0][1]
+        else:
+            body = "(?:" + "|".join(head + tail for head, tail in branches) + ")"
+            single_char = True
+        if "" in node:
+            # Từ kết thúc tại đây nhưng còn nhánh dài hơn: lượng từ `?` tham lam ưu tiên khớp dài
+            return body + "?" if single_char else "(?:" + body + ")?"
+        return body
+
+    return to_pattern(trie)
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -113,7 +114,92 @@ def show_enhanced_time_trends(df):
         st.metric("Trung bình mỗi ngày", format_large_number(avg_vax_day))
 
 
-def show_enhanced_world_map(df):
+class CountryDayMatrix:
+    """Ma trận dày đặc float32 (quốc gia × ngày) cho một chỉ số, dùng cho bản đồ hoạt ảnh"""
+
+    def __init__(self, df, metric):
+        df = df.dropna(subset=["date", "location"])
+        location_codes, self.locations = pd.factorize(df["location"], sort=True)
+        first_iso = df.groupby("location")["iso_code"].first()
+        self.iso_codes = first_iso.reindex(self.locations).to_numpy()
+
+        start = df["date"].min().normalize()
+        end = df["date"].max().normalize()
+        self.dates = pd.date_range(start, end, freq="D")
+        day_index = (df["date"].dt.normalize() - start).dt.days.to_numpy()
+
+        self.values = np.full((len(self.locations), len(self.dates)), np.nan, dtype=np.float32)
+        self.values[location_codes, day_index] = df[metric].to_numpy(dtype=np.float32)
+        self._forward_fill()
+
+    def _forward_fill(self):
+        """Điền tiếp giá trị gần nhất theo trục ngày để bản đồ không bị nhấp nháy ở ngày thiếu dữ liệu"""
+        mask = np.isnan(self.values)
+        last_valid = np.where(~mask, np.arange(self.values.shape[1]), 0)
+        np.maximum.accumulate(last_valid, axis=1, out=last_valid)
+        self.values = self.values[np.arange(self.values.shape[0])[:, None], last_valid]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.dates.nbytes + self.iso_codes.nbytes
+
+    def slice(self, start_date, end_date, step_days=7):
+        """Trả về (ngày, giá trị) chỉ cho khoảng được chọn, lấy mẫu mỗi `step_days` ngày"""
+        lo = self.dates.searchsorted(pd.Timestamp(start_date), side="left")
+        hi = self.dates.searchsorted(pd.Timestamp(end_date), side="right")
+        columns = np.arange(lo, hi, max(1, step_days))
+        if len(columns) and columns[-1] != hi - 1:
+            columns = np.append(columns, hi - 1)
+        return self.dates[columns], self.values[:, columns]
+
+
+# 4 chỉ số của bản đồ × (phiên bản dữ liệu hiện tại + phiên bản trước), bản cũ hơn bị loại khỏi cache
+@st.cache_resource(show_spinner=False, max_entries=8)
+def get_country_day_matrix(_df, metric, dataset_version):
+    """Xây dựng ma trận (quốc gia × ngày) một lần cho mỗi chỉ số và phiên bản dữ liệu"""
+    return CountryDayMatrix(_df, metric)
+
+
+def build_animated_map_figure(matrix, frame_dates, frame_values, metric_label, color_scale):
+    """Tạo một figure plotly duy nhất với các frame cho thanh trượt thời gian"""
+    zmin = float(np.nanmin(frame_values)) if np.isfinite(frame_values).any() else 0.0
+    zmax = float(np.nanmax(frame_values)) if np.isfinite(frame_values).any() else 1.0
+    labels = [d.strftime("%d/%m/%Y") for d in frame_dates]
+
+    def choropleth(z):
+        return go.Choropleth(
+            locations=matrix.iso_codes, z=z, text=matrix.locations,
+            zmin=zmin, zmax=zmax, colorscale=color_scale,
+            colorbar=dict(title=metric_label),
+            hovertemplate="%{text}: %{z:,.2f}<extra></extra>"
+        )
+
+    frames = [go.Frame(data=[choropleth(frame_values[:, i])], name=label) for i, label in enumerate(labels)]
+    fig = go.Figure(data=[choropleth(frame_values[:, 0])], frames=frames)
+
+    slider_steps = [
+        dict(method="animate", label=label,
+             args=[[label], dict(mode="immediate", frame=dict(duration=0, redraw=True), transition=dict(duration=0))])
+        for label in labels
+    ]
+    fig.update_layout(
+        title=f"Diễn biến theo thời gian: {metric_label}",
+        height=600, geo=dict(bgcolor='rgba(0,0,0,0)'),
+        updatemenus=[dict(
+            type="buttons", showactive=False, x=0.05, y=0, xanchor="right", yanchor="top",
+            buttons=[
+                dict(label="▶", method="animate",
+                     args=[None, dict(frame=dict(duration=300, redraw=True), fromcurrent=True, transition=dict(duration=0))]),
+                dict(label="⏸", method="animate",
+                     args=[[None], dict(mode="immediate", frame=dict(duration=0, redraw=False), transition=dict(duration=0))])
+            ]
+        )],
+        sliders=[dict(active=0, x=0.05, len=0.95, currentvalue=dict(prefix="Ngày: "), steps=slider_steps)]
+    )
+    return fig
+
+
+def show_enhanced_world_map(df, dataset_version):
     """Hiển thị bản đồ thế giới tương tác với dữ liệu đã được lọc"""
     st.markdown("###  Bản đồ dịch tễ toàn cầu")
     
@@ -121,7 +207,7 @@ def show_enhanced_world_map(df):
         st.warning("Không có dữ liệu để hiển thị bản đồ.")
         return
 
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         metric_options = {
             "Tổng ca nhiễm": "total_cases",
@@ -129,12 +215,19 @@ def show_enhanced_world_map(df):
             "Tỷ lệ tiêm chủng (%)": "vaccination_rate",
             "Ca nhiễm/triệu dân": "cases_per_million"
         }
-        selected_metric_label = st.selectbox("Chọn chỉ số:", list(metric_options.keys()))
+        selected_metric_label = st.selectbox("Chọn chỉ số:", list(metric_options.keys()), key="world_map_metric")
         selected_metric = metric_options[selected_metric_label]
     
     with col2:
         color_scales = ['Plasma', 'Viridis', 'Cividis', 'Blues', 'Reds', 'Greens']
-        selected_color_scale = st.selectbox("Chọn bảng màu:", color_scales)
+        selected_color_scale = st.selectbox("Chọn bảng màu:", color_scales, key="world_map_color_scale")
+
+    with col3:
+        map_mode = st.radio("Chế độ bản đồ:", ["Giá trị cao nhất", "Hoạt ảnh theo thời gian"], key="world_map_mode")
+
+    if map_mode == "Hoạt ảnh theo thời gian":
+        show_animated_world_map(df, selected_metric, selected_metric_label, selected_color_scale, dataset_version)
+        return
 
     map_data = df.groupby("location").agg({
         selected_metric: "max",
@@ -154,54 +247,164 @@ def show_enhanced_world_map(df):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def show_enhanced_comparative_analysis(df):
+def show_animated_world_map(df, metric, metric_label, color_scale, dataset_version):
+    """Bản đồ hoạt ảnh dựa trên ma trận (quốc gia × ngày), chỉ gửi lát cắt của khoảng được chọn"""
+    matrix = get_country_day_matrix(df, metric, dataset_version)
+    min_date, max_date = matrix.dates[0].date(), matrix.dates[-1].date()
+
+    # Giá trị mặc định đặt qua session_state để lựa chọn được giữ lại khi chuyển qua lại giữa các mục
+    if "world_map_anim_range" not in st.session_state:
+        st.session_state.world_map_anim_range = (min_date, max_date)
+    if "world_map_anim_step" not in st.session_state:
+        st.session_state.world_map_anim_step = 7
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        start_date, end_date = st.slider(
+            "Khoảng thời gian hoạt ảnh:", min_value=min_date, max_value=max_date,
+            format="DD/MM/YYYY", key="world_map_anim_range"
+        )
+    with col2:
+        step_days = st.number_input("Bước (ngày):", min_value=1, max_value=90, key="world_map_anim_step")
+
+    frame_dates, frame_values = matrix.slice(start_date, end_date, step_days)
+    if len(frame_dates) == 0:
+        st.warning("Không có dữ liệu trong khoảng thời gian đã chọn.")
+        return
+
+    fig = build_animated_map_figure(matrix, frame_dates, frame_values, metric_label, color_scale)
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"Ma trận {matrix.values.shape[0]} quốc gia × {matrix.values.shape[1]} ngày "
+        f"chiếm {matrix.nbytes / 1024 ** 2:,.2f} MB; đang hiển thị {len(frame_dates)} khung hình "
+        f"({frame_values.nbytes / 1024:,.1f} KB)."
+    )
+
+
+COMPARISON_METRICS = {
+    "Ca nhiễm mới/triệu dân (làm mịn)": "new_cases_smoothed_per_million",
+    "Ca tử vong mới/triệu dân (làm mịn)": "new_deaths_smoothed_per_million",
+    "Tỷ lệ tiêm chủng đầy đủ (%)": "people_fully_vaccinated_per_hundred",
+    "Chỉ số nghiêm ngặt (Stringency Index)": "stringency_index"
+}
+
+
+class CountrySeriesStore:
+    """Mảng ngày và mảng chỉ số (float32) đã tách sẵn cho từng quốc gia"""
+
+    def __init__(self, df, metrics):
+        ordered = df.sort_values(["location", "date"])
+        locations = ordered["location"].to_numpy()
+        boundaries = np.flatnonzero(locations[1:] != locations[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(ordered)]))
+
+        dates = ordered["date"].to_numpy()
+        columns = {metric: ordered[metric].to_numpy(dtype=np.float32) for metric in metrics if metric in ordered}
+        self.series = {}
+        for start, end in zip(starts, ends):
+            self.series[locations[start]] = (
+                dates[start:end],
+                {metric: values[start:end] for metric, values in columns.items()}
+            )
+        self.countries = sorted(self.series)
+
+    def get(self, country, metric):
+        dates, metrics = self.series[country]
+        return dates, metrics[metric]
+
+
+# Chỉ giữ bản tách của phiên bản dữ liệu hiện tại và phiên bản trước
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_country_series_store(_df, dataset_version):
+    """Tách dữ liệu theo quốc gia một lần cho mỗi phiên bản dữ liệu"""
+    return CountrySeriesStore(_df, list(COMPARISON_METRICS.values()))
+
+
+class ComparisonFigureCache:
+    """Giữ figure so sánh giữa các lần rerun, chỉ thêm/bớt trace của quốc gia thay đổi"""
+
+    def __init__(self):
+        self.store = None
+        self.metric = None
+        self.figure = None
+        self.colors = {}
+
+    def _reset(self, store, metric, metric_label):
+        self.store = store
+        self.metric = metric
+        self.figure = go.Figure()
+        self.figure.update_layout(
+            title=f"So sánh '{metric_label}' giữa các quốc gia",
+            xaxis_title="Ngày", yaxis_title=metric_label,
+            legend_title_text="Quốc gia", template="plotly_white"
+        )
+
+    def _color_for(self, country):
+        if country not in self.colors:
+            palette = px.colors.qualitative.Plotly + px.colors.qualitative.Dark24
+            self.colors[country] = palette[len(self.colors) % len(palette)]
+        return self.colors[country]
+
+    def update(self, store, selected_countries, metric, metric_label):
+        if self.figure is None or metric != self.metric or store is not self.store:
+            self._reset(store, metric, metric_label)
+
+        selected = set(selected_countries)
+        existing = {trace.name for trace in self.figure.data}
+        if existing - selected:
+            self.figure.data = tuple(trace for trace in self.figure.data if trace.name in selected)
+
+        for country in selected_countries:
+            if country in existing or country not in store.series:
+                continue
+            dates, values = store.get(country, metric)
+            self.figure.add_trace(go.Scattergl(
+                x=dates, y=values, mode="lines", name=country,
+                line=dict(color=self._color_for(country))
+            ))
+
+        # Giữ thứ tự trace (và chú thích) theo thứ tự chọn, như khi dựng lại từ đầu
+        order = {country: i for i, country in enumerate(selected_countries)}
+        names = [trace.name for trace in self.figure.data]
+        if names != sorted(names, key=order.__getitem__):
+            self.figure.data = tuple(sorted(self.figure.data, key=lambda trace: order[trace.name]))
+        return self.figure
+
+
+def show_enhanced_comparative_analysis(df, dataset_version):
     """Hiển thị phân tích so sánh giữa các quốc gia với các chỉ số đã được Việt hóa."""
     st.markdown("###  Phân tích so sánh đa quốc gia")
     st.info("So sánh diễn biến các chỉ số theo thời gian giữa các quốc gia bạn chọn.")
     
-    countries = sorted(df["location"].unique().tolist())
+    store = get_country_series_store(df, dataset_version)
+    if "compare_countries" not in st.session_state:
+        st.session_state.compare_countries = [c for c in ["Vietnam", "United States", "India", "Brazil"] if c in store.series]
+    elif any(c not in store.series for c in st.session_state.compare_countries):
+        # Dữ liệu đã đổi: bỏ các quốc gia không còn trong danh sách
+        st.session_state.compare_countries = [c for c in st.session_state.compare_countries if c in store.series]
     selected_countries = st.multiselect(
         "Chọn các quốc gia để so sánh:",
-        countries,
-        default=["Vietnam", "United States", "India", "Brazil"]
+        store.countries,
+        key="compare_countries"
     )
     
     if not selected_countries:
         st.warning("Vui lòng chọn ít nhất một quốc gia.")
         return
 
-    comp_df = df[df["location"].isin(selected_countries)]
-    
-    # THAY ĐỔI Ở ĐÂY: Việt hóa các lựa chọn
-    metric_options_comp = {
-        "Ca nhiễm mới/triệu dân (làm mịn)": "new_cases_smoothed_per_million",
-        "Ca tử vong mới/triệu dân (làm mịn)": "new_deaths_smoothed_per_million",
-        "Tỷ lệ tiêm chủng đầy đủ (%)": "people_fully_vaccinated_per_hundred",
-        "Chỉ số nghiêm ngặt (Stringency Index)": "stringency_index"
-    }
-    
     # Hiển thị các key tiếng Việt cho người dùng lựa chọn
     selected_metric_label = st.selectbox(
         "Chọn chỉ số để so sánh:",
-        list(metric_options_comp.keys()), # <-- Chỉ hiển thị các key đã Việt hóa
+        list(COMPARISON_METRICS.keys()),
         key="compare_metric"
     )
-    
-    # Lấy tên cột tương ứng từ lựa chọn của người dùng
-    metric_to_plot = metric_options_comp[selected_metric_label]
-
-    fig = px.line(
-        comp_df,
-        x="date",
-        y=metric_to_plot,
-        color="location",
-        # Cập nhật tiêu đề và nhãn của biểu đồ để hiển thị tiếng Việt
-        title=f"So sánh '{selected_metric_label}' giữa các quốc gia",
-        labels={
-            metric_to_plot: selected_metric_label, # Nhãn trục Y
-            'date': 'Ngày', 
-            'location': 'Quốc gia'
-        }
+    metric_to_plot = COMPARISON_METRICS[selected_metric_label]
+
+    # Figure được giữ trong session, chỉ trace của quốc gia thêm/bớt mới được tạo lại
+    if "comparison_figure_cache" not in st.session_state:
+        st.session_state.comparison_figure_cache = ComparisonFigureCache()
+    fig = st.session_state.comparison_figure_cache.update(
+        store, selected_countries, metric_to_plot, selected_metric_label
     )
     st.plotly_chart(fig, use_container_width=True)
-
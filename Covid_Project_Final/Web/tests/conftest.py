@@ -0,0 +1,85 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# Chạy pytest từ thư mục Web hoặc gốc repo: import modules.* như khi chạy app từ thư mục Web
+WEB_DIR = Path(__file__).resolve().parent.parent
+if str(WEB_DIR) not in sys.path:
+    sys.path.insert(0, str(WEB_DIR))
+
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from benchmarks.bench_common import write_synthetic_csv  # noqa: E402
+from modules.country_mapper import CountryMapper  # noqa: E402
+from modules.date_index import CountryDateIndex  # noqa: E402
+from modules.feature_store import load_feature_store  # noqa: E402
+from modules.prediction_service import CovidPredictionService, MODEL_FEATURES  # noqa: E402
+
+N_COUNTRIES = 4
+N_DAYS = 60
+
+
+class FakeModel:
+    """Thay cho BiLSTM: đầu ra ngày +h = new_cases_log ngày cuối của cửa sổ + 0.01·h (horizon cột);
+    training=True cộng nhiễu như dropout. Ghi lại số dòng của từng lời gọi."""
+
+    def __init__(self, horizon=1, noise=0.2, seed=0):
+        self.horizon = horizon
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.calls = []
+
+    def _outputs(self, inputs, training):
+        sequences, countries = inputs
+        sequences = np.asarray(sequences, dtype=np.float64)
+        assert len(sequences) == len(np.asarray(countries))
+        self.calls.append((len(sequences), training))
+        outputs = sequences[:, -1, :1] + 0.01 * np.arange(1, self.horizon + 1)
+        if training:
+            outputs = outputs + self.rng.normal(0, self.noise, outputs.shape)
+        return outputs
+
+    def predict(self, inputs, verbose=0):
+        return self._outputs(inputs, training=False)
+
+    def __call__(self, inputs, training=False):
+        return self._outputs(inputs, training)
+
+
+@pytest.fixture(scope="session")
+def synthetic_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp("data") / "covid_synthetic.csv"
+    frame = write_synthetic_csv(path, n_countries=N_COUNTRIES, n_days=N_DAYS)
+    return path, frame
+
+
+def build_service(csv_path, model, horizon=1):
+    """CovidPredictionService trên file CSV nhỏ với mô hình giả (không tải TensorFlow/bundle)"""
+    service = CovidPredictionService.__new__(CovidPredictionService)
+    service.bundle, service.features, service.scalers, service.horizon = None, list(MODEL_FEATURES), {}, horizon
+    service.model = model
+    service.data = CovidPredictionService._build_model_frame(csv_path)
+    service.country_mapper = CountryMapper(data=service.data)
+    service._fit_scalers()
+    service.date_index = CountryDateIndex(service.data)
+    service.feature_store = load_feature_store(service.data, service.scalers, service.features, service.date_index)
+    return service
+
+
+@pytest.fixture
+def make_service(synthetic_csv):
+    def make(horizon=1, **model_kwargs):
+        return build_service(synthetic_csv[0], FakeModel(horizon=horizon, **model_kwargs), horizon)
+    return make
+
+
+@pytest.fixture
+def countries(synthetic_csv):
+    return list(synthetic_csv[1]["location"].unique())
+
+
+@pytest.fixture
+def last_date(synthetic_csv):
+    return synthetic_csv[1]["date"].max().date()
@@ -0,0 +1,69 @@
+# tests/test_chat_history.py
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import WEB_DIR
+from modules.chat_history import PENDING_TEXT
+
+SLOW_REPLY_SECONDS = 3.0
+
+
+def chat_page(web_dir, slow_seconds):
+    # AppTest chạy mã nguồn hàm này như một script riêng nên phải import bên trong hàm
+    import sys
+    import time
+    import streamlit as st
+    if web_dir not in sys.path:
+        sys.path.insert(0, web_dir)
+    from modules.chat_pipeline import ChatPipeline, ChatStage
+    from modules.chat_history import collect_finished_replies, render_history
+
+    def answer(text):
+        if "chậm" in text:
+            time.sleep(slow_seconds)
+        return f"Trả lời: {text}"
+
+    pipeline = st.cache_resource(lambda: ChatPipeline([ChatStage("answer", answer, 30.0)]))()
+    if "history" not in st.session_state:
+        st.session_state.history = []
+        st.session_state.pending_turns = set()
+
+    history_box = st.container()
+    user_input = st.chat_input("Nhập câu hỏi của bạn...")
+    if user_input:
+        st.session_state.history.append((user_input, pipeline.submit(user_input)))
+        st.session_state.pending_turns.add(len(st.session_state.history) - 1)
+    with history_box:
+        finished = collect_finished_replies(st.session_state.history, st.session_state.pending_turns)
+        render_history(st.session_state.history, stream_indices=finished)
+
+
+def replies(at):
+    return [bot_msg for _, bot_msg in at.session_state["history"]]
+
+
+def test_slow_reply_does_not_block_next_message():
+    at = AppTest.from_function(chat_page, args=(str(WEB_DIR), SLOW_REPLY_SECONDS), default_timeout=30)
+    at.run()
+
+    start = time.monotonic()
+    at.chat_input[0].set_value("câu chậm").run()
+    assert PENDING_TEXT in [markdown.value for markdown in at.markdown]
+    at.chat_input[0].set_value("câu nhanh").run()
+    assert time.monotonic() - start < SLOW_REPLY_SECONDS / 2
+
+    # Lần chạy kế tiếp (như fragment tự chạy lại): câu nhanh đã xong trong khi câu chậm vẫn đang chờ
+    deadline = time.monotonic() + SLOW_REPLY_SECONDS / 2
+    while replies(at)[1] != "Trả lời: câu nhanh" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        at.run()
+    slow, fast = replies(at)
+    assert fast == "Trả lời: câu nhanh"
+    assert not isinstance(slow, str)
+    assert at.session_state["pending_turns"] == {0}
+
+    time.sleep(SLOW_REPLY_SECONDS)
+    at.run()
+    assert replies(at) == ["Trả lời: câu chậm", "Trả lời: câu nhanh"]
+    assert at.session_state["pending_turns"] == set()
@@ -0,0 +1,155 @@
+# tests/test_chat_pipeline.py
+import threading
+import time
+
+from modules.chat_pipeline import CANCELLED_MESSAGE, DEFAULT_FALLBACK, TIMEOUT_MESSAGE, ChatPipeline, ChatStage
+
+
+def blocking_stage(name, answer, release, timeout=5.0):
+    """Bước trả về `answer` sau khi `release` được set"""
+    def handler(message):
+        release.wait(5)
+        return answer
+    return ChatStage(name, handler, timeout)
+
+
+def instant_stage(name, answer, timeout=5.0):
+    return ChatStage(name, lambda message: answer, timeout)
+
+
+def make_pipeline(*stages, workers_per_stage=4):
+    return ChatPipeline(list(stages), workers_per_stage=workers_per_stage)
+
+
+def test_higher_priority_stage_wins_even_when_slower():
+    release = threading.Event()
+    pipeline = make_pipeline(blocking_stage("local", "cục bộ", release), instant_stage("dialogflow", "dialogflow"))
+    try:
+        pending = pipeline.submit("xin chào")
+        pending.futures["dialogflow"].result(timeout=5)
+        assert not pending.poll()  # bước ưu tiên cao hơn chưa xong
+        release.set()
+        assert pending.wait(poll_interval=0.01) == "cục bộ"
+        assert pending.answered_by == "local"
+    finally:
+        pipeline.shutdown()
+
+
+def test_falls_through_stages_without_answer():
+    pipeline = make_pipeline(instant_stage("local", None), instant_stage("dialogflow", "dialogflow"))
+    try:
+        pending = pipeline.submit("câu hỏi khác")
+        assert pending.wait(poll_interval=0.01) == "dialogflow"
+        assert pending.answered_by == "dialogflow"
+    finally:
+        pipeline.shutdown()
+
+
+def test_timed_out_stage_is_skipped():
+    release = threading.Event()
+    pipeline = make_pipeline(blocking_stage("local", "cục bộ", release, timeout=0.05), instant_stage("dialogflow", "dialogflow"))
+    try:
+        pending = pipeline.submit("xin chào")
+        assert pending.wait(poll_interval=0.01) == "dialogflow"
+        assert pending.timed_out == []  # bước hết giờ bị bỏ qua vì đã có bước sau trả lời
+    finally:
+        release.set()
+        pipeline.shutdown()
+
+
+def test_all_stages_timed_out_or_empty():
+    release = threading.Event()
+    pipeline = make_pipeline(blocking_stage("local", "cục bộ", release, timeout=0.05), instant_stage("dialogflow", None))
+    try:
+        pending = pipeline.submit("xin chào")
+        assert pending.wait(poll_interval=0.01) == TIMEOUT_MESSAGE
+        assert pending.timed_out == ["local"] and pending.answered_by is None
+    finally:
+        release.set()
+        pipeline.shutdown()
+
+    pipeline = make_pipeline(instant_stage("local", None), instant_stage("dialogflow", ""))
+    try:
+        assert pipeline.submit("xin chào").wait(poll_interval=0.01) == DEFAULT_FALLBACK
+    finally:
+        pipeline.shutdown()
+
+
+def test_failed_stage_is_logged_and_does_not_block_later_stages(capsys):
+    def failing(message):
+        raise RuntimeError("lỗi")
+    pipeline = make_pipeline(ChatStage("local", failing, 5.0), instant_stage("dialogflow", "dialogflow"))
+    try:
+        assert pipeline.submit("xin chào").wait(poll_interval=0.01) == "dialogflow"
+    finally:
+        pipeline.shutdown()
+    assert "'local'" in capsys.readouterr().out
+
+
+def test_stage_timeout_starts_when_stage_runs():
+    # Một worker: tin nhắn thứ hai xếp hàng lâu hơn timeout của bước nhưng vẫn được trả lời
+    def answer(message):
+        if message == "chậm":
+            time.sleep(0.5)
+        return f"Trả lời: {message}"
+    pipeline = make_pipeline(ChatStage("local", answer, 0.3), workers_per_stage=1)
+    try:
+        first, second = pipeline.submit("chậm"), pipeline.submit("nhanh")
+        assert first.wait(poll_interval=0.01) == TIMEOUT_MESSAGE
+        assert second.wait(poll_interval=0.01) == "Trả lời: nhanh"
+        assert second.timed_out == []
+    finally:
+        pipeline.shutdown()
+
+
+def test_stage_stuck_in_queue_times_out():
+    release = threading.Event()
+    pipeline = ChatPipeline([blocking_stage("local", "cục bộ", release)], workers_per_stage=1, queue_timeout=0.05)
+    try:
+        pipeline.submit("giữ worker")
+        queued = pipeline.submit("xếp hàng")
+        assert queued.wait(poll_interval=0.01) == TIMEOUT_MESSAGE
+        assert queued.timed_out == ["local"]
+    finally:
+        release.set()
+        pipeline.shutdown()
+
+
+def test_lower_priority_stage_skipped_after_higher_answered():
+    release = threading.Event()
+    handled = []
+
+    def dialogflow(message):
+        handled.append(message)
+        release.wait(5)
+        return "dialogflow"
+
+    pipeline = make_pipeline(ChatStage("local", lambda message: message == "hai" and "cục bộ", 5.0),
+                             ChatStage("dialogflow", dialogflow, 5.0), workers_per_stage=1)
+    try:
+        first = pipeline.submit("một")
+        second = pipeline.submit("hai")  # bước dialogflow xếp hàng sau tin nhắn đầu
+        second.futures["local"].result(timeout=5)
+        release.set()
+        assert first.wait(poll_interval=0.01) == "dialogflow"
+        assert second.futures["dialogflow"].result(timeout=5) is None
+        assert second.skipped == ["dialogflow"] and handled == ["một"]
+        assert second.wait(poll_interval=0.01) == "cục bộ"
+    finally:
+        pipeline.shutdown()
+
+
+def test_cancel_finishes_reply_and_ignores_late_answers():
+    release = threading.Event()
+    pipeline = make_pipeline(blocking_stage("local", "cục bộ", release))
+    try:
+        pending = pipeline.submit("xin chào")
+        pending.cancel()
+        assert pending.done and pending.result == CANCELLED_MESSAGE
+        release.set()
+        pending.futures["local"].result(timeout=5)
+        assert pending.poll() and pending.result == CANCELLED_MESSAGE
+        pending.cancel()
+        assert pending.result == CANCELLED_MESSAGE
+    finally:
+        pipeline.shutdown()
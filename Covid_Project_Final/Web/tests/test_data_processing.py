@@ -0,0 +1,57 @@
+# tests/test_data_processing.py
+import os
+
+import pandas as pd
+import pytest
+
+from modules.data_processing import DatasetHandle, DatasetMutationError, compute_dataset_version
+
+
+def frame(cases):
+    return pd.DataFrame({
+        "location": ["A", "A", "B"],
+        "date": pd.to_datetime(["2022-01-01", "2022-01-02", "2022-01-01"]),
+        "new_cases": cases,
+    })
+
+
+def test_content_version_changes_when_values_change():
+    # Cùng số dòng, số quốc gia và khoảng ngày nhưng khác số liệu: khóa phải khác
+    assert compute_dataset_version(frame([1.0, 2.0, 3.0])) != compute_dataset_version(frame([1.0, 2.0, 4.0]))
+    assert compute_dataset_version(frame([1.0, 2.0, 3.0])) == compute_dataset_version(frame([1.0, 2.0, 3.0]))
+
+
+def test_file_version_follows_source_file(tmp_path):
+    path = tmp_path / "data.csv"
+    frame([1.0, 2.0, 3.0]).to_csv(path, index=False)
+    first = compute_dataset_version(frame([1.0, 2.0, 3.0]), path)
+    frame([1.0, 2.0, 4.0]).to_csv(path, index=False)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert compute_dataset_version(frame([1.0, 2.0, 4.0]), path) != first
+
+
+def test_handle_keeps_version_computed_at_load():
+    handle = DatasetHandle(frame([1.0, 2.0, 3.0]), version="file-abc")
+    assert handle.version == "file-abc"
+
+
+def test_handle_blocks_direct_writes():
+    handle = DatasetHandle(frame([1.0, 2.0, 3.0]), version="file-abc")
+    with pytest.raises(ValueError):
+        handle.frame.loc[0, "new_cases"] = -1
+    with pytest.raises(ValueError):
+        handle.frame.replace(1.0, 9.0, inplace=True)
+    assert handle.frame["new_cases"].tolist() == [1.0, 2.0, 3.0]
+    handle.check_unchanged()
+
+
+def test_handle_detects_column_replaced_by_copy_on_write():
+    handle = DatasetHandle(frame([1.0, 2.0, 3.0]), version="file-abc")
+    column = handle.frame["new_cases"]  # tham chiếu khác tới cột: pandas sao chép thay vì ghi vào mảng chỉ đọc
+    try:
+        handle.frame.loc[0, "new_cases"] = -1
+    except ValueError:
+        return  # pandas không dùng Copy-on-Write: ghi đã bị chặn
+    with pytest.raises(DatasetMutationError):
+        handle.check_unchanged()
+    assert column.tolist() == [1.0, 2.0, 3.0]
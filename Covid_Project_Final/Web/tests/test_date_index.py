@@ -0,0 +1,77 @@
+# tests/test_date_index.py
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from modules.data_query_service import DataQueryService
+from modules.date_index import CountryDateIndex
+
+# Vietnam có dữ liệu ngày 1, 3, 5, 5 (trùng lặp) tháng 1; các hàng không theo thứ tự ngày
+ROWS = [
+    ("Vietnam", "2021-01-05", 50),
+    ("Japan", "2021-01-02", 2),
+    ("Vietnam", "2021-01-01", 10),
+    ("Vietnam", "2021-01-03", 30),
+    ("Vietnam", "2021-01-05", 51),
+]
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "location": [row[0] for row in ROWS],
+        "date": pd.to_datetime([row[1] for row in ROWS]),
+        "new_cases": [row[2] for row in ROWS],
+    })
+
+
+@pytest.fixture
+def index(frame):
+    return CountryDateIndex(frame)
+
+
+def cases(frame, position):
+    return int(frame["new_cases"].iat[position])
+
+
+def test_exact_match_is_case_insensitive(frame, index):
+    position, exact = index.lookup("VIETNAM", date(2021, 1, 3))
+    assert exact and cases(frame, position) == 30
+    position, exact = index.lookup("vietnam", "2021-01-05")
+    assert exact and cases(frame, position) == 50  # ngày trùng lặp: hàng xuất hiện trước
+
+
+@pytest.mark.parametrize("target, expected", [
+    (date(2021, 1, 2), 10),   # cách đều ngày 1 và ngày 3: chọn ngày sớm hơn
+    (date(2021, 1, 4), 30),   # cách đều ngày 3 và ngày 5
+    (date(2020, 12, 1), 10),  # trước ngày đầu tiên
+    (date(2021, 3, 1), 50),   # sau ngày cuối cùng (hàng đầu tiên của ngày trùng lặp)
+])
+def test_nearest_date(frame, index, target, expected):
+    position, exact = index.lookup("Vietnam", target)
+    assert not exact and cases(frame, position) == expected
+
+
+def test_unknown_country(index):
+    assert index.lookup("Atlantis", date(2021, 1, 1)) == (None, False)
+    assert index.lookup_range("Atlantis", date(2021, 1, 1), date(2021, 1, 5)) is None
+    assert index.latest_position("Atlantis") is None
+    assert "Atlantis" not in index and "japan" in index
+
+
+def test_lookup_range_is_inclusive_and_sorted_by_date(frame, index):
+    positions = index.lookup_range("Vietnam", date(2021, 1, 2), date(2021, 1, 5))
+    assert [cases(frame, p) for p in positions] == [30, 50, 51]
+    assert len(index.lookup_range("Vietnam", date(2021, 1, 6), date(2021, 2, 1))) == 0
+    assert len(index.lookup_range("Vietnam", date(2020, 1, 1), date(2021, 1, 1))) == 1
+
+
+def test_latest_row_for_duplicated_date_is_the_first(tmp_path, frame, index):
+    assert cases(frame, index.latest_position("Vietnam")) == 50
+
+    path = tmp_path / "covid.csv"
+    frame.assign(total_cases=0, total_deaths=0, new_deaths=0, people_fully_vaccinated=0).to_csv(path, index=False)
+    service = DataQueryService(path)
+    assert service.get_country_record("Vietnam")["new_cases"] == 50
+    assert service.get_latest_data_date("Vietnam") == date(2021, 1, 5)
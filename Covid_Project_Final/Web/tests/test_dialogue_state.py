@@ -0,0 +1,82 @@
+# tests/test_dialogue_state.py
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from modules.chatbot import DIALOGUE_STATE_MAX_FORECASTS, DialogueState
+from modules.country_mapper import CountryMapper
+from modules.intent_router import INTENT_DATA_QUERY, INTENT_PREDICTION, IntentRouter
+
+TODAY = date(2021, 6, 1)
+
+
+@pytest.fixture(scope="module")
+def router():
+    mapper = CountryMapper(data=pd.DataFrame({"location": ["Japan", "Thailand", "Vietnam"]}))
+    return IntentRouter(lambda: mapper)
+
+
+def turn(state, router, text):
+    return state.resolve(router.parse(text, TODAY))
+
+
+def test_followup_inherits_intent_and_horizon_with_new_country(router):
+    state = DialogueState()
+    first = turn(state, router, "dự đoán Vietnam 5 ngày")
+    assert (first.intent, first.country, first.horizon) == (INTENT_PREDICTION, "Vietnam", 5)
+
+    followup = turn(state, router, "còn Thái Lan thì sao?")
+    assert (followup.intent, followup.country, followup.horizon) == (INTENT_PREDICTION, "Thailand", 5)
+    assert state.country == "Thailand"
+
+
+def test_horizon_only_followup_keeps_previous_country(router):
+    state = DialogueState()
+    turn(state, router, "dự đoán Japan 3 ngày")
+    followup = turn(state, router, "còn 10 ngày thì sao")
+    assert (followup.intent, followup.country, followup.horizon) == (INTENT_PREDICTION, "Japan", 10)
+    assert state.horizon == 10
+
+
+def test_query_without_country_uses_previous_country(router):
+    state = DialogueState()
+    turn(state, router, "dự đoán Vietnam 5 ngày")
+    resolved = turn(state, router, "số liệu ngày 01/05/2021")
+    assert (resolved.intent, resolved.country, resolved.target_date) == (INTENT_DATA_QUERY, "Vietnam", date(2021, 5, 1))
+
+
+def test_followup_without_context_is_left_alone(router):
+    state = DialogueState()
+    resolved = turn(state, router, "còn Thái Lan thì sao?")
+    assert resolved.intent is None and state.intent is None
+
+
+def forecast(start, days):
+    return {start + timedelta(days=i): float(i) for i in range(days)}
+
+
+def test_forecasts_are_evicted_least_recently_used_first():
+    state = DialogueState()
+    starts = [TODAY + timedelta(days=i) for i in range(DIALOGUE_STATE_MAX_FORECASTS)]
+    for start in starts:
+        state.store_forecast("Vietnam", start, forecast(start, 3))
+    assert len(state.forecasts) == DIALOGUE_STATE_MAX_FORECASTS == 8
+
+    assert state.get_forecast("Vietnam", starts[0], 3) is not None  # starts[0] giờ là mục dùng gần đây nhất
+    extra = TODAY + timedelta(days=100)
+    state.store_forecast("Vietnam", extra, forecast(extra, 3))
+    assert len(state.forecasts) == 8
+    assert state.get_forecast("Vietnam", starts[1], 3) is None
+    assert state.get_forecast("Vietnam", starts[0], 3) is not None
+    assert state.get_forecast("Vietnam", extra, 3) is not None
+
+
+def test_longer_forecast_serves_shorter_requests():
+    state = DialogueState()
+    state.store_forecast("Vietnam", TODAY, forecast(TODAY, 7))
+    predictions, _ = state.get_forecast("Vietnam", TODAY, 3)
+    assert list(predictions) == [TODAY + timedelta(days=i) for i in range(3)]
+    assert state.get_forecast("Vietnam", TODAY, 10) is None
+    state.store_forecast("Vietnam", TODAY, forecast(TODAY, 3))  # không ghi đè bằng kết quả ngắn hơn
+    assert state.get_forecast("Vietnam", TODAY, 7) is not None
@@ -0,0 +1,68 @@
+# tests/test_http_api.py
+from datetime import date, timedelta
+
+import pytest
+
+from modules import http_api
+from modules.http_api import _forecast_batch, _validate_forecast_requests, forecast_arrow_table
+
+
+def validate(**item):
+    return _validate_forecast_requests({"requests": [{"country": "Vietnam", **item}]})
+
+
+@pytest.mark.parametrize("days", [True, False, 0, 31, 2.0, "3"])
+def test_rejects_invalid_days(days):
+    items, error = validate(days=days)
+    assert items is None and "'days'" in error
+
+
+@pytest.mark.parametrize("start_date", ["2022-13-01", "01/02/2022", "hôm qua", 20220101, ""])
+def test_rejects_malformed_start_date(start_date):
+    items, error = validate(start_date=start_date)
+    assert items is None and "'start_date'" in error
+
+
+@pytest.mark.parametrize("start_date, expected", [
+    ("2022-02-01", date(2022, 2, 1)), ("01-02-2022", date(2022, 2, 1)), (None, None)
+])
+def test_normalizes_start_date(start_date, expected):
+    items, error = validate(start_date=start_date, days=5)
+    assert error is None
+    assert items == [{"country": "Vietnam", "start_date": expected, "days": 5}]
+
+
+def test_forecast_batch_runs_one_rollout_per_group(monkeypatch, make_service, countries, last_date):
+    service = make_service()
+    monkeypatch.setattr(http_api, "_forecast_service", service)
+    start = last_date + timedelta(days=1)
+    items = [{"country": country, "start_date": start, "days": 3} for country in countries[:3]]
+    items.insert(1, {"country": "Atlantis", "start_date": start, "days": 3})
+    items.append({"country": countries[0], "start_date": start, "days": 2})
+
+    results = _forecast_batch(items)
+
+    assert [r["country"] for r in results] == [item["country"] for item in items]
+    assert "error" in results[1]
+    assert all("error" not in r and len(r["predicted"]) == item["days"]
+               for r, item in zip(results, items) if r is not results[1])
+    # Nhóm (start, 3 ngày): 3 lời gọi 3 dòng + 3 lời gọi MC dropout; nhóm (start, 2 ngày): 2 + 2
+    point_calls = [rows for rows, training in service.model.calls if not training]
+    assert point_calls == [3, 3, 3, 1, 1]
+    assert sum(training for _, training in service.model.calls) == 5
+
+
+def test_arrow_table_keeps_failed_requests_as_error_rows(monkeypatch, make_service, countries, last_date):
+    monkeypatch.setattr(http_api, "_forecast_service", make_service())
+    start = last_date + timedelta(days=1)
+    results = _forecast_batch([
+        {"country": countries[0], "start_date": start, "days": 2},
+        {"country": "Atlantis", "start_date": start, "days": 2},
+    ])
+
+    rows = forecast_arrow_table(results).to_pylist()
+    assert [(row["country"], row["date"]) for row in rows] == [
+        (countries[0], start.isoformat()), (countries[0], (start + timedelta(days=1)).isoformat()), ("Atlantis", None)
+    ]
+    assert rows[0]["error"] is None and rows[0]["predicted"] is not None
+    assert rows[2]["error"] == results[1]["error"] and rows[2]["predicted"] is None
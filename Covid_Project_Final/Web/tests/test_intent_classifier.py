@@ -0,0 +1,129 @@
+# tests/test_intent_classifier.py
+import json
+
+import pytest
+
+from modules.intent_classifier import (
+    DEGRADED_MESSAGE, LocalFirstNLU, LocalIntentClassifier, load_intents, load_intents_from_dialogflow_export,
+    save_intents
+)
+from modules.nlu_client import NLUUnavailableError
+
+INTENTS = [
+    {"intent": "greeting", "phrases": ["xin chào", "chào bạn"], "response": "Chào bạn!"},
+    {"intent": "symptoms", "phrases": ["triệu chứng covid là gì", "dấu hiệu nhiễm covid"],
+     "response": "Sốt, ho, mệt mỏi."},
+    {"intent": "vaccine", "phrases": ["vắc xin covid có an toàn không", "tiêm vắc xin ở đâu"],
+     "response": "Vắc xin đã được cấp phép."},
+]
+
+
+class StubRemote:
+    """Thay cho Dialogflow: trả lời cố định hoặc ném NLUUnavailableError"""
+
+    def __init__(self, answer="từ xa", error=None):
+        self.answer = answer
+        self.error = error
+        self.calls = []
+
+    def __call__(self, text, session_id):
+        self.calls.append(text)
+        if self.error:
+            raise self.error
+        return self.answer
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return LocalIntentClassifier(INTENTS)
+
+
+def test_answers_known_phrases_with_or_without_diacritics(classifier):
+    assert classifier.answer("Xin chào!") == "Chào bạn!"
+    assert classifier.answer("trieu chung covid la gi") == "Sốt, ho, mệt mỏi."
+
+
+def test_score_threshold_rejects_unrelated_text(classifier):
+    intent, score, _ = classifier.classify("giá vàng hôm nay")
+    assert score < classifier.min_score
+    assert classifier.answer("giá vàng hôm nay") is None
+    # Cùng câu được chấp nhận khi hạ ngưỡng điểm xuống dưới điểm của nó
+    assert classifier.answer("giá vàng hôm nay", min_score=score / 2, min_margin=0.0) == classifier.responses[intent]
+
+
+def test_margin_threshold_rejects_ambiguous_text():
+    ambiguous = LocalIntentClassifier([
+        {"intent": "a", "phrases": ["covid là gì"], "response": "A"},
+        {"intent": "b", "phrases": ["covid là gì à"], "response": "B"},
+    ])
+    intent, score, margin = ambiguous.classify("covid là gì")
+    assert intent == "a" and score >= ambiguous.min_score and margin < ambiguous.min_margin
+    assert ambiguous.answer("covid là gì") is None
+    assert ambiguous.answer("covid là gì", min_margin=0.0) == "A"
+
+
+def test_local_hit_skips_remote(classifier):
+    remote = StubRemote()
+    nlu = LocalFirstNLU(classifier, remote)
+    assert nlu("xin chào", "s1") == "Chào bạn!"
+    assert remote.calls == []
+    assert nlu.get_stats()["local_hits"] == 1
+
+
+def test_uncertain_text_goes_to_remote(classifier):
+    remote = StubRemote()
+    nlu = LocalFirstNLU(classifier, remote)
+    assert nlu("giá vàng hôm nay", "s1") == "từ xa"
+    assert remote.calls == ["giá vàng hôm nay"]
+    assert nlu.get_stats()["remote_calls"] == 1
+
+
+def test_remote_unavailable_falls_back_to_lower_threshold(classifier):
+    nlu = LocalFirstNLU(classifier, StubRemote(error=NLUUnavailableError("mất kết nối")), fallback_min_score=0.3)
+    text = "tiêm vắc xin covid"  # đủ giống intent vaccine cho ngưỡng dự phòng nhưng không cho ngưỡng thường
+    assert classifier.answer(text) is None
+    assert nlu(text, "s1") == "Vắc xin đã được cấp phép."
+    assert nlu("giá vàng hôm nay", "s1") == DEGRADED_MESSAGE
+    assert nlu.get_stats()["fallbacks"] == 2
+
+
+def test_remote_unavailable_without_classifier_is_degraded():
+    nlu = LocalFirstNLU(None, StubRemote(error=NLUUnavailableError("mất kết nối")))
+    assert nlu("xin chào", "s1") == DEGRADED_MESSAGE
+
+
+def write_export(export_dir):
+    intents_dir = export_dir / "intents"
+    intents_dir.mkdir(parents=True)
+
+    def intent(name, phrases, speech, **extra):
+        (intents_dir / f"{name}.json").write_text(json.dumps({
+            "name": name, "responses": [{"messages": [{"lang": "vi", "speech": speech}]}], **extra
+        }), encoding="utf-8")
+        (intents_dir / f"{name}_usersays_vi.json").write_text(json.dumps([
+            {"data": [{"text": part} for part in phrase]} for phrase in phrases
+        ]), encoding="utf-8")
+
+    intent("greeting", [["xin ", "chào"]], ["Chào bạn!"])
+    intent("weather", [["thời tiết ", "hôm nay"]], "Trời đẹp.", webhookUsed=True)
+
+
+def test_export_round_trip(tmp_path):
+    write_export(tmp_path / "agent")
+    intents = load_intents_from_dialogflow_export(tmp_path / "agent")
+    assert intents == [{"intent": "greeting", "phrases": ["xin chào"], "response": "Chào bạn!"}]
+
+    path = tmp_path / "local_intents.json"
+    save_intents(intents, path)
+    assert json.loads(path.read_text(encoding="utf-8"))["source"] == "dialogflow-export"
+    assert load_intents(path, export_dir=None) == intents
+    assert load_intents(path, export_dir=tmp_path / "agent") == intents
+
+
+def test_shipped_seed_file_is_marked_and_self_consistent(capsys):
+    intents = load_intents(export_dir=None)
+    assert "bộ intent mẫu" in capsys.readouterr().out
+    classifier = LocalIntentClassifier(intents)
+    for item in intents:
+        for phrase in item["phrases"]:
+            assert classifier.classify(phrase)[0] == item["intent"]
@@ -0,0 +1,156 @@
+# tests/test_intent_router.py
+import re
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from modules.country_mapper import CountryMapper
+from modules.intent_router import (
+    DATA_QUERY_KEYWORDS, INTENT_DATA_QUERY, INTENT_OVERVIEW, INTENT_PREDICTION, OVERVIEW_KEYWORDS,
+    PREDICTION_EXCLUSION_KEYWORDS, PREDICTION_KEYWORDS, IntentRouter, match_keywords, normalize_message,
+    parse_date, parse_horizon
+)
+
+LOCATIONS = ["Guinea", "Guinea-Bissau", "Papua New Guinea", "Japan", "South Africa", "Thailand",
+             "United States", "Vietnam"]
+
+CORPUS = [
+    "dự đoán Vietnam 5 ngày tới",
+    "Dự báo covid Thái Lan 7 ngày",
+    "dữ liệu covid của Mỹ",
+    "so lieu Japan ngay 12/03/2022",
+    "tổng quan tình hình covid",
+    "thống kê Thailand",
+    "covid là gì",
+    "cảm ơn bạn nhiều",
+    "predict cases for Japan next 10 days",
+    "data for united states on 01/06/21",
+    "số ca nhiễm ở Nhật vào ngày 15/08/2021",
+    "tương lai dịch bệnh ở Guinea-Bissau ra sao",
+    "overview",
+    "dự đoán ngày mai ở Việt Nam",
+    "du bao thai lan tuan toi",
+    "thong ke south africa",
+    "du doan vietnam 45 ngay",
+    "dự đoán Mỹ ngày 31/02/2022 hoặc 01/03/2022",
+    "dự báo Japan 01/02/21 hoặc 03/04/2022",
+    "forecast Vietnam 7 days, tối đa 5 ngày",
+    "dữ liệu dự đoán Vietnam",
+    "forecast Papua New Guinea 3 days",
+    "so sánh số liệu Vietnam và Japan",
+    "dự đoán Thailand, Guinea và Nhật 2 ngày",
+    "statistics usa tháng tới",
+    "có nên đi du lịch Singapore không",
+]
+
+
+@pytest.fixture(scope="module")
+def mapper():
+    return CountryMapper(data=pd.DataFrame({"location": LOCATIONS}))
+
+
+@pytest.fixture(scope="module")
+def router(mapper):
+    return IntentRouter(lambda: mapper)
+
+
+# --- Các lượt quét từ khóa cũ của chatbot.py (trước khi có IntentRouter) ---
+
+def legacy_find_country(mapper, text):
+    text_lower = text.lower().strip()
+    for country in mapper.supported_countries:
+        if country.lower() in text_lower:
+            if re.search(r'\b' + re.escape(country.lower()) + r'\b', text_lower):
+                return country
+    for alias, country in mapper.country_aliases.items():
+        if alias in text_lower:
+            if re.search(r'\b' + re.escape(alias) + r'\b', text_lower):
+                return country
+    return None
+
+
+def legacy_extract_date(text):
+    text_lower = text.lower()
+    for pattern in [r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', r'(\d{1,2})[/-](\d{1,2})[/-](\d{2})']:
+        match = re.search(pattern, text_lower)
+        if match:
+            day, month, year = match.groups()
+            if len(year) == 2:
+                year = "20" + year if int(year) < 50 else "19" + year
+            try:
+                return datetime(int(year), int(month), int(day)).date()
+            except ValueError:
+                continue
+    if "ngày mai" in text_lower or "ngay mai" in text_lower:
+        return (datetime.now() + timedelta(days=1)).date()
+    if "ngày kia" in text_lower or "ngay kia" in text_lower:
+        return (datetime.now() + timedelta(days=2)).date()
+    if "tuần tới" in text_lower or "tuan toi" in text_lower:
+        return (datetime.now() + timedelta(weeks=1)).date()
+    if "tháng tới" in text_lower or "thang toi" in text_lower:
+        return (datetime.now() + timedelta(days=30)).date()
+    return None
+
+
+def legacy_extract_days(text):
+    for pattern in [r'(\d+)\s*ngày', r'(\d+)\s*day', r'(\d+)\s*days']:
+        match = re.search(pattern, text.lower())
+        if match:
+            return min(int(match.group(1)), 30)
+    return 3
+
+
+def legacy_route(mapper, text):
+    """(intent, quốc gia, ngày, số ngày) theo thứ tự xử lý cũ: truy vấn dữ liệu trước, rồi dự đoán"""
+    text_lower = text.lower()
+    has_data = any(keyword in text_lower for keyword in DATA_QUERY_KEYWORDS)
+    is_prediction = any(keyword in text_lower for keyword in PREDICTION_EXCLUSION_KEYWORDS)
+    if has_data and not is_prediction:
+        if any(keyword in text_lower for keyword in OVERVIEW_KEYWORDS):
+            return (INTENT_OVERVIEW, None, None, None)
+        return (INTENT_DATA_QUERY, legacy_find_country(mapper, text), legacy_extract_date(text), None)
+    if any(keyword in text_lower for keyword in PREDICTION_KEYWORDS):
+        return (INTENT_PREDICTION, legacy_find_country(mapper, text), legacy_extract_date(text),
+                legacy_extract_days(text))
+    return (None, None, None, None)
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_router_matches_legacy_keyword_scans(router, mapper, text):
+    parsed = router.parse(text, datetime.now().date())
+    expected = legacy_route(mapper, text)
+    if parsed.intent == INTENT_OVERVIEW or parsed.intent is None:
+        assert (parsed.intent, None, None, None) == expected
+    elif parsed.intent == INTENT_DATA_QUERY:
+        assert (parsed.intent, parsed.country, parsed.target_date, None) == expected
+    else:
+        assert (parsed.intent, parsed.country, parsed.target_date, parsed.horizon) == expected
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_parse_date_and_horizon_match_legacy(text):
+    text_lower = normalize_message(text)
+    _, matched = match_keywords(text_lower)
+    assert parse_date(text_lower, matched, datetime.now().date()) == legacy_extract_date(text)
+    assert parse_horizon(text_lower) == legacy_extract_days(text)
+
+
+@pytest.mark.parametrize("text", [
+    "so sánh Vietnam và Japan",          # cả hai là tên chính thức: Japan đứng trước trong danh sách
+    "Thái Lan hay Việt Nam",             # cả hai là alias: "thái lan" được khai báo trước "việt nam"
+    "vietnam và mỹ",                     # tên chính thức thắng alias dù đứng sau
+    "papua new guinea",                  # "guinea" (đứng trước trong danh sách) nằm trong tên dài hơn
+    "guinea-bissau",
+    "nhật và hàn quốc",
+    "không có quốc gia nào",
+])
+def test_find_country_keeps_legacy_choice_for_several_countries(mapper, text):
+    assert mapper.find_country(text) == legacy_find_country(mapper, text)
+
+
+def test_followup_keywords_match_whole_words(router):
+    assert router.parse("còn Thái Lan thì sao?").is_followup
+    assert router.parse("va o nhat").is_followup
+    assert "followup" not in router.parse("java on Thailand").families
+    assert not router.parse("Thailand").is_followup
@@ -0,0 +1,34 @@
+# tests/test_ml_analysis.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.ml_analysis import fit_ols_lines_by_group
+
+
+def test_fits_one_line_per_group():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 100, 40)
+    group = np.repeat(["Asia", "Europe"], 20)
+    y = np.where(group == "Asia", 2.0 * x + 5, -1.5 * x + 300) + rng.normal(0, 1, 40)
+    data = pd.DataFrame({"x": x, "y": y, "continent": group})
+
+    lines = fit_ols_lines_by_group(data, "x", "y", "continent")
+    assert list(lines) == ["Asia", "Europe"]
+    for name, (slope, intercept, r2, x_min, x_max) in lines.items():
+        rows = data[data["continent"] == name]
+        expected_slope, expected_intercept = np.polyfit(rows["x"], rows["y"], 1)
+        assert slope == pytest.approx(expected_slope) and intercept == pytest.approx(expected_intercept)
+        assert 0.9 < r2 <= 1.0
+        assert (x_min, x_max) == (rows["x"].min(), rows["x"].max())
+
+
+def test_skips_groups_without_two_distinct_x_and_missing_values():
+    data = pd.DataFrame({
+        "x": [1.0, 2.0, 3.0, 5.0, 5.0, 7.0, np.nan],
+        "y": [1.0, 2.0, 3.0, 1.0, 2.0, 4.0, 1.0],
+        "continent": ["Asia", "Asia", "Asia", "Africa", "Africa", None, "Oceania"],
+    })
+    lines = fit_ols_lines_by_group(data, "x", "y", "continent")
+    assert list(lines) == ["Asia"]
+    assert lines["Asia"][:2] == pytest.approx((1.0, 0.0))
@@ -0,0 +1,60 @@
+# tests/test_model_server.py
+import threading
+
+import numpy as np
+
+from modules.model_server import MicroBatcher
+
+HORIZON = 3
+
+
+def predict_batch(calls):
+    """Đầu ra (N, HORIZON): hàng i = mã quốc gia của hàng i + 0.1·h, để nhận ra kết quả thuộc yêu cầu nào"""
+    def predict(sequences, countries):
+        calls.append(len(sequences))
+        return countries.reshape(-1, 1) + 0.1 * np.arange(1, HORIZON + 1)
+    return predict
+
+
+def test_splits_batched_results_back_to_each_caller():
+    calls = []
+    batcher = MicroBatcher(predict_batch(calls), max_batch_size=64, max_wait=0.2)
+    requests = {country: np.full(rows, country) for country, rows in ((1, 2), (2, 1), (3, 4))}
+    futures = {country: batcher.submit(np.zeros((len(ids), 7, 5)), ids) for country, ids in requests.items()}
+
+    for country, future in futures.items():
+        result = future.result(timeout=5)
+        assert result.shape == (len(requests[country]), HORIZON)
+        np.testing.assert_allclose(result, np.tile(country + 0.1 * np.arange(1, HORIZON + 1), (len(requests[country]), 1)))
+    assert calls == [7]
+    assert batcher.get_stats() == {"batches": 1, "rows": 7, "avg_batch_size": 7.0}
+
+
+def test_concurrent_callers_get_their_own_rows():
+    calls = []
+    batcher = MicroBatcher(predict_batch(calls), max_batch_size=8, max_wait=0.05)
+    results = {}
+
+    def client(country):
+        ids = np.full(3, country)
+        results[country] = batcher.submit(np.zeros((3, 7, 5)), ids).result(timeout=5)
+
+    threads = [threading.Thread(target=client, args=(country,)) for country in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(calls) == 30
+    for country, result in results.items():
+        np.testing.assert_allclose(result[:, 0], country + 0.1)
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    def failing(sequences, countries):
+        raise RuntimeError("model lỗi")
+
+    batcher = MicroBatcher(failing, max_wait=0.1)
+    futures = [batcher.submit(np.zeros((1, 7, 5)), [i]) for i in range(3)]
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
@@ -0,0 +1,137 @@
+# tests/test_nlu_client.py
+import random
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from modules.nlu_client import CircuitBreaker, DialogflowClient, NLUUnavailableError, RetryPolicy
+
+
+class Unavailable(Exception):
+    """Thay cho google.api_core.exceptions.ServiceUnavailable (lỗi tạm thời, được thử lại)"""
+
+
+class InvalidArgument(Exception):
+    """Thay cho google.api_core.exceptions.InvalidArgument (lỗi của request, không thử lại)"""
+
+
+class FakeSessions:
+    """SessionsClient giả: lần lượt dùng các phần tử của `script` (ngoại lệ thì ném, chuỗi thì trả lời),
+    mỗi lần gọi chờ `latency` giây (không quá timeout của lần gọi)"""
+
+    def __init__(self, script=(), latency=0.0):
+        self.script = list(script)
+        self.latency = latency
+        self.timeouts = []
+
+    def session_path(self, project_id, session_id):
+        return f"projects/{project_id}/agent/sessions/{session_id}"
+
+    def detect_intent(self, request, timeout, retry):
+        self.timeouts.append(timeout)
+        outcome = self.script.pop(0) if self.script else "ok"
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+            if self.latency > timeout:
+                raise Unavailable("deadline exceeded")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(query_result=SimpleNamespace(fulfillment_text=outcome))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(sessions, deadline=1.0, max_attempts=3, base_delay=0.05, breaker=None, sleep=time.sleep):
+    return DialogflowClient(
+        "test", sessions_client=sessions, deadline=deadline, retryable=(Unavailable,), sleep=sleep,
+        retry=RetryPolicy(max_attempts=max_attempts, base_delay=base_delay, max_delay=0.2, rng=random.Random(0)),
+        breaker=breaker or CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    )
+
+
+def test_retries_transient_errors_with_bounded_backoff():
+    delays = []
+    sessions = FakeSessions([Unavailable("1"), Unavailable("2"), "trả lời"])
+    client = make_client(sessions, sleep=lambda delay: delays.append(delay))
+    assert client.detect_intent("xin chào", "s1").fulfillment_text == "trả lời"
+    assert len(sessions.timeouts) == 3 and client.retries == 2
+    for attempt, delay in enumerate(delays):
+        assert 0 <= delay <= min(0.2, 0.05 * 2 ** attempt)
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retries_stop_at_the_deadline():
+    sessions = FakeSessions([Unavailable(str(i)) for i in range(10)], latency=0.1)
+    client = make_client(sessions, deadline=0.3, max_attempts=10, base_delay=0.01)
+    start = time.monotonic()
+    with pytest.raises(NLUUnavailableError):
+        client.detect_intent("xin chào", "s1")
+    assert time.monotonic() - start < 0.3 + 0.1
+    # Mỗi lần thử chỉ được dùng phần còn lại của deadline tổng
+    assert all(timeout <= 0.3 for timeout in sessions.timeouts)
+    assert sessions.timeouts == sorted(sessions.timeouts, reverse=True)
+    assert 2 <= len(sessions.timeouts) < 10
+
+
+def test_client_errors_are_raised_and_do_not_open_breaker():
+    sessions = FakeSessions([InvalidArgument("câu hỏi lỗi")] * 5)
+    client = make_client(sessions)
+    for _ in range(5):
+        with pytest.raises(InvalidArgument):
+            client.detect_intent("???", "s1")
+    assert len(sessions.timeouts) == 5  # không thử lại
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.get_stats()["client_errors"] == 5 and client.failures == 0
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0, clock=clock)
+    sessions = FakeSessions([Unavailable("1"), Unavailable("2"), Unavailable("3"), "trả lời"])
+    client = make_client(sessions, max_attempts=1, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(NLUUnavailableError):
+            client.detect_intent("xin chào", "s1")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # Đang mở: từ chối ngay, không gọi mạng
+    with pytest.raises(NLUUnavailableError):
+        client.detect_intent("xin chào", "s1")
+    assert len(sessions.timeouts) == 2 and client.rejected == 1
+
+    # Hết reset_timeout: một lời gọi thử thất bại thì mở lại
+    clock.now += 10.0
+    with pytest.raises(NLUUnavailableError):
+        client.detect_intent("xin chào", "s1")
+    assert breaker.state == CircuitBreaker.OPEN and breaker.times_opened == 2
+
+    # Lời gọi thử thành công thì đóng mạch
+    clock.now += 10.0
+    assert breaker.allow() and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()  # chỉ một lời gọi thử tại một thời điểm
+    breaker.record_ignored()
+    assert client.detect_intent("xin chào", "s1").fulfillment_text == "trả lời"
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.consecutive_failures == 0
+
+
+def test_client_error_during_half_open_probe_keeps_breaker_undecided():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=clock)
+    client = make_client(FakeSessions([Unavailable("1"), InvalidArgument("lỗi"), "trả lời"]), max_attempts=1,
+                         breaker=breaker)
+    with pytest.raises(NLUUnavailableError):
+        client.detect_intent("xin chào", "s1")
+    clock.now += 10.0
+    with pytest.raises(InvalidArgument):
+        client.detect_intent("???", "s1")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert client.detect_intent("xin chào", "s1").fulfillment_text == "trả lời"
+    assert breaker.state == CircuitBreaker.CLOSED
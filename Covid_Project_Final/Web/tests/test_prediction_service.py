@@ -0,0 +1,117 @@
+# tests/test_prediction_service.py
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from modules.prediction_service import INTERVAL_QUANTILES
+
+DAYS = 5
+
+
+def test_intervals_contain_point_forecast(make_service, countries, last_date):
+    service = make_service(noise=0.2)
+    start = last_date + timedelta(days=1)
+    intervals, error = service.predict_intervals_batch(countries, start, DAYS, samples=64)
+    assert error is None
+    predictions, errors = service.predict_cases_batch(countries, start, DAYS)
+    assert errors == {}
+    for country in countries:
+        assert list(intervals[country]) == list(predictions[country])
+        for day, (lower, upper) in intervals[country].items():
+            assert lower <= predictions[country][day] <= upper
+
+
+def test_intervals_run_all_samples_in_one_call_per_day(make_service, countries, last_date):
+    service = make_service()
+    service.predict_intervals_batch(countries, last_date + timedelta(days=1), DAYS, samples=16)
+    assert service.model.calls == [(len(countries) * 16, True)] * DAYS
+
+
+def test_wider_quantiles_give_nested_intervals(make_service, countries, last_date):
+    start = last_date + timedelta(days=1)
+    narrow, _ = make_service(seed=1).predict_intervals_batch(countries, start, DAYS, samples=64, quantiles=(0.25, 0.75))
+    wide, _ = make_service(seed=1).predict_intervals_batch(countries, start, DAYS, samples=64, quantiles=INTERVAL_QUANTILES)
+    for country in countries:
+        for day, (lower, upper) in narrow[country].items():
+            assert wide[country][day][0] <= lower <= upper <= wide[country][day][1]
+
+
+def test_intervals_collapse_without_dropout_noise(make_service, countries, last_date):
+    service = make_service(noise=0.0)
+    start = last_date + timedelta(days=1)
+    intervals, _ = service.predict_intervals_batch(countries[:1], start, DAYS, samples=8)
+    predictions, _ = service.predict_cases_batch(countries[:1], start, DAYS)
+    for day, (lower, upper) in intervals[countries[0]].items():
+        assert lower == pytest.approx(upper) == pytest.approx(predictions[countries[0]][day])
+
+
+def forecast(service, country, first_day, days=DAYS, history_days=10):
+    predictions = {first_day + timedelta(days=i): float(i) for i in range(days)}
+    return service.build_forecast_result(country, predictions, history_days=history_days)
+
+
+def observed(service, country, days):
+    return [service.get_actual_data(country, day) for day in days]
+
+
+def test_forecast_result_at_start_of_data(make_service, countries):
+    service = make_service()
+    first_day = service.data["date"].min().date()
+    result = forecast(service, countries[0], first_day)
+    assert len(result.history_dates) == 0
+    assert result.actual.tolist() == observed(service, countries[0], [first_day + timedelta(days=i) for i in range(DAYS)])
+
+
+def test_forecast_result_across_end_of_data(make_service, countries, last_date):
+    service = make_service()
+    first_day = last_date - timedelta(days=1)
+    result = forecast(service, countries[0], first_day)
+    assert result.actual[:2].tolist() == observed(service, countries[0], [first_day, last_date])
+    assert np.isnan(result.actual[2:]).all()
+    expected_history = [first_day - timedelta(days=i) for i in range(10, 0, -1)]
+    assert result.history_dates.tolist() == expected_history
+    assert result.history_values.tolist() == observed(service, countries[0], expected_history)
+
+
+def test_forecast_result_outside_data(make_service, countries, last_date):
+    service = make_service()
+    before = forecast(service, countries[0], service.data["date"].min().date() - timedelta(days=DAYS + 1))
+    assert np.isnan(before.actual).all() and len(before.history_dates) == 0
+
+    after = forecast(service, countries[0], last_date + timedelta(days=30))
+    assert np.isnan(after.actual).all() and len(after.history_dates) == 0
+
+
+def last_observed(service, country, day):
+    """new_cases_log (đã scale) của ngày cuối trong cửa sổ đầu vào trước `day`"""
+    (window, _), error = service.prepare_sequence_data(country, day)
+    assert error is None
+    return window[-1, 0]
+
+
+@pytest.mark.parametrize("horizon, calls", [(1, 7), (3, 3), (7, 1), (10, 1)])
+def test_rollout_chains_blocks_after_data_ends(make_service, countries, last_date, horizon, calls):
+    service = make_service(horizon=horizon)
+    start = last_date + timedelta(days=1)
+    dates, scaled, error = service._rollout(countries, start, 7)
+    assert error is None
+    assert dates == [start + timedelta(days=i) for i in range(7)]
+    assert scaled.shape == (len(countries), 1, 7)
+    assert service.model.calls == [(len(countries), False)] * calls
+    # Mô hình giả cộng 0.01 mỗi ngày kể từ ngày cuối của cửa sổ: nối đúng các đoạn thì ngày +d luôn là L + 0.01·d
+    for i, country in enumerate(countries):
+        expected = last_observed(service, country, start) + 0.01 * np.arange(1, 8)
+        np.testing.assert_allclose(scaled[i, 0], expected, atol=1e-5)
+
+
+def test_rollout_uses_observed_window_when_block_starts_inside_data(make_service, countries, last_date):
+    service = make_service(horizon=3)
+    start = last_date - timedelta(days=4)
+    _, scaled, error = service._rollout(countries[:1], start, 7)
+    assert error is None
+    # Đoạn 2 bắt đầu ở start + 3 (vẫn có dữ liệu đến hôm trước): dùng cửa sổ thực tế thay vì giá trị dự đoán
+    second = last_observed(service, countries[0], start + timedelta(days=3))
+    np.testing.assert_allclose(scaled[0, 0, 3:6], second + 0.01 * np.arange(1, 4), atol=1e-5)
+    # Đoạn 3 (start + 6 = sau ngày cuối + 1 ngày) nối tiếp từ giá trị dự đoán của đoạn 2
+    np.testing.assert_allclose(scaled[0, 0, 6], scaled[0, 0, 5] + 0.01, atol=1e-5)
@@ -0,0 +1,105 @@
+# tests/test_response_cache.py
+import sqlite3
+
+import pytest
+
+from modules import response_cache
+from modules.response_cache import CachedRemoteNLU, ResponseCache
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def rows(path):
+    with sqlite3.connect(str(path)) as db:
+        return dict(db.execute("SELECT key, expires_at FROM responses").fetchall())
+
+
+@pytest.mark.parametrize("variant", ["COVID là gì?", "covid la gi", "  Covid   LÀ gì !!"])
+def test_normalization_equivalent_questions_share_an_entry(variant):
+    cache = ResponseCache()
+    cache.set("Covid là gì", "Một bệnh truyền nhiễm.")
+    assert cache.get(variant) == "Một bệnh truyền nhiễm."
+    assert cache.get("covid lây thế nào") is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.set("xin chào", "Chào bạn!")
+    clock.now += 59
+    assert cache.get("xin chào") == "Chào bạn!"
+    clock.now += 1
+    assert cache.get("xin chào") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set("một", "1")
+    cache.set("hai", "2")
+    assert cache.get("một") == "1"  # "hai" giờ là mục ít dùng gần đây nhất
+    cache.set("ba", "3")
+    assert cache.get("hai") is None
+    assert cache.get("một") == "1" and cache.get("ba") == "3"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_sqlite_entry_keeps_its_stored_expiry(tmp_path, clock):
+    path = tmp_path / "responses.db"
+    ResponseCache(ttl_seconds=100, sqlite_path=path).set("xin chào", "Chào bạn!")
+
+    clock.now += 90
+    other = ResponseCache(ttl_seconds=100, sqlite_path=path)
+    assert other.get("xin chào") == "Chào bạn!"
+    assert other.get_stats()["sqlite_hits"] == 1
+    clock.now += 10
+    # Mục lấy từ SQLite hết hạn theo expires_at đã lưu, không được thêm 100 giây tính từ lúc đọc
+    assert other.get("xin chào") is None
+
+
+def test_sqlite_table_is_pruned_and_bounded(tmp_path, clock):
+    path = tmp_path / "responses.db"
+    cache = ResponseCache(ttl_seconds=100, sqlite_path=path, sqlite_max_rows=3)
+    for i in range(5):
+        cache.set(f"câu {i}", f"trả lời {i}")
+        clock.now += 1
+    assert sorted(rows(path)) == ["cau 2", "cau 3", "cau 4"]
+
+    clock.now += 98  # "câu 2" và "câu 3" đã hết hạn
+    ResponseCache(ttl_seconds=100, sqlite_path=path, sqlite_max_rows=3)
+    assert sorted(rows(path)) == ["cau 4"]
+
+
+def test_clear_survives_sqlite_errors(tmp_path, capsys):
+    cache = ResponseCache(sqlite_path=tmp_path / "responses.db")
+    cache.set("xin chào", "Chào bạn!")
+    cache._db.close()
+    cache.clear()
+    assert cache.get_stats()["entries"] == 0
+    assert "SQLite" in capsys.readouterr().out
+
+
+def test_cached_remote_only_stores_cacheable_answers():
+    calls = []
+
+    def remote(text, session_id):
+        calls.append(text)
+        return f"trả lời {text}", text != "theo phiên"
+
+    nlu = CachedRemoteNLU(remote, ResponseCache())
+    for _ in range(2):
+        nlu("xin chào", "s1")
+        nlu("theo phiên", "s1")
+    assert calls == ["xin chào", "theo phiên", "theo phiên"]
@@ -0,0 +1,89 @@
+# tests/test_shared_dataset.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.shared_dataset import attach_or_build, read_arrow_file, read_arrow_table, write_arrow_file
+
+FINGERPRINT = "abc123"
+
+
+def build():
+    return pd.DataFrame({"x": [1.0, 2.0, 3.0]})
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def write_lock(directory, pid, created_at):
+    lock_path = directory / f"frame-{FINGERPRINT}.lock"
+    lock_path.write_text(f"{pid} {created_at}")
+    return lock_path
+
+
+def test_builds_writes_and_releases_lock(tmp_path):
+    frame = attach_or_build("frame", FINGERPRINT, build, tmp_path)
+    assert frame["x"].tolist() == [1.0, 2.0, 3.0]
+    assert (tmp_path / f"frame-{FINGERPRINT}.arrow").exists()
+    assert not (tmp_path / f"frame-{FINGERPRINT}.lock").exists()
+
+
+def test_breaks_lock_of_dead_builder(tmp_path):
+    lock_path = write_lock(tmp_path, dead_pid(), time.time())
+    start = time.monotonic()
+    frame = attach_or_build("frame", FINGERPRINT, build, tmp_path, timeout=30)
+    assert time.monotonic() - start < 5
+    assert frame["x"].tolist() == [1.0, 2.0, 3.0]
+    assert not lock_path.exists()
+    assert (tmp_path / f"frame-{FINGERPRINT}.arrow").exists()
+
+
+def test_breaks_expired_lock_of_live_process(tmp_path):
+    lock_path = write_lock(tmp_path, os.getpid(), time.time() - 60)
+    frame = attach_or_build("frame", FINGERPRINT, build, tmp_path, timeout=30)
+    assert frame is not None and not lock_path.exists()
+
+
+def test_waits_for_live_builder(tmp_path):
+    lock_path = write_lock(tmp_path, os.getpid(), time.time())
+
+    def finish_build():
+        time.sleep(0.3)
+        write_arrow_file(pd.DataFrame({"x": [9.0]}), tmp_path / f"frame-{FINGERPRINT}.arrow")
+        lock_path.unlink()
+
+    builder = threading.Thread(target=finish_build)
+    builder.start()
+    frame = attach_or_build("frame", FINGERPRINT, build, tmp_path, timeout=30)
+    builder.join()
+    # Dùng file do process đang giữ khóa ghi ra, không tự dựng
+    assert frame["x"].tolist() == [9.0]
+
+
+def column_values(table, name="x"):
+    return table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+
+
+def test_attaches_share_memory_mapped_buffers(tmp_path):
+    path = tmp_path / "frame.arrow"
+    write_arrow_file(pd.DataFrame({"x": np.arange(1000.0)}), path)
+
+    first, second = read_arrow_table(path), read_arrow_table(path)
+    assert np.shares_memory(column_values(first), column_values(second))
+    frame = read_arrow_file(path)
+    assert np.shares_memory(frame["x"].to_numpy(), column_values(first))
+    assert not frame["x"].to_numpy().flags.writeable
+
+    # File được thay (os.replace) thì lần đọc sau map file mới
+    write_arrow_file(pd.DataFrame({"x": np.arange(1000.0) + 1}), path)
+    replaced = read_arrow_table(path)
+    assert column_values(replaced)[0] == 1.0 and column_values(first)[0] == 0.0
+    assert not np.shares_memory(column_values(replaced), column_values(first))
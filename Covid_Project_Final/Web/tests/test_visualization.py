@@ -0,0 +1,108 @@
+# tests/test_visualization.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.visualization import ComparisonFigureCache, CountryDayMatrix, CountrySeriesStore
+
+NAN = np.nan
+
+
+def long_frame(values_by_country, start="2021-01-01"):
+    """DataFrame dạng dài từ {quốc gia: [giá trị theo ngày]}; None = không có hàng cho ngày đó (khoảng trống)"""
+    rows = []
+    for country, values in values_by_country.items():
+        for day, value in enumerate(values):
+            if value is not None:
+                rows.append({"location": country, "iso_code": country[:3].upper(),
+                             "date": pd.Timestamp(start) + pd.Timedelta(days=day), "metric": value})
+    return pd.DataFrame(rows)
+
+
+def test_forward_fill_keeps_leading_nan_and_fills_gaps():
+    matrix = CountryDayMatrix(long_frame({
+        "Vietnam": [NAN, NAN, 3.0, None, NAN, 6.0, None],  # NaN đầu, thiếu hàng, NaN giữa và cuối
+        "Japan": [1.0, None, None, 4.0, 5.0, NAN, 7.0],
+    }), "metric")
+
+    assert list(matrix.locations) == ["Japan", "Vietnam"]
+    assert list(matrix.iso_codes) == ["JAP", "VIE"]
+    assert len(matrix.dates) == 7 and matrix.values.dtype == np.float32
+    np.testing.assert_array_equal(matrix.values[0], [1, 1, 1, 4, 5, 5, 7])
+    np.testing.assert_array_equal(matrix.values[1], [NAN, NAN, 3, 3, 3, 6, 6])
+
+
+def test_forward_fill_matches_pandas_ffill():
+    rng = np.random.default_rng(0)
+    data = {f"Country {i}": [None if rng.random() < 0.2 else (NAN if rng.random() < 0.3 else float(v))
+                             for v in range(40)] for i in range(5)}
+    data["Country 0"][0], data["Country 0"][-1] = 0.0, 39.0  # ngày đầu và cuối có dữ liệu: ma trận đủ 40 ngày
+    matrix = CountryDayMatrix(long_frame(data), "metric")
+
+    expected = pd.DataFrame(
+        [[NAN if v is None else v for v in data[country]] for country in matrix.locations]
+    ).ffill(axis=1).to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(matrix.values, expected)
+
+
+@pytest.mark.parametrize("start, end, step, expected_days", [
+    ("2021-01-01", "2021-01-10", 3, [0, 3, 6, 9]),
+    ("2021-01-01", "2021-01-09", 3, [0, 3, 6, 8]),     # luôn có ngày cuối của khoảng
+    ("2021-01-03", "2021-01-04", 7, [2, 3]),
+    ("2020-12-01", "2021-01-02", 7, [0, 1]),           # khoảng vượt ra ngoài dữ liệu bị cắt lại
+    ("2021-01-05", "2021-01-05", 0, [4]),              # step < 1 được coi là 1
+])
+def test_slice_samples_every_step_days(start, end, step, expected_days):
+    matrix = CountryDayMatrix(long_frame({"Vietnam": [float(day) for day in range(10)]}), "metric")
+    dates, values = matrix.slice(start, end, step_days=step)
+    assert list(dates) == [pd.Timestamp("2021-01-01") + pd.Timedelta(days=d) for d in expected_days]
+    np.testing.assert_array_equal(values[0], expected_days)
+
+
+def test_slice_outside_data_is_empty():
+    matrix = CountryDayMatrix(long_frame({"Vietnam": [1.0, 2.0]}), "metric")
+    dates, values = matrix.slice("2022-01-01", "2022-02-01")
+    assert len(dates) == 0 and values.shape == (1, 0)
+
+
+@pytest.fixture(scope="module")
+def series_store():
+    days = 30
+    data = {country: [float(i * (k + 1)) for i in range(days)] for k, country in enumerate(["A", "B", "C", "D"])}
+    frame = long_frame(data).rename(columns={"metric": "new_cases"})
+    frame["new_deaths"] = frame["new_cases"] / 10
+    return CountrySeriesStore(frame, ["new_cases", "new_deaths"])
+
+
+def rebuilt_figure(store, selected, metric, label, colors):
+    """Figure dựng từ đầu bằng một cache mới với cùng bảng màu (màu theo quốc gia được giữ cố định giữa các lần chọn)"""
+    cache = ComparisonFigureCache()
+    cache.colors = dict(colors)
+    return cache.update(store, selected, metric, label)
+
+
+@pytest.mark.parametrize("steps", [
+    [["A", "B"], ["A", "B", "C"]],          # thêm
+    [["A", "B", "C"], ["A", "C"]],          # bớt
+    [["A", "B"], ["C", "A"]],               # thêm và bớt, quốc gia mới đứng trước
+    [["A"], ["B", "C", "D"], ["D", "A"]],
+    [["A", "B"], ["A", "B", "Atlantis"]],   # quốc gia không có dữ liệu bị bỏ qua
+])
+def test_incremental_figure_matches_full_rebuild(series_store, steps):
+    cache = ComparisonFigureCache()
+    for selected in steps:
+        figure = cache.update(series_store, selected, "new_cases", "Ca mới")
+        expected = rebuilt_figure(series_store, selected, "new_cases", "Ca mới", cache.colors)
+        assert figure.to_json() == expected.to_json()
+    assert [trace.name for trace in figure.data] == [c for c in steps[-1] if c in series_store.series]
+
+
+def test_figure_is_rebuilt_for_new_metric_or_store(series_store):
+    cache = ComparisonFigureCache()
+    first = cache.update(series_store, ["A", "B"], "new_cases", "Ca mới")
+    assert cache.update(series_store, ["A", "B", "C"], "new_cases", "Ca mới") is first
+
+    deaths = cache.update(series_store, ["A", "B"], "new_deaths", "Tử vong mới")
+    assert deaths is not first
+    assert deaths.to_json() == rebuilt_figure(series_store, ["A", "B"], "new_deaths", "Tử vong mới", cache.colors).to_json()
+    np.testing.assert_allclose(deaths.data[1].y, series_store.get("B", "new_deaths")[1])